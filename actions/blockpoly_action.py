@@ -1,8 +1,9 @@
 from typing import Dict, Any
 
 from block_poly.b64 import B64
+from block_poly.base import Base
 from block_poly.coefficients import Coefficients
-from constants import XEX_SEMANTIC
+from constants import BLOCK_SIZE, XEX_SEMANTIC
 
 
 def block2poly_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,3 +23,20 @@ def poly2block_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
         Coefficients.from_gcm_semantic(coefficients))
 
     return {"block": result.b64}
+
+
+def block2poly_batch_action(arguments_list: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """Turns all blocks into one bit string at once and reads the coefficients of every block from its slice"""
+    blocks = [B64(arguments["block"]).block for arguments in arguments_list]
+    if any(len(block) != BLOCK_SIZE for block in blocks):
+        return [block2poly_action(arguments) for arguments in arguments_list]
+
+    xex_blocks = b"".join(block if arguments["semantic"] == XEX_SEMANTIC else Base.inverse_block_bits(block)
+                          for arguments, block in zip(arguments_list, blocks))
+
+    # Little endian int => reversed bit string starts with coefficient 0 of the first block
+    block_bits = BLOCK_SIZE * 8
+    bits = f"{int.from_bytes(xex_blocks, byteorder='little'):0{len(xex_blocks) * 8}b}"[::-1]
+
+    return [{"coefficients": [pos for pos, bit in enumerate(bits[offset:offset + block_bits]) if bit == "1"]}
+            for offset in range(0, len(bits), block_bits)]
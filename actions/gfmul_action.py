@@ -1,9 +1,12 @@
+import base64
 from typing import Dict, Any
 
 from block_poly.b64 import B64
+from block_poly.base import Base
 from block_poly.poly import Poly
+from galoisfield.batch import gfmul_blocks
 from galoisfield.galoisfieldelement import GaloisFieldElement
-from constants import XEX_SEMANTIC
+from constants import BLOCK_SIZE, XEX_SEMANTIC
 
 
 def gfmul_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -19,3 +22,28 @@ def gfmul_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
         Poly.from_gcm_semantic(int_result).b64)
 
     return {"product": b64_result}
+
+
+def _to_xex_block(b64: str, semantic: str) -> bytes:
+    block = B64(b64).block
+    return block if semantic == XEX_SEMANTIC else Base.inverse_block_bits(block)
+
+
+def gfmul_batch_action(arguments_list: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """Converts all operands into one buffer, multiplies them in one go and splits the products up again"""
+    semantics = [arguments["semantic"] for arguments in arguments_list]
+    a_blocks = [_to_xex_block(arguments["a"], semantic) for arguments, semantic in zip(arguments_list, semantics)]
+    b_blocks = [_to_xex_block(arguments["b"], semantic) for arguments, semantic in zip(arguments_list, semantics)]
+
+    if any(len(block) != BLOCK_SIZE for block in a_blocks + b_blocks):
+        return [gfmul_action(arguments) for arguments in arguments_list]
+
+    products = gfmul_blocks(b"".join(a_blocks), b"".join(b_blocks))
+
+    results = []
+    for i, semantic in enumerate(semantics):
+        product = products[i * BLOCK_SIZE:(i + 1) * BLOCK_SIZE]
+        product = product if semantic == XEX_SEMANTIC else Base.inverse_block_bits(product)
+        results.append({"product": base64.b64encode(product).decode()})
+
+    return results
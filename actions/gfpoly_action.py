@@ -1,15 +1,20 @@
 from typing import Dict, Any
 
+from galoisfield.arraypolynomial import ArrayPolynomial
 from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
 from galoisfield.galoisfieldelement import GaloisFieldElement
 from gcm_crack.recover_h import sff, ddf, edf
 from block_poly.poly import Poly
 from block_poly.b64 import B64
+from block_poly.base import Base
+from block_poly.block import Block
+from galoisfield.batch import gfdiv_blocks
+from constants import BLOCK_SIZE
 
 
 def gfpoly_add_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    A = GaloisFieldPolynomial.from_b64(arguments["A"])
-    B = GaloisFieldPolynomial.from_b64(arguments["B"])
+    A = ArrayPolynomial.from_b64(arguments["A"])
+    B = ArrayPolynomial.from_b64(arguments["B"])
 
     S = A + B
 
@@ -17,8 +22,8 @@ def gfpoly_add_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def gfpoly_mul_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    A = GaloisFieldPolynomial.from_b64(arguments["A"])
-    B = GaloisFieldPolynomial.from_b64(arguments["B"])
+    A = ArrayPolynomial.from_b64(arguments["A"])
+    B = ArrayPolynomial.from_b64(arguments["B"])
 
     S = A * B
 
@@ -27,7 +32,7 @@ def gfpoly_mul_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 def gfpoly_pow_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
     k = arguments["k"]
-    A = GaloisFieldPolynomial.from_b64(arguments["A"])
+    A = ArrayPolynomial.from_b64(arguments["A"])
 
     Z = A ** k
 
@@ -43,9 +48,23 @@ def gfdiv_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
     return {"q": Poly.from_gcm_semantic(q).b64}
 
 
+def gfdiv_batch_action(arguments_list: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """Converts all operands into one buffer, divides them in one go and splits the quotients up again"""
+    a_blocks = b"".join(B64(arguments["a"]).block for arguments in arguments_list)
+    b_blocks = b"".join(B64(arguments["b"]).block for arguments in arguments_list)
+
+    if len(a_blocks) != len(b_blocks) or len(a_blocks) != len(arguments_list) * BLOCK_SIZE:
+        return [gfdiv_action(arguments) for arguments in arguments_list]
+
+    quotients = Base.inverse_block_bits(gfdiv_blocks(Base.inverse_block_bits(a_blocks),
+                                                     Base.inverse_block_bits(b_blocks)))
+
+    return [{"q": Block(quotients[i:i + BLOCK_SIZE]).b64} for i in range(0, len(quotients), BLOCK_SIZE)]
+
+
 def gfpoly_divmod_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    a = GaloisFieldPolynomial.from_b64(arguments["A"])
-    b = GaloisFieldPolynomial.from_b64(arguments["B"])
+    a = ArrayPolynomial.from_b64(arguments["A"])
+    b = ArrayPolynomial.from_b64(arguments["B"])
 
     Q, R = divmod(a, b)
 
@@ -57,8 +76,8 @@ def gfpoly_powmod_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
     M = arguments["M"]
     k = arguments["k"]
 
-    gfp_a = GaloisFieldPolynomial.from_b64(A)
-    gfp_m = GaloisFieldPolynomial.from_b64(M)
+    gfp_a = ArrayPolynomial.from_b64(A)
+    gfp_m = ArrayPolynomial.from_b64(M)
 
     Z = pow(gfp_a, k, gfp_m)
 
@@ -67,7 +86,7 @@ def gfpoly_powmod_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 def gfpoly_sort_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
     b64_polys = arguments["polys"]
-    polys = [GaloisFieldPolynomial.from_b64(b64_poly) for b64_poly in b64_polys]
+    polys = [ArrayPolynomial.from_b64(b64_poly) for b64_poly in b64_polys]
 
     sorted_polys = sorted(polys)
 
@@ -77,29 +96,29 @@ def gfpoly_sort_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def gfpoly_make_monic_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    A = GaloisFieldPolynomial.from_b64(arguments["A"])
+    A = ArrayPolynomial.from_b64(arguments["A"])
     A.make_monic()
 
     return {"A*": A.to_b64()}
 
 
 def gfpoly_sqrt_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    Q = GaloisFieldPolynomial.from_b64(arguments["Q"])
+    Q = ArrayPolynomial.from_b64(arguments["Q"])
     sqrt_Q = Q.sqrt()
 
     return {"S": sqrt_Q.to_b64()}
 
 
 def gfpoly_diff_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    F = GaloisFieldPolynomial.from_b64(arguments["F"])
+    F = ArrayPolynomial.from_b64(arguments["F"])
     derived_F = F.diff()
 
     return {"F'": derived_F.to_b64()}
 
 
 def gfpoly_gcd_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
-    A = GaloisFieldPolynomial.from_b64(arguments["A"])
-    B = GaloisFieldPolynomial.from_b64(arguments["B"])
+    A = ArrayPolynomial.from_b64(arguments["A"])
+    B = ArrayPolynomial.from_b64(arguments["B"])
 
     result = A.gcd(B)
 
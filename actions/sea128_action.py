@@ -1,9 +1,10 @@
+from collections import defaultdict
 from typing import Dict, Any
 
 from block_poly.b64 import B64
 from block_poly.block import Block
-from crypto_algorithms.sea128 import sea_encrypt, sea_decrypt
-from constants import ENCRYPT_MODE
+from crypto_algorithms.sea128 import sea_encrypt, sea_decrypt, sea_encrypt_blocks, sea_decrypt_blocks
+from constants import BLOCK_SIZE, ENCRYPT_MODE
 
 
 def sea128_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -14,3 +15,28 @@ def sea128_action(arguments: Dict[str, Any]) -> Dict[str, Any]:
     result = sea_encrypt(key, input_data) if mode == ENCRYPT_MODE else sea_decrypt(key, input_data)
 
     return {"output": Block(result).b64}
+
+
+def sea128_batch_action(arguments_list: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """All single block inputs with the same key and mode are en-/decrypted in one ECB call"""
+    results: list[Dict[str, Any]] = [{}] * len(arguments_list)
+    inputs = [B64(arguments["input"]).block for arguments in arguments_list]
+    groups = defaultdict(list)
+
+    for i, arguments in enumerate(arguments_list):
+        if len(inputs[i]) == BLOCK_SIZE:
+            groups[(arguments["key"], arguments["mode"])].append(i)
+        else:
+            results[i] = sea128_action(arguments)
+
+    for (b64_key, mode), indexes in groups.items():
+        key = B64(b64_key).block
+        input_blocks = b"".join(inputs[i] for i in indexes)
+
+        output_blocks = sea_encrypt_blocks(key, input_blocks) if mode == ENCRYPT_MODE else (
+            sea_decrypt_blocks(key, input_blocks))
+
+        for position, i in enumerate(indexes):
+            results[i] = {"output": Block(output_blocks[position * BLOCK_SIZE:(position + 1) * BLOCK_SIZE]).b64}
+
+    return results
@@ -0,0 +1,114 @@
+import random
+from typing import Callable, Dict, Final
+
+from crypto_algorithms.gcm import get_ghash
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from galoisfield.backend import gfpoly_divmod
+from galoisfield.polymodulus import PolyModulus
+from galoisfield.polymul import coefficients_from_buffer, karatsuba_mul, schoolbook_mul
+from rsa_backdoor.glasskey import is_prime
+
+GFMUL_OPERATIONS: Final[int] = 10000
+
+# A benchmark gets the seeded rng and the scale of the size and returns the function that gets timed,
+# so the setup isn't part of the measurement
+Benchmark = Callable[[random.Random, int], Callable[[], object]]
+
+
+def _random_gfe(rng: random.Random) -> GaloisFieldElement:
+    return GaloisFieldElement(rng.getrandbits(128) | 1)
+
+
+def _random_poly(rng: random.Random, degree: int) -> GaloisFieldPolynomial:
+    return GaloisFieldPolynomial([_random_gfe(rng) for _ in range(degree + 1)])
+
+
+def _gfmul(rng: random.Random, scale: int) -> Callable[[], object]:
+    pairs = [(_random_gfe(rng), _random_gfe(rng)) for _ in range(GFMUL_OPERATIONS * scale)]
+    return lambda: [a * b for a, b in pairs]
+
+
+def _poly_mul(rng: random.Random, scale: int) -> Callable[[], object]:
+    a, b = _random_poly(rng, 16 * scale), _random_poly(rng, 16 * scale)
+    return lambda: a * b
+
+
+def _coefficient_arrays(rng: random.Random, scale: int):
+    # 64 / 256 / 1024 coefficients: below, around and above KARATSUBA_CUTOFF, both variants at the same sizes
+    # show where the crossover sits
+    return [coefficients_from_buffer(_random_poly(rng, 64 * scale - 1).to_uint64_buffer()) for _ in range(2)]
+
+
+def _poly_mul_schoolbook(rng: random.Random, scale: int) -> Callable[[], object]:
+    a, b = _coefficient_arrays(rng, scale)
+    return lambda: schoolbook_mul(a, b)
+
+
+def _poly_mul_karatsuba(rng: random.Random, scale: int) -> Callable[[], object]:
+    a, b = _coefficient_arrays(rng, scale)
+    return lambda: karatsuba_mul(a, b)
+
+
+def _poly_add(rng: random.Random, scale: int) -> Callable[[], object]:
+    # Different degrees, the old implementation zero padded the shorter one
+    a, b = _random_poly(rng, 256 * scale), _random_poly(rng, 16 * scale)
+    return lambda: [a + b for _ in range(100)]
+
+
+def _poly_divmod(rng: random.Random, scale: int) -> Callable[[], object]:
+    a, b = _random_poly(rng, 32 * scale), _random_poly(rng, 16 * scale)
+    return lambda: divmod(a, b)
+
+
+def _poly_powmod(rng: random.Random, scale: int) -> Callable[[], object]:
+    # Same shape as one ddf round: x^(2^128) mod f
+    f = _random_poly(rng, 4 * scale).make_monic()
+    return lambda: pow(GaloisFieldPolynomial.x(), 1 << 128, f)
+
+
+def _reduce_operands(rng: random.Random, scale: int):
+    # Product of two reduced polynomials modulo f of degree 256 * scale, the shape every powmod step reduces
+    modulus = PolyModulus.from_polynomial(_random_poly(rng, 256 * scale))
+    a = coefficients_from_buffer(_random_poly(rng, 2 * modulus.degree - 2).to_uint64_buffer())
+    return modulus, a
+
+
+def _poly_reduce_divmod(rng: random.Random, scale: int) -> Callable[[], object]:
+    modulus, a = _reduce_operands(rng, scale)
+    return lambda: gfpoly_divmod(a, modulus.modulus)
+
+
+def _poly_reduce_barrett(rng: random.Random, scale: int) -> Callable[[], object]:
+    modulus, a = _reduce_operands(rng, scale)
+    modulus.reciprocal()
+    return lambda: modulus.reduce(a)
+
+
+def _ghash(rng: random.Random, scale: int) -> Callable[[], object]:
+    h = _random_gfe(rng)
+    ad = _random_poly(rng, 8 * scale)
+    ciphertext = _random_poly(rng, 256 * scale)
+    l = _random_gfe(rng)
+    return lambda: get_ghash(h, ad, ciphertext, l)
+
+
+def _miller_rabin(rng: random.Random, scale: int) -> Callable[[], object]:
+    bits = 256 * scale
+    candidates = [rng.getrandbits(bits) | (1 << (bits - 1)) | 1 for _ in range(20)]
+    return lambda: [is_prime(candidate) for candidate in candidates]
+
+
+MICRO_BENCHMARKS: Final[Dict[str, Benchmark]] = {
+    "gfmul": _gfmul,
+    "poly_mul": _poly_mul,
+    "poly_mul_schoolbook": _poly_mul_schoolbook,
+    "poly_mul_karatsuba": _poly_mul_karatsuba,
+    "poly_add": _poly_add,
+    "poly_divmod": _poly_divmod,
+    "poly_powmod": _poly_powmod,
+    "poly_reduce_divmod": _poly_reduce_divmod,
+    "poly_reduce_barrett": _poly_reduce_barrett,
+    "ghash": _ghash,
+    "miller_rabin": _miller_rabin,
+}
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Benchmark suite: seeded workloads for every action plus micro benchmarks of the hot primitives.
+   Writes a json report and fails (exit code 1) if a benchmark got slower than the stored baseline allows.
+
+   python3 -m bench.run --sizes small,medium --output bench_report.json
+   python3 -m bench.run --update-baseline
+   python3 -m bench.run --filter 'micro/*' --memory   (also reports peak memory and retained blocks,
+                                                      checked against the baseline where it has them)"""
+import argparse
+import fnmatch
+import json
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Final, Optional
+
+from bench.micro import MICRO_BENCHMARKS
+from bench.workloads import SIZES, WORKLOADS, BENCH_ORACLE_HOST, BENCH_ORACLE_PORT, generate_workload
+from build import main as build_main
+from kauma import ACTION_PROCESSORS, process_testcases
+from paddingoracle.server import Server
+from testcase_generator.padding_oracle_generator import PO_TESTCASE_KEY
+
+BASELINE_FILE: Final[Path] = Path(__file__).parent / "baseline.json"
+DEFAULT_SEED: Final[int] = 1337
+DEFAULT_REPEAT: Final[int] = 3
+# Allowed slowdown relative to the baseline before a benchmark counts as regression (0.25 => 25%)
+DEFAULT_THRESHOLD: Final[float] = 0.25
+# Very short benchmarks are dominated by noise, they can't regress below this absolute difference
+NOISE_FLOOR_SECONDS: Final[float] = 0.005
+# Same for the peak memory of --memory runs against a baseline that has one
+NOISE_FLOOR_BYTES: Final[int] = 64 * 1024
+
+
+def _measure_memory(func: Callable[[], object]) -> Dict[str, int]:
+    """One extra run under tracemalloc: the peak memory and the memory blocks still held by the result
+       (e.g. the elements of a polynomial), both relative to before the run"""
+    tracemalloc.start()
+    try:
+        before_bytes, _ = tracemalloc.get_traced_memory()
+        before_blocks = sys.getallocatedblocks()
+        result = func()
+        after_blocks = sys.getallocatedblocks()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del result
+    return {"retained_blocks": after_blocks - before_blocks, "peak_bytes": peak_bytes - before_bytes}
+
+
+def _measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    # Warm up run, so lazy imports and caches filled on first use aren't part of the measurement
+    func()
+
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+
+    return {"min": min(timings), "median": statistics.median(timings), "mean": statistics.mean(timings),
+            "runs": repeat}
+
+
+def _start_oracle_server():
+    server = Server(BENCH_ORACLE_HOST, BENCH_ORACLE_PORT, PO_TESTCASE_KEY)
+    threading.Thread(target=server.run, daemon=True).start()
+    time.sleep(0.5)
+
+
+def _report(name: str, result: Dict[str, Any]):
+    line = f"{name:<45}{result['min'] * 1000:>12.2f} ms"
+    if "peak_bytes" in result:
+        line += f"{result['peak_bytes'] / 1024:>12.1f} KiB peak{result['retained_blocks']:>10} blocks retained"
+    print(line, file=sys.stderr)
+
+
+def run_benchmarks(sizes: list[str], seed: int, repeat: int, pattern: str,
+                   memory: bool = False) -> Dict[str, Dict[str, Any]]:
+    results = {}
+
+    for size in sizes:
+        for action in ACTION_PROCESSORS:
+            name = f"action/{action}/{size}"
+            if not fnmatch.fnmatch(name, pattern):
+                continue
+
+            workload = generate_workload(action, size, seed)
+            results[name] = {**_measure(lambda: process_testcases(workload), repeat),
+                             "testcases": len(workload["testcases"])}
+            if memory:
+                results[name].update(_measure_memory(lambda: process_testcases(workload)))
+            _report(name, results[name])
+
+        for micro, benchmark in MICRO_BENCHMARKS.items():
+            name = f"micro/{micro}/{size}"
+            if not fnmatch.fnmatch(name, pattern):
+                continue
+
+            func = benchmark(random.Random(f"{seed}-{name}"), SIZES[size])
+            results[name] = _measure(func, repeat)
+            if memory:
+                results[name].update(_measure_memory(func))
+            _report(name, results[name])
+
+    return results
+
+
+def _threshold_for(name: str, threshold: float, overrides: Dict[str, float]) -> float:
+    for pattern, value in overrides.items():
+        if fnmatch.fnmatch(name, pattern):
+            return value
+    return threshold
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], metric: str,
+            threshold: float, overrides: Dict[str, float]) -> list[Dict[str, Any]]:
+    comparison = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            comparison.append({"name": name, "status": "new", "current": result[metric]})
+            continue
+
+        base, current = baseline[name][metric], result[metric]
+        allowed = _threshold_for(name, threshold, overrides)
+        regressed = current > base * (1 + allowed) and current - base > NOISE_FLOOR_SECONDS
+        entry = {"name": name, "baseline": base, "current": current,
+                 "ratio": current / base if base else float("inf"), "threshold": allowed}
+
+        if "peak_bytes" in result and "peak_bytes" in baseline[name]:
+            base_peak, current_peak = baseline[name]["peak_bytes"], result["peak_bytes"]
+            entry["peak_ratio"] = current_peak / base_peak if base_peak else float("inf")
+            regressed |= current_peak > base_peak * (1 + allowed) and current_peak - base_peak > NOISE_FLOOR_BYTES
+
+        entry["status"] = "regression" if regressed else "ok"
+        comparison.append(entry)
+
+    return comparison
+
+
+def _format_comparison(comparison: list[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<45}{'baseline ms':>14}{'current ms':>14}{'ratio':>9}{'peak ratio':>12}  status"]
+
+    for entry in comparison:
+        if entry["status"] == "new":
+            lines.append(f"{entry['name']:<45}{'-':>14}{entry['current'] * 1000:>14.2f}{'-':>9}{'-':>12}  new")
+        else:
+            peak_ratio = f"{entry['peak_ratio']:.2f}" if "peak_ratio" in entry else "-"
+            lines.append(f"{entry['name']:<45}{entry['baseline'] * 1000:>14.2f}{entry['current'] * 1000:>14.2f}"
+                         f"{entry['ratio']:>9.2f}{peak_ratio:>12}  {entry['status']}")
+
+    return "\n".join(lines)
+
+
+def _parse_overrides(values: list[str]) -> Dict[str, float]:
+    overrides = {}
+    for value in values:
+        pattern, _, threshold = value.partition("=")
+        overrides[pattern] = float(threshold)
+    return overrides
+
+
+def parse_arguments(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(prog="python3 -m bench.run")
+    parser.add_argument("--sizes", default="small", help=f"comma separated, out of {', '.join(SIZES)}")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark")
+    parser.add_argument("--filter", default="*", help="only run benchmarks matching this pattern, e.g. 'micro/*'")
+    parser.add_argument("--output", type=Path, help="write the json report to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as new baseline")
+    parser.add_argument("--memory", action="store_true",
+                        help="one more run per benchmark under tracemalloc for peak memory and retained blocks")
+    parser.add_argument("--metric", choices=["min", "median", "mean"], default="min")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline (default: %(default)s => 25%%)")
+    parser.add_argument("--threshold-override", action="append", default=[], metavar="PATTERN=THRESHOLD",
+                        help="other threshold for the benchmarks matching PATTERN, e.g. 'action/padding_oracle/*=1.0'")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_arguments(argv)
+    sizes = args.sizes.split(",")
+    assert all(size in SIZES for size in sizes), f"Unknown size in {args.sizes}"
+    assert set(WORKLOADS) == set(ACTION_PROCESSORS), "Every action needs a workload"
+
+    build_main()
+    _start_oracle_server()
+
+    results = run_benchmarks(sizes, args.seed, args.repeat, args.filter, args.memory)
+    report = {
+        "meta": {"timestamp": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "machine": platform.machine(), "processor": platform.processor(), "seed": args.seed,
+                 "repeat": args.repeat, "sizes": sizes},
+        "results": results
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"results": {}}
+        baseline["meta"] = report["meta"]
+        baseline["results"].update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline found at {args.baseline}, run with --update-baseline first", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"]
+    comparison = compare(results, baseline, args.metric, args.threshold, _parse_overrides(args.threshold_override))
+    print(_format_comparison(comparison), file=sys.stderr)
+
+    regressions = [entry["name"] for entry in comparison if entry["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks regressed: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+
+    print("\nNo regressions", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
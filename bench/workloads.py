@@ -0,0 +1,270 @@
+import base64
+import json
+import random
+from pathlib import Path
+from typing import Any, Callable, Dict, Final
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from block_poly.block import Block
+from constants import BLOCK_SIZE
+from crypto_algorithms.gcm import gcm_encrypt
+from crypto_algorithms.sea128 import aes_encrypt, sea_encrypt
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from testcase_generator.padding_oracle_generator import pkcs7_pad, PO_TESTCASE_KEY
+
+# Size name => scale factor, every workload interprets it as count or input size of its testcases
+SIZES: Final[Dict[str, int]] = {"small": 1, "medium": 4, "large": 16}
+
+BENCH_ORACLE_HOST: Final[str] = "localhost"
+# Different from the port test.py uses, so both can run at the same time
+BENCH_ORACLE_PORT: Final[int] = 9998
+
+MAX_GENKEY_BITS: Final[int] = 2048
+
+# glasskey_break needs a matching certificate and cms message, the one of the assignment is used as fixture
+FIXTURE_FILE: Final[Path] = Path(__file__).parent.parent / "testcases" / "assignment5_input.json"
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _random_bytes(rng: random.Random, length: int) -> bytes:
+    return rng.getrandbits(length * 8).to_bytes(length, byteorder="little")
+
+
+def _random_block(rng: random.Random) -> str:
+    return _b64(_random_bytes(rng, BLOCK_SIZE))
+
+
+def _random_gfe(rng: random.Random) -> GaloisFieldElement:
+    return GaloisFieldElement(rng.getrandbits(128) | 1)
+
+
+def _random_poly(rng: random.Random, degree: int) -> GaloisFieldPolynomial:
+    return GaloisFieldPolynomial([_random_gfe(rng) for _ in range(degree + 1)])
+
+
+def _random_monic_poly(rng: random.Random, degree: int) -> GaloisFieldPolynomial:
+    return _random_poly(rng, degree).make_monic()
+
+
+def _product_of_linear_factors(rng: random.Random, count: int) -> GaloisFieldPolynomial:
+    product = GaloisFieldPolynomial.one()
+    for _ in range(count):
+        product *= GaloisFieldPolynomial([_random_gfe(rng), GaloisFieldElement.one()])
+    return product
+
+
+def _semantic(rng: random.Random) -> str:
+    return rng.choice(["xex", "gcm"])
+
+
+def _poly2block(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"coefficients": sorted(rng.sample(range(128), rng.randint(1, 20))), "semantic": _semantic(rng)}
+            for _ in range(100 * scale)]
+
+
+def _block2poly(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"block": _random_block(rng), "semantic": _semantic(rng)} for _ in range(100 * scale)]
+
+
+def _gfmul(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"a": _random_block(rng), "b": _random_block(rng), "semantic": _semantic(rng)}
+            for _ in range(100 * scale)]
+
+
+def _sea128(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"mode": rng.choice(["encrypt", "decrypt"]), "key": _random_block(rng), "input": _random_block(rng)}
+            for _ in range(100 * scale)]
+
+
+def _xex(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"mode": rng.choice(["encrypt", "decrypt"]), "key": _b64(_random_bytes(rng, 2 * BLOCK_SIZE)),
+             "tweak": _random_block(rng), "input": _b64(_random_bytes(rng, 4 * scale * BLOCK_SIZE))}
+            for _ in range(10)]
+
+
+def _gcm_encrypt(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"algorithm": rng.choice(["aes128", "sea128"]), "nonce": _b64(_random_bytes(rng, 12)),
+             "key": _random_block(rng), "plaintext": _b64(_random_bytes(rng, 4 * scale * BLOCK_SIZE + 3)),
+             "ad": _b64(_random_bytes(rng, scale * BLOCK_SIZE))}
+            for _ in range(10)]
+
+
+def _gcm_decrypt(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"algorithm": rng.choice(["aes128", "sea128"]), "nonce": _b64(_random_bytes(rng, 12)),
+             "key": _random_block(rng), "ciphertext": _b64(_random_bytes(rng, 4 * scale * BLOCK_SIZE + 3)),
+             "ad": _b64(_random_bytes(rng, scale * BLOCK_SIZE)), "tag": _random_block(rng)}
+            for _ in range(10)]
+
+
+def _padding_oracle(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    testcases = []
+    for _ in range(2):
+        iv = _random_bytes(rng, BLOCK_SIZE)
+        plaintext = pkcs7_pad(_random_bytes(rng, scale * BLOCK_SIZE - 1))
+        encryptor = Cipher(algorithms.AES(PO_TESTCASE_KEY), modes.CBC(iv)).encryptor()
+        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+        testcases.append({"hostname": BENCH_ORACLE_HOST, "port": BENCH_ORACLE_PORT, "iv": _b64(iv),
+                          "ciphertext": _b64(ciphertext)})
+    return testcases
+
+
+def _two_polys(rng: random.Random, scale: int, count: int = 10) -> list[Dict[str, Any]]:
+    return [{"A": _random_poly(rng, 8 * scale).to_b64(), "B": _random_poly(rng, 4 * scale).to_b64()}
+            for _ in range(count)]
+
+
+def _gfpoly_pow(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"A": _random_poly(rng, 2 * scale).to_b64(), "k": 4 * scale} for _ in range(10)]
+
+
+def _gfdiv(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"a": _random_block(rng), "b": _random_block(rng)} for _ in range(20 * scale)]
+
+
+def _gfpoly_powmod(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"A": _random_poly(rng, 4 * scale).to_b64(), "M": _random_poly(rng, 4 * scale).to_b64(),
+             "k": rng.getrandbits(64 * scale)} for _ in range(5)]
+
+
+def _gfpoly_sort(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"polys": [_random_poly(rng, rng.randint(0, 4 * scale)).to_b64() for _ in range(20 * scale)]}
+            for _ in range(5)]
+
+
+def _single_poly(name: str, degree_factor: int) -> Callable[[random.Random, int], list[Dict[str, Any]]]:
+    def workload(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+        return [{name: _random_poly(rng, degree_factor * scale).to_b64()} for _ in range(10)]
+    return workload
+
+
+def _gfpoly_sqrt(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    testcases = []
+    for _ in range(10):
+        root = _random_poly(rng, 4 * scale)
+        testcases.append({"Q": (root * root).to_b64()})
+    return testcases
+
+
+def _gfpoly_gcd(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    testcases = []
+    for _ in range(5):
+        common = _random_monic_poly(rng, 2 * scale)
+        testcases.append({"A": (common * _random_poly(rng, 4 * scale)).to_b64(),
+                          "B": (common * _random_poly(rng, 2 * scale)).to_b64()})
+    return testcases
+
+
+def _gfpoly_factor_sff(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    testcases = []
+    for _ in range(2):
+        repeated = _random_monic_poly(rng, scale)
+        f = repeated * repeated * repeated * _random_monic_poly(rng, 2 * scale)
+        testcases.append({"F": f.to_b64()})
+    return testcases
+
+
+def _gfpoly_factor_ddf(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"F": (_product_of_linear_factors(rng, 2 * scale) * _random_monic_poly(rng, 2)).to_b64()}
+            for _ in range(2)]
+
+
+def _gfpoly_factor_edf(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{"F": _product_of_linear_factors(rng, 2 * scale + 1).to_b64(), "d": 1} for _ in range(2)]
+
+
+def _gcm_crack(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    testcases = []
+    for _ in range(2):
+        nonce = _random_bytes(rng, 12)
+        key = _random_block(rng)
+        algorithm = rng.choice([aes_encrypt, sea_encrypt])
+
+        messages = {}
+        for name in ("m1", "m2", "m3", "forgery"):
+            plaintext = _random_bytes(rng, rng.randint(1, 2 * scale * BLOCK_SIZE))
+            ad = _random_bytes(rng, rng.randint(0, BLOCK_SIZE))
+            ciphertext, tag, _, _ = gcm_encrypt(algorithm, nonce, base64.b64decode(key), plaintext, ad)
+            messages[name] = {"ciphertext": Block(ciphertext).b64, "associated_data": Block(ad).b64,
+                              "tag": Block(tag).b64}
+
+        del messages["forgery"]["tag"]
+        testcases.append({"nonce": _b64(nonce), **messages})
+    return testcases
+
+
+def _glasskey_base(rng: random.Random) -> Dict[str, Any]:
+    return {"agency_key": _b64(_random_bytes(rng, 8)), "seed": _b64(_random_bytes(rng, 8))}
+
+
+def _glasskey_prng(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{**_glasskey_base(rng), "lengths": [rng.randint(1, 64) for _ in range(20 * scale)]} for _ in range(10)]
+
+
+def _glasskey_prng_int_bits(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{**_glasskey_base(rng), "bit_lengths": [rng.randint(1, 256) for _ in range(20 * scale)]}
+            for _ in range(10)]
+
+
+def _glasskey_prng_int_min_max(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    specification = []
+    for _ in range(20 * scale):
+        low = rng.getrandbits(64)
+        specification.append({"min": low, "max": low + rng.getrandbits(64)})
+    return [{**_glasskey_base(rng), "specification": specification} for _ in range(10)]
+
+
+def _glasskey_genkey(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    return [{**_glasskey_base(rng), "bit_length": min(256 * scale, MAX_GENKEY_BITS)} for _ in range(2)]
+
+
+def _glasskey_break(rng: random.Random, scale: int) -> list[Dict[str, Any]]:
+    with open(FIXTURE_FILE) as f:
+        fixture = json.load(f)["testcases"]["glasskey-break"]["arguments"]
+    return [fixture] * scale
+
+
+# Every action of ACTION_PROCESSORS => generator of the arguments of its testcases
+WORKLOADS: Final[Dict[str, Callable[[random.Random, int], list[Dict[str, Any]]]]] = {
+    "poly2block": _poly2block,
+    "block2poly": _block2poly,
+    "gfmul": _gfmul,
+    "sea128": _sea128,
+    "xex": _xex,
+    "gcm_encrypt": _gcm_encrypt,
+    "gcm_decrypt": _gcm_decrypt,
+    "padding_oracle": _padding_oracle,
+    "gfpoly_add": _two_polys,
+    "gfpoly_mul": _two_polys,
+    "gfpoly_pow": _gfpoly_pow,
+    "gfdiv": _gfdiv,
+    "gfpoly_divmod": _two_polys,
+    "gfpoly_powmod": _gfpoly_powmod,
+    "gfpoly_sort": _gfpoly_sort,
+    "gfpoly_make_monic": _single_poly("A", 8),
+    "gfpoly_sqrt": _gfpoly_sqrt,
+    "gfpoly_diff": _single_poly("F", 8),
+    "gfpoly_gcd": _gfpoly_gcd,
+    "gfpoly_factor_sff": _gfpoly_factor_sff,
+    "gfpoly_factor_ddf": _gfpoly_factor_ddf,
+    "gfpoly_factor_edf": _gfpoly_factor_edf,
+    "gcm_crack": _gcm_crack,
+    "glasskey_prng": _glasskey_prng,
+    "glasskey_prng_int_bits": _glasskey_prng_int_bits,
+    "glasskey_prng_int_min_max": _glasskey_prng_int_min_max,
+    "glasskey_genkey": _glasskey_genkey,
+    "glasskey_break": _glasskey_break,
+}
+
+
+def generate_workload(action: str, size: str, seed: int) -> Dict[str, Any]:
+    """Testcase document for one action, the same seed always generates the same testcases"""
+    rng = random.Random(f"{seed}-{action}-{size}")
+    arguments_list = WORKLOADS[action](rng, SIZES[size])
+
+    return {"testcases": {f"{action}-{i}": {"action": action, "arguments": arguments}
+                          for i, arguments in enumerate(arguments_list)}}
@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import Final
+
+# Byte with its bit order reversed, xex and gcm semantic only differ in the bit order inside every byte
+BIT_REVERSE_TABLE: Final[bytes] = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
 
 
 class Base(ABC):
@@ -20,6 +24,11 @@ class Base(ABC):
             poly &= ~(1 << pos)
         return result
 
+    @staticmethod
+    def inverse_block_bits(data: bytes) -> bytes:
+        """Same as inverse_bits, but on the byte representation of any number of blocks at once"""
+        return data.translate(BIT_REVERSE_TABLE)
+
     @staticmethod
     def inverse_coefficients(coefficients: list[int]) -> list[int]:
         """Inverses Coefficients to get from xex => gcm or gcm => xex semantic"""
@@ -1,7 +1,8 @@
-from crypto_algorithms.sea128 import sea_encrypt, sea_decrypt
+from crypto_algorithms.sea128 import sea_encrypt, sea_encrypt_blocks, sea_decrypt_blocks
 from block_poly.poly import Poly
+from galoisfield.backend import gfmul_powers, gfmul_scalar
 from galoisfield.galoisfieldelement import GaloisFieldElement
-from utils import xor_bytes
+from constants import BLOCK_SIZE
 
 
 def split_key(key: bytes) -> (bytes, bytes):
@@ -9,20 +10,29 @@ def split_key(key: bytes) -> (bytes, bytes):
     return key[:middle], key[middle:]
 
 
+def _xor_buffers(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, byteorder='little') ^ int.from_bytes(b, byteorder='little')).to_bytes(len(a), 'little')
+
+
 def apply_fde(key: bytes, tweak: bytes, text: bytes, encrypt: bool) -> bytes:
-    """Does fde encryption and decryption. Mode depending on encrypt boolean."""
+    """Does fde encryption and decryption. Mode depending on encrypt boolean.
+       The tweak of block i is xor * alpha^i: the powers of the fixed alpha and their products with xor take two
+       backend calls, then all blocks are en-/decrypted in one AES-ECB pass"""
     key1, key2 = split_key(key)
 
     xor = sea_encrypt(key2, tweak)
-    alpha = Poly.from_xex_semantic(1 << 1).block
-
-    result = bytearray()
-    for i in range(0, len(text), 16):
-        text_block = text[i:i + 16]
-        xor_text_block = xor_bytes(text_block, xor)
-        encrypted_block = sea_encrypt(key1, xor_text_block) if encrypt else sea_decrypt(key1, xor_text_block)
-        xor_result_block = xor_bytes(encrypted_block, xor)
-        result.extend(xor_result_block)
-        xor = (GaloisFieldElement.from_block_xex(alpha) * GaloisFieldElement.from_block_xex(xor)).to_block_xex()
-
-    return bytes(result)
+    alpha = GaloisFieldElement.from_block_xex(Poly.from_xex_semantic(1 << 1).block)
+
+    blocks = len(text) // BLOCK_SIZE
+    if blocks == 0:
+        return b""
+
+    # Xex blocks are the buffer layout of the batch kernels
+    alpha_powers = gfmul_powers(int(alpha), blocks - 1)
+    tweaks = xor + bytes(gfmul_scalar(alpha_powers, int(GaloisFieldElement.from_block_xex(xor))))
+
+    xor_text_blocks = _xor_buffers(text, tweaks)
+    cipher_blocks = sea_encrypt_blocks if encrypt else sea_decrypt_blocks
+    encrypted_blocks = cipher_blocks(key1, xor_text_blocks)
+
+    return _xor_buffers(encrypted_blocks, tweaks)
@@ -1,7 +1,9 @@
 from collections.abc import Callable
+from typing import Optional
 
 from utils import xor_bytes
 from constants import BLOCK_SIZE
+from galoisfield.fixed_multiplier import FixedMultiplier, Ghash
 from galoisfield.galoisfieldelement import GaloisFieldElement
 from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
 
@@ -35,21 +37,12 @@ def get_eky0(key: bytes, nonce: bytes, encryption_algorithm: Callable) -> Galois
 
 
 def get_ghash(h: GaloisFieldElement, ad: GaloisFieldPolynomial, ciphertext: GaloisFieldPolynomial,
-              l: GaloisFieldElement) -> GaloisFieldElement:
-    zero_block = bytes(BLOCK_SIZE)
-    X = GaloisFieldElement.from_block_gcm(zero_block)
-
-    for gfe in ad:
-        X += gfe
-        X *= h
-
-    for gfe in ciphertext:
-        X += gfe
-        X *= h
+              l: GaloisFieldElement, multiplier: Optional[FixedMultiplier] = None) -> GaloisFieldElement:
+    """Pass a FixedMultiplier of h to reuse its powers for several GHASHes with the same h"""
+    ghash = Ghash(multiplier or FixedMultiplier(h))
+    ghash.update([*ad, *ciphertext, l])
 
-    X += l
-    X *= h
-    return X
+    return GaloisFieldElement(ghash.value)
 
 
 def get_l(ad: bytes, ciphertext: bytes) -> GaloisFieldElement:
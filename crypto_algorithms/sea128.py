@@ -1,28 +1,38 @@
+from functools import lru_cache
 from typing import Final
 
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 
+from constants import BLOCK_SIZE
+from profiling import counters
 from utils import xor_bytes
 
 CONSTANT_BYTES: Final[bytes] = bytes.fromhex("c0ffeec0ffeec0ffeec0ffeec0ffee11")
+CIPHER_CACHE_SIZE: Final[int] = 256
+
+
+@lru_cache(maxsize=CIPHER_CACHE_SIZE)
+def _aes_ecb_cipher(key: bytes) -> Cipher:
+    """Key schedule is set up once per key, every block of the same key (and later requests) reuse it"""
+    return Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
 
 
 def aes_encrypt(key: bytes, plaintext: bytes) -> bytes:
-    cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
-    encryptor = cipher.encryptor()
+    encryptor = _aes_ecb_cipher(key).encryptor()
 
     return encryptor.update(plaintext) + encryptor.finalize()
 
 
 def aes_decrypt(key: bytes, ciphertext: bytes) -> bytes:
-    cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
-    decryptor = cipher.decryptor()
+    decryptor = _aes_ecb_cipher(key).decryptor()
 
     return decryptor.update(ciphertext) + decryptor.finalize()
 
 
 def sea_encrypt(key: bytes, plaintext: bytes) -> bytes:
+    if counters.ENABLED:
+        counters.count(counters.SEA_ENCRYPT_BLOCKS, max(len(plaintext) // BLOCK_SIZE, 1))
     aes_encrypted = aes_encrypt(key, plaintext)
     sea_encrypted = xor_bytes(CONSTANT_BYTES, aes_encrypted)
 
@@ -34,3 +44,21 @@ def sea_decrypt(key: bytes, ciphertext: bytes) -> bytes:
     aes_decrypted = aes_decrypt(key, sea_decrypted)
 
     return aes_decrypted
+
+
+def _xor_constant(blocks: bytes) -> bytes:
+    constant = int.from_bytes(CONSTANT_BYTES * (len(blocks) // BLOCK_SIZE), byteorder='big')
+    return (int.from_bytes(blocks, byteorder='big') ^ constant).to_bytes(len(blocks), byteorder='big')
+
+
+def sea_encrypt_blocks(key: bytes, plaintext_blocks: bytes) -> bytes:
+    """sea_encrypt of every 16 byte block, but all of them in one AES-ECB pass"""
+    if counters.ENABLED:
+        counters.count(counters.SEA_ENCRYPT_BLOCKS, len(plaintext_blocks) // BLOCK_SIZE)
+
+    return _xor_constant(aes_encrypt(key, plaintext_blocks))
+
+
+def sea_decrypt_blocks(key: bytes, ciphertext_blocks: bytes) -> bytes:
+    """sea_decrypt of every 16 byte block, but all of them in one AES-ECB pass"""
+    return aes_decrypt(key, _xor_constant(ciphertext_blocks))
@@ -0,0 +1,101 @@
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from itertools import islice
+from typing import Any, Callable, Dict, Final, Iterable, Iterator
+
+from dispatcher.executor import Response, Runner, Testcase
+
+# Action name under which the runner finds the batch handler of an action
+BATCH_SUFFIX: Final[str] = "[batch]"
+DEFAULT_BATCH_SIZE: Final[int] = 4096
+
+
+class BatchedProcessors(Mapping):
+    """Action table that additionally resolves "<action>[batch]" to the batch handler of the action"""
+
+    def __init__(self, processors: Mapping[str, Callable], batch_processors: Mapping[str, Callable]):
+        self._processors = processors
+        self._batch_processors = batch_processors
+
+    def __getitem__(self, action: str) -> Callable:
+        if action.endswith(BATCH_SUFFIX):
+            return self._batch_processors[action[:-len(BATCH_SUFFIX)]]
+        return self._processors[action]
+
+    def __contains__(self, action: object) -> bool:
+        if isinstance(action, str) and action.endswith(BATCH_SUFFIX):
+            return action[:-len(BATCH_SUFFIX)] in self._batch_processors
+        return action in self._processors
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._processors)
+
+    def __len__(self) -> int:
+        return len(self._processors)
+
+
+def run_batched(testcases: Iterable[Testcase], processors: Mapping[str, Callable],
+                batch_processors: Mapping[str, Callable], run: Runner,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Response]:
+    """Reads batch_size testcases at a time and merges all testcases of an action that has a batch handler
+       into one testcase, its handler gets the list of arguments and returns the list of responses.
+       Responses are scattered back to their test ids and yielded in input order."""
+    # Per chunk: test ids in input order, number of testcases given to the runner, batch id => test ids
+    chunks: deque[tuple[list[str], int, Dict[Any, list[str]]]] = deque()
+
+    def batched_testcases() -> Iterator[Testcase]:
+        iterator = iter(testcases)
+        chunk_index = 0
+
+        while chunk := list(islice(iterator, batch_size)):
+            order = []
+            groups = defaultdict(list)
+            to_run = []
+
+            for test_id, test_data in chunk:
+                action = test_data["action"]
+                if action not in processors:
+                    continue
+
+                order.append(test_id)
+                if action in batch_processors:
+                    groups[action].append((test_id, test_data))
+                else:
+                    to_run.append((test_id, test_data))
+
+            batches = {}
+            for action, group in groups.items():
+                if len(group) == 1:
+                    to_run.extend(group)
+                    continue
+
+                # Tuple ids can't collide with the string test ids, the chunk index keeps the batches of an action
+                # apart while several chunks are in flight (pool, longest first, I/O threads)
+                batch_id = (BATCH_SUFFIX, action, chunk_index)
+                batches[batch_id] = [test_id for test_id, _ in group]
+                to_run.append((batch_id, {"action": action + BATCH_SUFFIX,
+                                          "arguments": [test_data["arguments"] for _, test_data in group]}))
+
+            chunks.append((order, len(to_run), batches))
+            chunk_index += 1
+            yield from to_run
+
+    responses = {}
+    received = 0
+
+    for result_id, response in run(batched_testcases(), BatchedProcessors(processors, batch_processors)):
+        while chunks[0][1] == 0:
+            chunks.popleft()
+
+        order, expected, batches = chunks[0]
+        if result_id in batches:
+            responses.update(zip(batches[result_id], response))
+        else:
+            responses[result_id] = response
+
+        received += 1
+        if received == expected:
+            chunks.popleft()
+            yield from ((test_id, responses[test_id]) for test_id in order)
+            responses = {}
+            received = 0
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict, deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Final, Iterable, Iterator, Mapping, Optional
+
+from dispatcher.executor import Response, Testcase
+
+# Bump if the layout of the cache files changes
+CACHE_FORMAT_VERSION: Final[int] = 1
+DEFAULT_CACHE_DIR: Final[Path] = Path.home() / ".cache" / "kauma"
+DEFAULT_CACHE_SIZE: Final[int] = 256 * 1024 * 1024
+# Written into every version directory, only directories with it are removed as stale. The cache directory is
+# user supplied and may contain anything else
+CACHE_MARKER: Final[str] = ".kauma-cache"
+# After an eviction the cache is shrunk below this share of its size limit, so not every store evicts again
+EVICTION_TARGET: Final[float] = 0.9
+# Identical testcases of one run share one result, this bounds how many distinct ones are remembered
+MEMO_SIZE: Final[int] = 4096
+# Responses waiting behind a computed testcase, beyond that the output catches up before more input is read
+MAX_HELD_BACK: Final[int] = 4096
+
+# Result depends on the state of an external server, not only on the arguments
+UNCACHEABLE_ACTIONS: Final[frozenset[str]] = frozenset({"padding_oracle"})
+
+SOURCE_ROOT: Final[Path] = Path(__file__).parent.parent.absolute()
+SOURCE_SUFFIXES: Final[tuple[str, ...]] = (".py", ".c")
+# Packages and modules a testcase response can depend on, bench/ and testcase_generator/ can't change a result
+RUNTIME_SOURCES: Final[tuple[str, ...]] = ("actions", "block_poly", "crypto_algorithms", "dispatcher", "galoisfield",
+                                           "gcm_crack", "paddingoracle", "profiling", "rsa_backdoor",
+                                           "constants.py", "kauma.py", "utils.py")
+
+
+def _source_files() -> Iterator[Path]:
+    for name in RUNTIME_SOURCES:
+        path = SOURCE_ROOT / name
+        if path.is_file():
+            yield path
+            continue
+
+        for source in sorted(path.rglob("*")):
+            hidden = any(part.startswith((".", "__")) for part in source.relative_to(path).parts[:-1])
+            if source.suffix in SOURCE_SUFFIXES and not hidden:
+                yield source
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash over the runtime source files, so any change of the code computing the results invalidates them"""
+    digest = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+
+    for path in _source_files():
+        digest.update(str(path.relative_to(SOURCE_ROOT)).encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()[:16]
+
+
+def testcase_key(action: str, arguments: Dict[str, Any]) -> str:
+    canonical = json.dumps([action, arguments], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class _Slot:
+    """Result of one distinct testcase, shared by all identical testcases of a run (None => not computed yet)"""
+    __slots__ = ("response",)
+
+    def __init__(self, response: Optional[Dict[str, Any]] = None):
+        self.response = response
+
+
+class ResultCache:
+    """On-disk cache of testcase responses keyed by a hash of action and canonicalised arguments.
+       Entries live in a directory per code version, older versions (directories with the marker file) are deleted
+       on open.
+       The least recently used entries (file mtime, bumped on every hit) are evicted above max_bytes."""
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._directory = directory / code_version()
+        self._memo: OrderedDict[str, _Slot] = OrderedDict()
+
+        for stale in directory.glob("*") if directory.exists() else []:
+            if stale.is_dir() and stale != self._directory and (stale / CACHE_MARKER).is_file():
+                shutil.rmtree(stale, ignore_errors=True)
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        (self._directory / CACHE_MARKER).touch()
+        self._size = sum(entry.stat().st_size for entry in self._directory.glob("*.json"))
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entry_path(self, key: str) -> Path:
+        return self._directory / f"{key}.json"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            with open(path) as f:
+                response = json.load(f)
+            os.utime(path)
+            return response
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key: str, response: Dict[str, Any]):
+        path = self._entry_path(key)
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        data = json.dumps(response)
+        with open(temp_path, "w") as f:
+            f.write(data)
+        # Atomic, parallel runs sharing the cache never see half written entries
+        os.replace(temp_path, path)
+
+        self._size += len(data)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self._directory.glob("*.json"):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self._size <= self.max_bytes * EVICTION_TARGET:
+                break
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+    def _remember(self, key: str, slot: _Slot):
+        self._memo[key] = slot
+        if len(self._memo) > MEMO_SIZE:
+            self._memo.popitem(last=False)
+
+    def _lookup(self, test_id: str, test_data: Dict[str, Any], entries: deque) -> bool:
+        """Queues the output entry of a testcase, True if it has to be computed"""
+        action = test_data["action"]
+        if action in UNCACHEABLE_ACTIONS:
+            entries.append((test_id, None, _Slot()))
+            return True
+
+        key = testcase_key(action, test_data["arguments"])
+        slot = self._memo.get(key)
+        if slot is None:
+            response = self.load(key)
+            slot = _Slot(response)
+            self._remember(key, slot)
+
+            if response is None:
+                self.misses += 1
+                entries.append((test_id, key, slot))
+                return True
+        else:
+            self._memo.move_to_end(key)
+
+        self.hits += 1
+        entries.append((test_id, key, slot))
+        return False
+
+    def run(self, testcases: Iterable[Testcase], processors: Mapping[str, Callable],
+            run_uncached: Callable[[Iterable[Testcase]], Iterator[Response]]) -> Iterator[Response]:
+        """Answers cached and repeated testcases directly, only the rest goes to run_uncached.
+           Responses are yielded in input order. Hits without a computed testcase in front of them are yielded
+           right away and at most MAX_HELD_BACK wait behind one, so a streamed input isn't held in memory."""
+        iterator = iter(testcases)
+        entries: deque[tuple[str, Optional[str], _Slot]] = deque()
+        # Testcases given to run_uncached whose response hasn't come back yet
+        computing = 0
+
+        def answered() -> Iterator[Response]:
+            while entries and entries[0][2].response is not None:
+                done_id, _, slot = entries.popleft()
+                yield done_id, slot.response
+
+        def testcases_to_compute(first: Testcase) -> Iterator[Testcase]:
+            """One segment of the input for run_uncached, it ends at a hit once every response of it is back
+               or once too many responses wait behind the computed testcases"""
+            nonlocal computing
+            computing += 1
+            yield first
+
+            for test_id, test_data in iterator:
+                if test_data["action"] not in processors:
+                    continue
+
+                if self._lookup(test_id, test_data, entries):
+                    computing += 1
+                    yield test_id, test_data
+                elif computing == 0 or len(entries) >= MAX_HELD_BACK:
+                    return
+
+        while True:
+            first = None
+            for test_id, test_data in iterator:
+                if test_data["action"] in processors and self._lookup(test_id, test_data, entries):
+                    first = test_id, test_data
+                    break
+                yield from answered()
+
+            if first is None:
+                return
+
+            for test_id, response in run_uncached(testcases_to_compute(first)):
+                # Everything in front of the computed testcase is a hit or a repeat of an earlier one
+                yield from answered()
+
+                _, key, slot = entries.popleft()
+                slot.response = response
+                computing -= 1
+                if key is not None:
+                    self.store(key, response)
+                yield test_id, response
+
+            yield from answered()
@@ -0,0 +1,118 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from typing import AbstractSet, Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from galoisfield.backend import get_backend
+
+Testcase = Tuple[str, Dict[str, Any]]
+Response = Tuple[str, Dict[str, Any]]
+Runner = Callable[[Iterable[Testcase], Mapping[str, Callable]], Iterator[Response]]
+
+# Action table of the current worker process, set once by the pool initializer
+_worker_processors: Optional[Mapping[str, Callable]] = None
+
+
+def resolve_workers(workers: int) -> int:
+    """0 (or less) means one worker per available cpu core"""
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _init_worker(processors: Mapping[str, Callable]):
+    """Runs once per worker process, so every worker picks and loads the gf backend exactly one time"""
+    global _worker_processors
+    _worker_processors = processors
+    get_backend()
+
+
+def _run_in_worker(action: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return _worker_processors[action](arguments)
+
+
+def run_sequential(testcases: Iterable[Testcase], processors: Mapping[str, Callable]) -> Iterator[Response]:
+    for test_id, test_data in testcases:
+        action = test_data["action"]
+        arguments = test_data["arguments"]
+
+        if action in processors:
+            func = processors[action]
+            yield test_id, func(arguments)
+
+
+def start_pool(workers: int, processors: Mapping[str, Callable]) -> Pool:
+    """Forks the worker processes. Has to happen before the run starts any thread (I/O threads), fork only copies
+       the calling thread and a lock held by another one would stay locked in the workers forever"""
+    # Picked in the parent, forked workers inherit the choice and don't repeat a fallback warning each
+    get_backend()
+    return Pool(resolve_workers(workers), initializer=_init_worker, initargs=(processors,))
+
+
+def run_parallel(testcases: Iterable[Testcase], processors: Mapping[str, Callable], workers: int,
+                 window: Optional[int] = None) -> Iterator[Response]:
+    """Sends the testcases to a pool of worker processes and yields the responses in input order.
+       A slow testcase only delays the output of the following ones, the workers keep computing them meanwhile.
+       window limits how many testcases are in flight (None => no limit), so a lazy input isn't read ahead.
+       The pool is started right away and not on the first response, before anything of the input is read"""
+    return run_in_pool(testcases, processors, start_pool(workers, processors), window)
+
+
+def run_in_pool(testcases: Iterable[Testcase], processors: Mapping[str, Callable], pool: Pool,
+                window: Optional[int] = None) -> Iterator[Response]:
+    """run_parallel on a pool of start_pool, the pool is closed when all responses are yielded"""
+    with pool:
+        pending = deque()
+
+        for test_id, test_data in testcases:
+            action = test_data["action"]
+            if action not in processors:
+                continue
+
+            pending.append((test_id, pool.apply_async(_run_in_worker, (action, test_data["arguments"]))))
+
+            if window is not None and len(pending) >= window:
+                done_id, result = pending.popleft()
+                yield done_id, result.get()
+
+        while pending:
+            done_id, result = pending.popleft()
+            yield done_id, result.get()
+
+
+def run_overlapping_io(testcases: Iterable[Testcase], processors: Mapping[str, Callable], io_actions: AbstractSet[str],
+                       run: Runner, io_threads: int) -> Iterator[Response]:
+    """Runs the testcases of I/O-bound actions on io_threads threads, which mostly wait on the network and release
+       the GIL meanwhile, while run computes the other testcases. Responses are yielded in input order.
+       run is called before the first I/O testcase is submitted, so a process pool it starts forks without threads"""
+    with ThreadPoolExecutor(io_threads, thread_name_prefix="kauma-io") as io_pool:
+        # Test id and the future of an I/O testcase or None if run computes it, in input order
+        order = deque()
+        # Responses of run that aren't yielded yet. run keeps the input order, so they belong to the None entries
+        # of order front to back, matched by position and not by test id
+        computed = deque()
+
+        def cpu_testcases() -> Iterator[Testcase]:
+            for test_id, test_data in testcases:
+                action = test_data["action"]
+                if action not in processors:
+                    continue
+
+                if action in io_actions:
+                    order.append((test_id, io_pool.submit(processors[action], test_data["arguments"])))
+                else:
+                    order.append((test_id, None))
+                    yield test_id, test_data
+
+        def is_done(future) -> bool:
+            return future.done() if future else len(computed) > 0
+
+        for response in run(cpu_testcases(), processors):
+            computed.append(response)
+
+            while order and is_done(order[0][1]):
+                done_id, future = order.popleft()
+                yield (done_id, future.result()) if future else computed.popleft()
+
+        while order:
+            done_id, future = order.popleft()
+            yield (done_id, future.result()) if future else computed.popleft()
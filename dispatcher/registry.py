@@ -0,0 +1,54 @@
+import importlib
+import time
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator
+
+
+class LazyActionRegistry(Mapping):
+    """Maps action names to "module:function" handler paths.
+       A handler (and everything its module needs) only gets imported on its first lookup,
+       so a run only pays for the subsystems its testcases actually use."""
+
+    def __init__(self, handler_paths: Dict[str, str]):
+        self._handler_paths = handler_paths
+        self._handlers: Dict[str, Callable] = {}
+        # Seconds spent importing the handler of each action, dependencies shared with an
+        # earlier resolved action are already loaded and therefore not counted again
+        self.import_times: Dict[str, float] = {}
+
+    def __getitem__(self, action: str) -> Callable:
+        handler = self._handlers.get(action)
+
+        if handler is None:
+            module_name, function_name = self._handler_paths[action].split(":")
+
+            start_time = time.perf_counter()
+            module = importlib.import_module(module_name)
+            self.import_times[action] = time.perf_counter() - start_time
+
+            handler = self._handlers[action] = getattr(module, function_name)
+
+        return handler
+
+    def __contains__(self, action: object) -> bool:
+        # Mapping would use __getitem__ here, which imports the handler
+        return action in self._handler_paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._handler_paths)
+
+    def __len__(self) -> int:
+        return len(self._handler_paths)
+
+    def resolve(self, actions=None):
+        """Imports the handlers of the given actions (all if None) upfront"""
+        for action in (self if actions is None else actions):
+            if action in self:
+                self[action]
+
+    def format_import_times(self) -> str:
+        lines = [f"{action}: {seconds * 1000:.2f} ms ({self._handler_paths[action].split(':')[0]})"
+                 for action, seconds in sorted(self.import_times.items(), key=lambda item: -item[1])]
+        total = sum(self.import_times.values())
+
+        return "\n".join(["Action import times:", *lines, f"total: {total * 1000:.2f} ms"])
@@ -0,0 +1,85 @@
+from typing import Any, Callable, Dict, Final, Iterable, Iterator
+
+from constants import BLOCK_SIZE
+from dispatcher.batch import BATCH_SUFFIX
+from dispatcher.executor import Response, Testcase
+from profiling.profiler import TestcaseProfile
+
+# Rough relative cost (~ms on one core) of an action independent of its input size
+BASE_COSTS: Final[Dict[str, float]] = {
+    "gcm_crack": 20.0,
+    "gfpoly_factor_sff": 1.0,
+    "gfpoly_factor_ddf": 5.0,
+    "gfpoly_factor_edf": 5.0,
+    "glasskey_genkey": 50.0,
+    "glasskey_break": 300.0,
+    "padding_oracle": 5.0,
+}
+DEFAULT_COST: Final[float] = 0.1
+
+
+def _blocks(b64: str) -> int:
+    return max(len(b64) * 3 // 4 // BLOCK_SIZE, 1)
+
+
+def _gcm_crack_cost(arguments: Dict[str, Any]) -> float:
+    # Factored polynomial has one coefficient per block of the longer message (+ L and tag)
+    degree = max(_blocks(arguments[m]["ciphertext"]) + _blocks(arguments[m]["associated_data"]) + 2
+                 for m in ("m1", "m2"))
+    return degree ** 3 / 10
+
+
+def _size_cost(action: str, arguments: Dict[str, Any]) -> float:
+    if action == "gcm_crack":
+        return _gcm_crack_cost(arguments)
+    if action in ("gfpoly_factor_ddf", "gfpoly_factor_edf"):
+        # Every round is a powmod with a 128 bit exponent per degree modulo F
+        return len(arguments["F"]) ** 3
+    if action == "gfpoly_factor_sff":
+        return len(arguments["F"]) ** 2
+    if action == "gfpoly_powmod":
+        return len(arguments["M"]) ** 2 * max(arguments["k"], 1).bit_length() / 100
+    if action == "gfpoly_pow":
+        return (len(arguments["A"]) * max(arguments["k"], 1)) ** 2 / 100
+    if action in ("gfpoly_mul", "gfpoly_divmod", "gfpoly_gcd"):
+        return len(arguments["A"]) * len(arguments["B"]) / 100
+    if action == "glasskey_genkey":
+        return (arguments["bit_length"] / 512) ** 4
+    if action == "padding_oracle":
+        return _blocks(arguments["ciphertext"])
+    return 1.0
+
+
+def estimate_cost(action: str, arguments: Any) -> float:
+    """Estimated relative runtime of a testcase from its action and the size of its input"""
+    if action.endswith(BATCH_SUFFIX):
+        base_action = action[:-len(BATCH_SUFFIX)]
+        return sum(estimate_cost(base_action, batch_arguments) for batch_arguments in arguments)
+
+    try:
+        return BASE_COSTS.get(action, DEFAULT_COST) * _size_cost(action, arguments)
+    except (KeyError, TypeError):
+        return BASE_COSTS.get(action, DEFAULT_COST)
+
+
+def run_longest_first(testcases: Iterable[Testcase], run: Callable[[Iterable[Testcase]], Iterator[Response]]) \
+        -> Iterator[Response]:
+    """Starts the testcases in descending estimated cost, so an expensive one doesn't start last and keeps the
+       whole run waiting on it. Needs all testcases upfront, responses are yielded in input order again."""
+    testcases = list(testcases)
+    by_cost = sorted(testcases, key=lambda testcase: -estimate_cost(testcase[1]["action"], testcase[1]["arguments"]))
+
+    responses = dict(run(by_cost))
+
+    for test_id, _ in testcases:
+        if test_id in responses:
+            yield test_id, responses.pop(test_id)
+
+
+def format_budget_overruns(profiles: Iterable[TestcaseProfile], budget: float) -> str:
+    overruns = sorted((profile for profile in profiles if profile.seconds > budget), key=lambda p: -p.seconds)
+
+    lines = [f"{len(overruns)} testcases took longer than the budget of {budget:.3f} s"]
+    lines += [f"  {profile.seconds:>10.3f} s  {profile.action:<28}{profile.test_id}" for profile in overruns]
+
+    return "\n".join(lines)
@@ -0,0 +1,52 @@
+import json
+import os
+import socketserver
+import stat
+import sys
+from typing import Any, Callable, Dict, Iterable, TextIO
+
+# Takes a testcase document ({"testcases": ...}) and returns {"responses": ...}
+DocumentProcessor = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def answer_request(line: str, process: DocumentProcessor) -> str:
+    """Answers one framed document, a broken request is reported to the client instead of stopping the server"""
+    try:
+        return json.dumps(process(json.loads(line)))
+    except Exception as e:
+        return json.dumps({"error": f"{type(e).__name__}: {e}"})
+
+
+def serve_lines(lines: Iterable[str], output: TextIO, process: DocumentProcessor):
+    """Framing: every request is one json document per line, every answer is written as one line"""
+    for line in lines:
+        if not line.strip():
+            continue
+
+        output.write(answer_request(line, process) + "\n")
+        output.flush()
+
+
+def serve_unix_socket(socket_path: str, process: DocumentProcessor):
+    """Same line framing as serve_lines, but for every client connecting to the unix socket"""
+
+    class _RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    self.wfile.write((answer_request(line.decode(), process) + "\n").encode())
+
+    # Socket file of a previous run that wasn't shut down cleanly, anything else at the path is kept
+    if os.path.exists(socket_path):
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            raise FileExistsError(f"{socket_path} exists and is not a socket")
+        os.unlink(socket_path)
+
+    with socketserver.ThreadingUnixStreamServer(socket_path, _RequestHandler) as server:
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nShutting down server", file=sys.stderr)
+        finally:
+            os.unlink(socket_path)
@@ -0,0 +1,109 @@
+import json
+from typing import Any, Final, Iterable, Iterator, TextIO
+
+from dispatcher.executor import Response, Testcase
+
+CHUNK_SIZE: Final[int] = 1 << 16
+WHITESPACE: Final[str] = " \t\n\r"
+TESTCASES_KEY: Final[str] = "testcases"
+
+
+class JsonStreamReader:
+    """Reads a json document piece by piece, the buffer only has to hold the value that is currently decoded"""
+
+    def __init__(self, file: TextIO, chunk_size: int = CHUNK_SIZE):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, min_size: int) -> bool:
+        """Drops the consumed part of the buffer and appends at least min_size new characters (False on eof)"""
+        if self._eof:
+            return False
+
+        chunk = self._file.read(max(min_size, self._chunk_size))
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill(self._chunk_size):
+                return
+
+    def peek(self) -> str:
+        self._skip_whitespace()
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid testcase json: expected '{char}' but found '{found or 'EOF'}'")
+        self._pos += 1
+
+    def read_value(self) -> Any:
+        self._skip_whitespace()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number at the very end of the buffer might continue in the next chunk
+                if end < len(self._buffer) or not self._fill(self._chunk_size):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                # Value doesn't fit in the buffer yet, grow it geometrically so retries stay linear
+                if not self._fill(len(self._buffer) - self._pos):
+                    raise
+
+    def iter_keys(self) -> Iterator[str]:
+        """Yields the member keys of the object at the current position, each value has to be read before next()"""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key
+
+            separator = self.peek()
+            self.expect("," if separator == "," else "}")
+            if separator != ",":
+                return
+
+
+def iter_testcases(file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Testcase]:
+    """Streams the entries of the top level "testcases" object, every other top level member is skipped"""
+    reader = JsonStreamReader(file, chunk_size)
+
+    for key in reader.iter_keys():
+        if key == TESTCASES_KEY:
+            for test_id in reader.iter_keys():
+                yield test_id, reader.read_value()
+        else:
+            reader.read_value()
+
+
+def write_responses(responses: Iterable[Response], output: TextIO):
+    """Writes the same json as json.dumps({"responses": ...}), but every response as soon as it is available"""
+    output.write('{"responses": {')
+
+    separator = ""
+    for test_id, response in responses:
+        output.write(f"{separator}{json.dumps(test_id)}: {json.dumps(response)}")
+        output.flush()
+        separator = ", "
+
+    output.write("}}\n")
+    output.flush()
@@ -0,0 +1,214 @@
+import base64
+from typing import Optional, Union
+
+import numpy as np
+
+from block_poly.base import Base
+from constants import BLOCK_SIZE
+from galoisfield.backend import gfinv, gfmul_scalar, gfpoly_divmod, gfpoly_gcd, gfsqrt_batch
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from galoisfield.polymodulus import PolyModulus
+from galoisfield.polymul import coefficients_from_buffer, coefficients_to_buffer, karatsuba_mul, square_coefficients
+from profiling import counters
+
+
+def _to_int(row: np.ndarray) -> int:
+    return (int(row[1]) << 64) | int(row[0])
+
+
+class ArrayPolynomial:
+    """GaloisFieldPolynomial with all coefficients in one contiguous (n, 2) uint64 numpy array, row i holds the
+       (low, high) halves of coefficient i: the buffer layout of the batch kernels, so they run on it directly.
+       Addition is one xor, trimming, zero checks and comparisons are single array operations instead of a loop
+       over one python object per coefficient.
+
+       Same results as GaloisFieldPolynomial, from_polynomial/to_polynomial convert between both"""
+    __slots__ = ("coefficients",)
+
+    def __init__(self, coefficients: np.ndarray):
+        assert coefficients.dtype == np.uint64 and coefficients.ndim == 2 and coefficients.shape[1] == 2, \
+            "Coefficients have to be a (n, 2) uint64 array"
+        self.coefficients = coefficients
+
+    @classmethod
+    def from_uint64_buffer(cls, buffer) -> 'ArrayPolynomial':
+        return cls(coefficients_from_buffer(buffer))
+
+    def to_uint64_buffer(self) -> bytes:
+        return coefficients_to_buffer(self.coefficients)
+
+    @classmethod
+    def from_b64(cls, b64_list: list[str]) -> 'ArrayPolynomial':
+        # Gcm semantic: every block with the bits of its bytes reversed is the little endian int of the coefficient
+        blocks = b"".join(base64.b64decode(b64) for b64 in b64_list)
+        return cls.from_uint64_buffer(Base.inverse_block_bits(blocks))
+
+    def to_b64(self) -> list[str]:
+        blocks = Base.inverse_block_bits(self.to_uint64_buffer())
+        return [base64.b64encode(blocks[i:i + BLOCK_SIZE]).decode() for i in range(0, len(blocks), BLOCK_SIZE)]
+
+    @classmethod
+    def from_polynomial(cls, poly: GaloisFieldPolynomial) -> 'ArrayPolynomial':
+        return cls.from_uint64_buffer(poly.to_uint64_buffer())
+
+    def to_polynomial(self) -> GaloisFieldPolynomial:
+        return GaloisFieldPolynomial.from_uint64_buffer(self.to_uint64_buffer())
+
+    @classmethod
+    def from_elements(cls, elements: list[GaloisFieldElement]) -> 'ArrayPolynomial':
+        return cls.from_polynomial(GaloisFieldPolynomial(elements))
+
+    @classmethod
+    def zero(cls) -> 'ArrayPolynomial':
+        return cls(np.zeros((1, 2), dtype=np.uint64))
+
+    @classmethod
+    def one(cls) -> 'ArrayPolynomial':
+        return cls(np.array([[1, 0]], dtype=np.uint64))
+
+    @classmethod
+    def x(cls):
+        return cls(np.array([[0, 0], [1, 0]], dtype=np.uint64))
+
+    @property
+    def degree(self) -> int:
+        return len(self) - 1
+
+    def __len__(self) -> int:
+        return self.coefficients.shape[0]
+
+    def __getitem__(self, index: int) -> GaloisFieldElement:
+        return GaloisFieldElement(_to_int(self.coefficients[index]))
+
+    def __iter__(self):
+        return (GaloisFieldElement(_to_int(row)) for row in self.coefficients)
+
+    def __copy__(self) -> 'ArrayPolynomial':
+        return ArrayPolynomial(self.coefficients.copy())
+
+    def remove_leading_zero(self) -> 'ArrayPolynomial':
+        if len(self) <= 1 or self.coefficients[-1].any():
+            return self
+
+        nonzero = np.flatnonzero(self.coefficients.any(axis=1))
+        length = int(nonzero[-1]) + 1 if nonzero.size else min(len(self), 1)
+        self.coefficients = self.coefficients[:length]
+        return self
+
+    def is_zero(self) -> bool:
+        return not self.coefficients.any()
+
+    def _trimmed(self) -> np.ndarray:
+        if len(self) and self.coefficients[-1].any():
+            return self.coefficients
+
+        nonzero = np.flatnonzero(self.coefficients.any(axis=1))
+        return self.coefficients[:int(nonzero[-1]) + 1 if nonzero.size else 0]
+
+    def __add__(self, other: 'ArrayPolynomial') -> 'ArrayPolynomial':
+        shorter, longer = sorted((self.coefficients, other.coefficients), key=len)
+
+        result = longer.copy()
+        result[:len(shorter)] ^= shorter
+        return ArrayPolynomial(result).remove_leading_zero()
+
+    def __sub__(self, other: 'ArrayPolynomial') -> 'ArrayPolynomial':
+        return self + other
+
+    def __mul__(self, other: 'ArrayPolynomial') -> 'ArrayPolynomial':
+        return ArrayPolynomial(karatsuba_mul(self.coefficients, other.coefficients)).remove_leading_zero()
+
+    def square(self) -> 'ArrayPolynomial':
+        """Squares of the coefficients at the even positions (characteristic 2, see GaloisFieldPolynomial.square)"""
+        return ArrayPolynomial(square_coefficients(self.coefficients)).remove_leading_zero()
+
+    def __pow__(self, k: int, modulo: Optional[Union['ArrayPolynomial', PolyModulus]] = None) -> 'ArrayPolynomial':
+        """See GaloisFieldPolynomial.__pow__"""
+        if modulo is not None:
+            if not isinstance(modulo, PolyModulus):
+                modulo = PolyModulus(modulo.coefficients)
+            return ArrayPolynomial(modulo.pow(self.coefficients, k))
+
+        result = ArrayPolynomial.one()
+
+        if k == 0:
+            return result
+        elif len(self) == 1 and _to_int(self.coefficients[0]) in (0, 1):
+            return self
+
+        base = self
+
+        while k > 0:
+            if k & 1:
+                result = result * base
+            k >>= 1
+            if k > 0:
+                base = base.square()
+
+        return result.remove_leading_zero()
+
+    def __divmod__(self, other: 'ArrayPolynomial') -> tuple['ArrayPolynomial', 'ArrayPolynomial']:
+        """Long division in one backend call (gfpoly_divmod)"""
+        assert not other.is_zero(), "Dividing FieldPoly through 0"
+        if counters.ENABLED:
+            counters.count(counters.GFPOLY_DIVMOD_ITERATIONS, max(len(self) - len(other._trimmed()) + 1, 0))
+
+        quotient, remainder = gfpoly_divmod(np.ascontiguousarray(self.coefficients),
+                                            np.ascontiguousarray(other.coefficients))
+        return (ArrayPolynomial(coefficients_from_buffer(quotient)).remove_leading_zero(),
+                ArrayPolynomial(coefficients_from_buffer(remainder)))
+
+    def __floordiv__(self, other: 'ArrayPolynomial') -> 'ArrayPolynomial':
+        quotient, _ = divmod(self, other)
+        return quotient
+
+    def __mod__(self, other: 'ArrayPolynomial') -> 'ArrayPolynomial':
+        _, remainder = divmod(self, other)
+        return remainder
+
+    def sort_key(self) -> tuple[int, bytes]:
+        """Key with the order of GaloisFieldPolynomial.__lt__: degree, then coefficient by coefficient from the
+           highest one. As big endian (high, low) words from the top the bytes compare like those ints"""
+        return self.degree, np.ascontiguousarray(self.coefficients[::-1, ::-1], dtype=">u8").tobytes()
+
+    def __lt__(self, other: 'ArrayPolynomial') -> bool:
+        return self.sort_key() < other.sort_key()
+
+    def __eq__(self, other: 'ArrayPolynomial') -> bool:
+        return self.degree == other.degree and np.array_equal(self.coefficients, other.coefficients)
+
+    def make_monic(self) -> 'ArrayPolynomial':
+        """Every coefficient times the inverse of the leading one, in place in one gfmul_scalar call"""
+        if len(self) > 1:
+            if counters.ENABLED:
+                counters.count(counters.GFMUL_CALLS, len(self))
+            leading = _to_int(self.coefficients[-1])
+            assert leading != 0, "Inverting FieldElement 0"
+            self.coefficients = np.ascontiguousarray(self.coefficients)
+            gfmul_scalar(self.coefficients, gfinv(leading), out=self.coefficients)
+
+        self.coefficients[-1] = (1, 0)
+        return self
+
+    def sqrt(self) -> 'ArrayPolynomial':
+        """Square roots of the even coefficients (see GaloisFieldPolynomial.sqrt) in one backend call"""
+        # Always a copy, the slice of a one coefficient polynomial is already contiguous and would alias self
+        result = self.coefficients[::2].copy()
+        gfsqrt_batch(result, out=result)
+        return ArrayPolynomial(result).remove_leading_zero()
+
+    def diff(self) -> 'ArrayPolynomial':
+        """Derivative: coefficient i moves to i - 1 times i, in characteristic 2 only the odd ones stay"""
+        if len(self) == 1:
+            return ArrayPolynomial.zero()
+
+        result = self.coefficients[1:].copy()
+        result[1::2] = 0
+        return ArrayPolynomial(result).remove_leading_zero()
+
+    def gcd(self, other: 'ArrayPolynomial') -> 'ArrayPolynomial':
+        """Monic gcd, the euclidean algorithm runs in one backend call (gfpoly_gcd)"""
+        return ArrayPolynomial(coefficients_from_buffer(gfpoly_gcd(np.ascontiguousarray(self.coefficients),
+                                                                   np.ascontiguousarray(other.coefficients))))
+
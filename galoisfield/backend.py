@@ -0,0 +1,641 @@
+"""GF(2^128) arithmetic backends, the fastest one that works on this machine is picked on first use:
+
+   native    pclmulqdq kernel (gfmul.c), needs a cpu with pclmulqdq and sse4.1. The best build for the cpu is used:
+             vpclmul (avx2 + vpclmulqdq, two elements per instruction in the batch kernels) or pclmul
+   portable  table driven carry-less multiplication in plain C (gfmul_portable.c), runs on every cpu
+   python    pure python, needs neither a compiler nor a built library
+
+   native and portable call gfmul, gfsquare(_n), gfinv and gfsqrt through their CPython extension (gfmul_ext.c)
+   if it got built, else through ctypes. KAUMA_GF_BACKEND=<name> forces a backend.
+   python3 -m galoisfield.backend benchmarks every available backend and reports the active one."""
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from types import ModuleType
+from typing import Callable, Dict, Final, Optional
+
+from galoisfield.gfmul_lib import (ELEMENT_SIZE, UINT64_MASK, buffer_pointer, load_extension, load_library,
+                                   load_portable_extension, load_portable_library, select_variant)
+
+BACKEND_ENVIRONMENT_VARIABLE: Final[str] = "KAUMA_GF_BACKEND"
+
+GF_DEGREE: Final[int] = 128
+UINT128_MASK: Final[int] = (1 << 128) - 1
+REDUCTION_POLYNOMIAL: Final[int] = (1 << 128) | (1 << 7) | (1 << 2) | (1 << 1) | 1
+# x^(2^127), the square root of x
+SQRT_X: Final[int] = 0x24924924924924926DB6DB6DB6DB6DA4
+EVEN_BITS_MASK: Final[int] = int("01" * 64, 2)
+# (shift, mask) of every step packing the even bits together: 0x33.., 0x0F0F.., ..., 2**64 - 1
+COMPRESS_STEPS: Final[tuple[tuple[int, int], ...]] = tuple(
+    (shift, int(("0" * 2 * shift + "1" * 2 * shift) * (32 // shift), 2)) for shift in (1, 2, 4, 8, 16, 32))
+
+# Known answer test every backend has to pass before it gets used, computed with the native kernel
+SELF_TEST_A: Final[int] = 0x0123456789ABCDEFFEDCBA9876543210
+SELF_TEST_B: Final[int] = 0xDEADBEEFCAFEBABE0011223344556677
+SELF_TEST_PRODUCT: Final[int] = 0xFA990997BD53944D1A1576F80D93B1DD
+
+SELF_BENCHMARK_OPERATIONS: Final[int] = 20000
+
+
+def _element_count(buffer: memoryview) -> int:
+    assert buffer.c_contiguous, "Buffer has to be contiguous"
+    assert buffer.nbytes % ELEMENT_SIZE == 0, "Buffer length is no multiple of 128 bit"
+    return buffer.nbytes // ELEMENT_SIZE
+
+
+def _output_buffer(out, nbytes: int) -> memoryview:
+    out = memoryview(bytearray(nbytes) if out is None else out).cast("B")
+    assert not out.readonly and out.nbytes == nbytes, "Output buffer has to be writable and as long as the input"
+    return out
+
+
+class Backend(ABC):
+    """Multiplication of field elements given as int (xex semantic) and the batch kernels over buffers of
+       (low, high) uint64 pairs. Buffers are byte views of contiguous memory (bytes, array('Q'), numpy uint64, ...)"""
+    name: str
+
+    @abstractmethod
+    def gfmul(self, a: int, b: int) -> int:
+        pass
+
+    @abstractmethod
+    def gfmul_batch(self, a: memoryview, b: memoryview, out: memoryview, n: int):
+        pass
+
+    @abstractmethod
+    def gfmul_scalar(self, a: memoryview, scalar: int, out: memoryview, n: int):
+        pass
+
+    @abstractmethod
+    def gfmul_accumulate(self, a: memoryview, b: memoryview, n: int) -> int:
+        pass
+
+    @abstractmethod
+    def gfmul_powers(self, h: int, out: memoryview, n: int):
+        """h^1, h^2, ..., h^n"""
+
+    @abstractmethod
+    def gfsquare(self, a: int) -> int:
+        pass
+
+    @abstractmethod
+    def gfsquare_n(self, a: int, n: int) -> int:
+        """a^(2^n), n >= 0"""
+
+    @abstractmethod
+    def gfsquare_batch(self, a: memoryview, out: memoryview, n: int):
+        pass
+
+    @abstractmethod
+    def gfinv(self, a: int) -> int:
+        """Multiplicative inverse, 0 for 0"""
+
+    @abstractmethod
+    def gfinv_batch(self, a: memoryview, out: memoryview, n: int):
+        """Inverses of n elements with a single inversion (Montgomery's trick), 0 stays 0"""
+
+    @abstractmethod
+    def gfsqrt(self, a: int) -> int:
+        pass
+
+    @abstractmethod
+    def gfsqrt_batch(self, a: memoryview, out: memoryview, n: int):
+        pass
+
+    @abstractmethod
+    def gfpoly_mul(self, a: memoryview, m: int, b: memoryview, n: int, out: memoryview):
+        pass
+
+    @abstractmethod
+    def gfpoly_divmod(self, r: memoryview, m: int, b: memoryview, n: int, q: Optional[memoryview]) -> int:
+        pass
+
+    @abstractmethod
+    def gfpoly_gcd(self, a: memoryview, m: int, b: memoryview, n: int, out: memoryview) -> int:
+        pass
+
+
+class LibraryBackend(Backend):
+    """Backend on top of one of the compiled libraries, they export the same functions.
+       With the extension module of the library its gfmul, gfsquare(_n), gfinv and gfsqrt replace the ctypes calls
+       (instance attributes, so backend.gfmul(a, b) is a direct call of the C function)"""
+
+    def __init__(self, name: str, library, extension: Optional[ModuleType] = None):
+        self.name = name
+        self._library = library
+        self._gfmul = library.gfmul
+
+        self.extension = extension
+        if extension is not None:
+            self.gfmul = extension.gfmul
+            self.gfsquare = extension.gfsquare
+            self.gfsquare_n = extension.gfsquare_n
+            self.gfinv = extension.gfinv
+            self.gfsqrt = extension.gfsqrt
+
+    def gfmul(self, a: int, b: int) -> int:
+        return self.ctypes_gfmul(a, b)
+
+    def ctypes_gfmul(self, a: int, b: int) -> int:
+        m128i_result = self._gfmul(a & UINT64_MASK, a >> 64, b & UINT64_MASK, b >> 64)
+        return (m128i_result.high << 64) | m128i_result.low
+
+    def gfmul_batch(self, a: memoryview, b: memoryview, out: memoryview, n: int):
+        self._library.gfmul_batch(buffer_pointer(a), buffer_pointer(b), buffer_pointer(out), n)
+
+    def gfmul_scalar(self, a: memoryview, scalar: int, out: memoryview, n: int):
+        self._library.gfmul_scalar(buffer_pointer(a), scalar & UINT64_MASK, scalar >> 64, buffer_pointer(out), n)
+
+    def gfmul_accumulate(self, a: memoryview, b: memoryview, n: int) -> int:
+        m128i_result = self._library.gfmul_accumulate(buffer_pointer(a), buffer_pointer(b), n)
+        return (m128i_result.high << 64) | m128i_result.low
+
+    def gfmul_powers(self, h: int, out: memoryview, n: int):
+        self._library.gfmul_powers(h & UINT64_MASK, h >> 64, buffer_pointer(out), n)
+
+    def gfsquare(self, a: int) -> int:
+        m128i_result = self._library.gfsquare(a & UINT64_MASK, a >> 64)
+        return (m128i_result.high << 64) | m128i_result.low
+
+    def gfsquare_n(self, a: int, n: int) -> int:
+        assert n >= 0, "n has to be non negative"
+        m128i_result = self._library.gfsquare_n(a & UINT64_MASK, a >> 64, n & UINT64_MASK)
+        return (m128i_result.high << 64) | m128i_result.low
+
+    def gfsquare_batch(self, a: memoryview, out: memoryview, n: int):
+        self._library.gfsquare_batch(buffer_pointer(a), buffer_pointer(out), n)
+
+    def gfinv(self, a: int) -> int:
+        m128i_result = self._library.gfinv(a & UINT64_MASK, a >> 64)
+        return (m128i_result.high << 64) | m128i_result.low
+
+    def gfinv_batch(self, a: memoryview, out: memoryview, n: int):
+        self._library.gfinv_batch(buffer_pointer(a), buffer_pointer(out), n)
+
+    def gfsqrt(self, a: int) -> int:
+        m128i_result = self._library.gfsqrt(a & UINT64_MASK, a >> 64)
+        return (m128i_result.high << 64) | m128i_result.low
+
+    def gfsqrt_batch(self, a: memoryview, out: memoryview, n: int):
+        self._library.gfsqrt_batch(buffer_pointer(a), buffer_pointer(out), n)
+
+    def gfpoly_mul(self, a: memoryview, m: int, b: memoryview, n: int, out: memoryview):
+        self._library.gfpoly_mul(buffer_pointer(a), m, buffer_pointer(b), n, buffer_pointer(out))
+
+    def gfpoly_divmod(self, r: memoryview, m: int, b: memoryview, n: int, q: Optional[memoryview]) -> int:
+        return self._library.gfpoly_divmod(buffer_pointer(r), m, buffer_pointer(b), n,
+                                           None if q is None else buffer_pointer(q))
+
+    def gfpoly_gcd(self, a: memoryview, m: int, b: memoryview, n: int, out: memoryview) -> int:
+        return self._library.gfpoly_gcd(buffer_pointer(a), m, buffer_pointer(b), n, buffer_pointer(out))
+
+
+def _clmul(a: int, b: int) -> int:
+    """Carry-less multiplication, 4 bits of b per step with a table of a times every 4 bit value"""
+    table = [0] * 16
+    for i in range(1, 16):
+        table[i] = table[i >> 1] << 1 if (i & 1) == 0 else table[i - 1] ^ a
+
+    product = 0
+    for shift in range((b.bit_length() + 3) & ~3, 0, -4):
+        product = (product << 4) ^ table[(b >> (shift - 4)) & 0xF]
+    return product
+
+
+def _reduce(product: int) -> int:
+    # x^128 = x^7 + x^2 + x + 1, folds the bits above x^127 back in
+    # at most twice (the second time only the <= 7 bits shifted in by the first)
+    while product >> 128:
+        high = product >> 128
+        product = (product & UINT128_MASK) ^ high ^ (high << 1) ^ (high << 2) ^ (high << 7)
+    return product
+
+
+def _clmod(a: int, b: int) -> tuple[int, int]:
+    """Quotient and remainder of carry-less (polynomial) division"""
+    quotient = 0
+    while a.bit_length() >= b.bit_length():
+        shift = a.bit_length() - b.bit_length()
+        quotient ^= 1 << shift
+        a ^= b << shift
+    return quotient, a
+
+
+def _compress_even_bits(a: int) -> int:
+    """Bits 0, 2, 4, ... of the 128 bit int packed into 64 bits"""
+    a &= EVEN_BITS_MASK
+    for shift, mask in COMPRESS_STEPS:
+        a = (a | (a >> shift)) & mask
+    return a
+
+
+class PythonBackend(Backend):
+    name = "python"
+
+    def gfmul(self, a: int, b: int) -> int:
+        return _reduce(_clmul(a, b))
+
+    @staticmethod
+    def _element(buffer: memoryview, index: int) -> int:
+        return int.from_bytes(buffer[index * ELEMENT_SIZE:(index + 1) * ELEMENT_SIZE], "little")
+
+    @staticmethod
+    def _store(buffer: memoryview, index: int, value: int):
+        buffer[index * ELEMENT_SIZE:(index + 1) * ELEMENT_SIZE] = value.to_bytes(ELEMENT_SIZE, "little")
+
+    def gfmul_batch(self, a: memoryview, b: memoryview, out: memoryview, n: int):
+        for i in range(n):
+            self._store(out, i, self.gfmul(self._element(a, i), self._element(b, i)))
+
+    def gfmul_scalar(self, a: memoryview, scalar: int, out: memoryview, n: int):
+        for i in range(n):
+            self._store(out, i, self.gfmul(self._element(a, i), scalar))
+
+    def gfmul_accumulate(self, a: memoryview, b: memoryview, n: int) -> int:
+        # Reduction is linear, so it happens once on the sum
+        product_sum = 0
+        for i in range(n):
+            product_sum ^= _clmul(self._element(a, i), self._element(b, i))
+        return _reduce(product_sum)
+
+    def gfmul_powers(self, h: int, out: memoryview, n: int):
+        power = h
+        for i in range(n):
+            self._store(out, i, power)
+            power = self.gfmul(power, h)
+
+    def gfsquare(self, a: int) -> int:
+        # The carry-less square has a zero bit between all bits of a: its binary digits read as base 4 number
+        return _reduce(int(f"{a:b}", 4))
+
+    def gfsquare_n(self, a: int, n: int) -> int:
+        assert n >= 0, "n has to be non negative"
+        for _ in range(n % GF_DEGREE):
+            a = self.gfsquare(a)
+        return a
+
+    def gfsquare_batch(self, a: memoryview, out: memoryview, n: int):
+        for i in range(n):
+            self._store(out, i, self.gfsquare(self._element(a, i)))
+
+    def gfinv(self, a: int) -> int:
+        # Iterative extended euclid on the polynomials as ints, much cheaper in python than the ~140 gfmuls of the
+        # Itoh-Tsujii chain the libraries use
+        old_remainder, remainder = a, REDUCTION_POLYNOMIAL
+        old_coefficient, coefficient = 1, 0
+        while remainder:
+            quotient, next_remainder = _clmod(old_remainder, remainder)
+            old_remainder, remainder = remainder, next_remainder
+            old_coefficient, coefficient = coefficient, old_coefficient ^ _clmul(quotient, coefficient)
+        return old_coefficient if a else 0
+
+    def gfinv_batch(self, a: memoryview, out: memoryview, n: int):
+        # Montgomery's trick like the libraries: one inversion of the product of all (nonzero) elements
+        elements = [self._element(a, i) for i in range(n)]
+        prefix, product = [], 1
+        for element in elements:
+            if element:
+                product = self.gfmul(product, element)
+            prefix.append(product)
+
+        inverse = self.gfinv(product)
+        for i in range(n - 1, -1, -1):
+            if not elements[i]:
+                self._store(out, i, 0)
+                continue
+            self._store(out, i, self.gfmul(inverse, prefix[i - 1] if i else 1))
+            inverse = self.gfmul(inverse, elements[i])
+
+    def gfsqrt(self, a: int) -> int:
+        # Same linear map as the libraries: sqrt(a) = even(x) + sqrt(x) * odd(x)
+        return _compress_even_bits(a) ^ self.gfmul(_compress_even_bits(a >> 1), SQRT_X)
+
+    def gfsqrt_batch(self, a: memoryview, out: memoryview, n: int):
+        for i in range(n):
+            self._store(out, i, self.gfsqrt(self._element(a, i)))
+
+    def gfpoly_mul(self, a: memoryview, m: int, b: memoryview, n: int, out: memoryview):
+        # Every coefficient summed up unreduced and reduced once, like gfmul_accumulate
+        a_values = [self._element(a, i) for i in range(m)]
+        b_values = [self._element(b, j) for j in range(n)]
+        for k in range(m + n - 1):
+            product_sum = 0
+            for i in range(max(0, k - n + 1), min(k, m - 1) + 1):
+                product_sum ^= _clmul(a_values[i], b_values[k - i])
+            self._store(out, k, _reduce(product_sum))
+
+    def _divmod_values(self, r_values: list[int], b_values: list[int], q_values: Optional[list[int]]):
+        # Long division on lists of ints like gfpoly_divmod, r_values is left with the trimmed remainder
+        while r_values and not r_values[-1]:
+            r_values.pop()
+
+        leading_inverse = self.gfinv(b_values[-1])
+        while len(r_values) >= len(b_values):
+            shift = len(r_values) - len(b_values)
+            quotient_coefficient = self.gfmul(r_values[-1], leading_inverse)
+            if q_values is not None:
+                q_values[shift] = quotient_coefficient
+
+            for j in range(len(b_values) - 1):
+                r_values[shift + j] ^= self.gfmul(b_values[j], quotient_coefficient)
+            r_values.pop()
+            while r_values and not r_values[-1]:
+                r_values.pop()
+
+    def gfpoly_divmod(self, r: memoryview, m: int, b: memoryview, n: int, q: Optional[memoryview]) -> int:
+        r_values = [self._element(r, i) for i in range(m)]
+        q_values = [0] * (m - n + 1) if q is not None and m >= n else None
+        self._divmod_values(r_values, [self._element(b, j) for j in range(n)], q_values)
+
+        for i in range(m):
+            self._store(r, i, r_values[i] if i < len(r_values) else 0)
+        for i, value in enumerate(q_values or []):
+            self._store(q, i, value)
+        return max(len(r_values), 1)
+
+    def gfpoly_gcd(self, a: memoryview, m: int, b: memoryview, n: int, out: memoryview) -> int:
+        x_values = [self._element(a, i) for i in range(m)]
+        y_values = [self._element(b, j) for j in range(n)]
+        while y_values and not y_values[-1]:
+            y_values.pop()
+
+        while y_values:
+            self._divmod_values(x_values, y_values, None)
+            x_values, y_values = y_values, x_values
+        while x_values and not x_values[-1]:
+            x_values.pop()
+
+        if not x_values:
+            self._store(out, 0, 1)
+            return 1
+
+        leading_inverse = self.gfinv(x_values[-1])
+        for i, value in enumerate(x_values[:-1]):
+            self._store(out, i, self.gfmul(value, leading_inverse))
+        self._store(out, len(x_values) - 1, 1)
+        return len(x_values)
+
+
+def _optional_extension(loader: Callable[[], ModuleType]) -> Optional[ModuleType]:
+    # Without the extension (not built, e.g. no python headers) the library is still used through ctypes
+    try:
+        return loader()
+    except Exception:
+        return None
+
+
+def _load_native() -> Backend:
+    # load_library picks the best build the cpu supports (vpclmul or pclmul) and raises if it supports neither
+    return LibraryBackend("native", load_library(), _optional_extension(load_extension))
+
+
+def _load_portable() -> Backend:
+    return LibraryBackend("portable", load_portable_library(), _optional_extension(load_portable_extension))
+
+
+# Fastest first
+BACKEND_LOADERS: Final[Dict[str, Callable[[], Backend]]] = {
+    "native": _load_native,
+    "portable": _load_portable,
+    "python": PythonBackend,
+}
+
+# Why a backend isn't available, filled while probing
+unavailable_backends: Dict[str, str] = {}
+
+
+@lru_cache(maxsize=None)
+def load_backend(name: str) -> Optional[Backend]:
+    """The backend if it loads and passes the known answer test, else None (reason in unavailable_backends)"""
+    try:
+        backend = BACKEND_LOADERS[name]()
+        assert backend.gfmul(SELF_TEST_A, SELF_TEST_B) == SELF_TEST_PRODUCT, "known answer test failed"
+        return backend
+    except Exception as e:
+        unavailable_backends[name] = str(e)
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_backend() -> Backend:
+    """The active backend: the one named in KAUMA_GF_BACKEND or else the fastest available one"""
+    forced = os.environ.get(BACKEND_ENVIRONMENT_VARIABLE)
+    if forced:
+        if forced not in BACKEND_LOADERS:
+            raise ValueError(f"{BACKEND_ENVIRONMENT_VARIABLE}={forced} isn't one of {', '.join(BACKEND_LOADERS)}")
+        backend = load_backend(forced)
+        if backend is None:
+            raise RuntimeError(f"GF backend {forced} isn't available: {unavailable_backends[forced]}")
+        return backend
+
+    for name in BACKEND_LOADERS:
+        backend = load_backend(name)
+        if backend is None:
+            continue
+
+        if isinstance(backend, PythonBackend):
+            # Picked only because no library loaded, a run would be much slower without anyone noticing why
+            reasons = "; ".join(f"{failed}: {reason}" for failed, reason in unavailable_backends.items())
+            print(f"Warning: no gfmul library available ({reasons}), falling back to the python GF backend, which is "
+                  f"~30x slower per multiplication. Run build.py to build the libraries", file=sys.stderr)
+        return backend
+
+    raise RuntimeError("No GF backend available")  # python backend always loads
+
+
+def gfmul(a: int, b: int) -> int:
+    return get_backend().gfmul(a, b)
+
+
+def gfmul_batch(a, b, out=None):
+    """Elementwise product of two buffers of field elements (bytes, array('Q'), numpy uint64, ...)
+       in one backend call. Writes into out (can be a itself) or a new bytearray, which is returned"""
+    a_view, b_view = memoryview(a).cast("B"), memoryview(b).cast("B")
+    n = _element_count(a_view)
+    assert n == _element_count(b_view), "Buffers don't have the same number of elements"
+    out_view = _output_buffer(out, a_view.nbytes)
+
+    get_backend().gfmul_batch(a_view, b_view, out_view, n)
+    return out_view.obj
+
+
+def gfmul_scalar(a, scalar: int, out=None):
+    """Every element of the buffer multiplied by the same scalar (field element as int), see gfmul_batch"""
+    a_view = memoryview(a).cast("B")
+    n = _element_count(a_view)
+    out_view = _output_buffer(out, a_view.nbytes)
+
+    get_backend().gfmul_scalar(a_view, scalar, out_view, n)
+    return out_view.obj
+
+
+def gfmul_accumulate(a, b, n: Optional[int] = None) -> int:
+    """Sum of the elementwise products of two buffers (dot product) as int, of the first n elements if given"""
+    a_view, b_view = memoryview(a).cast("B"), memoryview(b).cast("B")
+    available = min(_element_count(a_view), _element_count(b_view))
+    n = available if n is None else n
+    assert n <= available, "Buffers are shorter than n elements"
+
+    return get_backend().gfmul_accumulate(a_view, b_view, n)
+
+
+def gfmul_powers(h: int, n: int) -> bytearray:
+    """Buffer of h^1, h^2, ..., h^n, see gfmul_batch"""
+    out = bytearray(n * ELEMENT_SIZE)
+    get_backend().gfmul_powers(h, memoryview(out), n)
+    return out
+
+
+def gfsquare(a: int) -> int:
+    return get_backend().gfsquare(a)
+
+
+def gfsquare_n(a: int, n: int) -> int:
+    """a^(2^n) in one backend call (n squarings, only n mod 128 of them since a^(2^128) = a)"""
+    return get_backend().gfsquare_n(a, n)
+
+
+def gfsquare_batch(a, out=None):
+    """Square of every element of the buffer, see gfmul_batch"""
+    a_view = memoryview(a).cast("B")
+    n = _element_count(a_view)
+    out_view = _output_buffer(out, a_view.nbytes)
+
+    get_backend().gfsquare_batch(a_view, out_view, n)
+    return out_view.obj
+
+
+def gfinv(a: int) -> int:
+    return get_backend().gfinv(a)
+
+
+def gfsqrt(a: int) -> int:
+    return get_backend().gfsqrt(a)
+
+
+def gfsqrt_batch(a, out=None):
+    """Square root of every element of the buffer, see gfmul_batch"""
+    a_view = memoryview(a).cast("B")
+    n = _element_count(a_view)
+    out_view = _output_buffer(out, a_view.nbytes)
+
+    get_backend().gfsqrt_batch(a_view, out_view, n)
+    return out_view.obj
+
+
+def gfinv_batch(a, out=None):
+    """Inverse of every element of the buffer (0 stays 0), see gfmul_batch"""
+    a_view = memoryview(a).cast("B")
+    n = _element_count(a_view)
+    out_view = _output_buffer(out, a_view.nbytes)
+
+    get_backend().gfinv_batch(a_view, out_view, n)
+    return out_view.obj
+
+
+def _polynomial_length(buffer: memoryview) -> int:
+    """Number of coefficients without leading zeros (0 for the zero polynomial)"""
+    n = _element_count(buffer)
+    while n > 0 and not any(buffer[(n - 1) * ELEMENT_SIZE:n * ELEMENT_SIZE]):
+        n -= 1
+    return n
+
+
+def gfpoly_mul(a, b, out=None):
+    """Product of two polynomials over GF(2^128), given as buffers of their coefficients (lowest first, elements
+       like in gfmul_batch), in one backend call. Writes into out (len(a) + len(b) - 1 coefficients, must not be a or
+       b) or a new bytearray, which is returned"""
+    a_view, b_view = memoryview(a).cast("B"), memoryview(b).cast("B")
+    m, n = _element_count(a_view), _element_count(b_view)
+    assert m > 0 and n > 0, "Polynomials need at least one coefficient"
+    out_view = _output_buffer(out, (m + n - 1) * ELEMENT_SIZE)
+
+    get_backend().gfpoly_mul(a_view, m, b_view, n, out_view)
+    return out_view.obj
+
+
+def gfpoly_divmod(a, b) -> tuple[bytearray, bytearray]:
+    """Quotient and remainder of two polynomials (see gfpoly_mul) in one backend call. The quotient has
+       len(a) - len(b without leading zeros) + 1 coefficients (one zero if that's less than one), the remainder
+       no leading zeros (one zero for the zero polynomial)"""
+    a_view, b_view = memoryview(a).cast("B"), memoryview(b).cast("B")
+    m, n = _element_count(a_view), _polynomial_length(b_view)
+    assert n > 0, "Dividing FieldPoly through 0"
+
+    remainder = bytearray(a_view) if m > 0 else bytearray(ELEMENT_SIZE)
+    quotient = bytearray(max(m - n + 1, 1) * ELEMENT_SIZE)
+    length = get_backend().gfpoly_divmod(memoryview(remainder), max(m, 1), b_view, n,
+                                         memoryview(quotient) if m >= n else None)
+
+    del remainder[length * ELEMENT_SIZE:]
+    return quotient, remainder
+
+
+def gfpoly_gcd(a, b) -> bytearray:
+    """Monic gcd of two polynomials (see gfpoly_mul) in one backend call, without leading zeros. The gcd of two
+       zero polynomials is 1, like make_monic of a constant"""
+    a_scratch, b_scratch = bytearray(memoryview(a).cast("B")), bytearray(memoryview(b).cast("B"))
+    m, n = _element_count(memoryview(a_scratch)), _element_count(memoryview(b_scratch))
+    out = bytearray(max(m, n, 1) * ELEMENT_SIZE)
+
+    length = get_backend().gfpoly_gcd(memoryview(a_scratch), m, memoryview(b_scratch), n, memoryview(out))
+    del out[length * ELEMENT_SIZE:]
+    return out
+
+
+def _time_calls(gfmul_function: Callable[[int, int], int], operations: int) -> float:
+    a, b = SELF_TEST_A, SELF_TEST_B
+    start_time = time.perf_counter()
+    for _ in range(operations):
+        a = gfmul_function(a, b)
+    return (time.perf_counter() - start_time) / operations * 1e9
+
+
+def self_benchmark(operations: int = SELF_BENCHMARK_OPERATIONS) -> Dict[str, Optional[tuple[float, float, float]]]:
+    """Nanoseconds per gfmul of every backend: single calls, in a gfmul_batch and single calls through ctypes
+       (library backends only, else nan; with the extension built the difference to the first is the overhead it
+       saves). None if the backend isn't available"""
+    operands = SELF_TEST_A.to_bytes(ELEMENT_SIZE, "little") * operations
+    out = memoryview(bytearray(len(operands)))
+
+    results = {}
+    for name in BACKEND_LOADERS:
+        backend = load_backend(name)
+        if backend is None:
+            results[name] = None
+            continue
+
+        call_nanoseconds = _time_calls(backend.gfmul, operations)
+
+        start_time = time.perf_counter()
+        backend.gfmul_batch(memoryview(operands), memoryview(operands), out, operations)
+        batch_nanoseconds = (time.perf_counter() - start_time) / operations * 1e9
+
+        ctypes_nanoseconds = _time_calls(backend.ctypes_gfmul, operations) \
+            if isinstance(backend, LibraryBackend) else float("nan")
+
+        results[name] = (call_nanoseconds, batch_nanoseconds, ctypes_nanoseconds)
+
+    return results
+
+
+def main():
+    active = get_backend().name
+    print(f"  {'backend':<10}{'ns/call':>10}{'ns/batched':>12}{'ns/ctypes':>11}  extension")
+    for name, nanoseconds in self_benchmark().items():
+        marker = "*" if name == active else " "
+        if nanoseconds is None:
+            print(f"{marker} {name:<10}unavailable: {unavailable_backends[name]}")
+        else:
+            extension = getattr(load_backend(name), "extension", None) is not None
+            print(f"{marker} {name:<10}{nanoseconds[0]:>10.0f}{nanoseconds[1]:>12.1f}{nanoseconds[2]:>11.0f}  "
+                  f"{'yes' if extension else 'no'}")
+    print(f"Active backend: {active}")
+    if active == "native":
+        print(f"Library variant: {select_variant().name}")
+
+
+if __name__ == "__main__":
+    main()
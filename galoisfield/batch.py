@@ -0,0 +1,30 @@
+from typing import Final
+
+from constants import BLOCK_SIZE
+from galoisfield.backend import gfinv_batch, gfmul_batch
+from profiling import counters
+
+ZERO_BLOCK: Final[bytes] = bytes(BLOCK_SIZE)
+
+
+def gfmul_blocks(a_blocks: bytes, b_blocks: bytes) -> bytes:
+    """Multiplies two buffers of 16 byte xex blocks elementwise in one backend call"""
+    assert len(a_blocks) == len(b_blocks) and len(a_blocks) % BLOCK_SIZE == 0, "Block buffers don't match"
+    if counters.ENABLED:
+        counters.count(counters.GFMUL_CALLS, len(a_blocks) // BLOCK_SIZE)
+
+    # A xex block is exactly the (low, high) uint64 pair layout of the batch kernel
+    return bytes(gfmul_batch(a_blocks, b_blocks))
+
+
+def gfdiv_blocks(a_blocks: bytes, b_blocks: bytes) -> bytes:
+    """Divides two buffers of 16 byte xex blocks elementwise: inverts all divisors in one backend call
+       and multiplies with them in another"""
+    assert len(a_blocks) == len(b_blocks) and len(a_blocks) % BLOCK_SIZE == 0, "Block buffers don't match"
+    assert ZERO_BLOCK not in (b_blocks[i:i + BLOCK_SIZE] for i in range(0, len(b_blocks), BLOCK_SIZE)), \
+        "Dividing FieldElement through 0"
+    if counters.ENABLED:
+        counters.count(counters.GFMUL_CALLS, len(a_blocks) // BLOCK_SIZE)
+
+    inverses = gfinv_batch(b_blocks)
+    return bytes(gfmul_batch(a_blocks, inverses, out=inverses))
@@ -1,18 +1,32 @@
 from typing import Final
-from copy import copy
 
 from block_poly.block import Block
 from block_poly.poly import Poly
-from galoisfield.gfmul_lib import load_library
+from galoisfield.backend import get_backend
+from profiling import counters
 
 
 class GaloisFieldElement:
+    """Immutable value type: no __dict__ (__slots__), every operation returns a new element, so elements can be
+       shared between polynomials and used as dict keys. zero() and one() return the same interned element every time"""
+    __slots__ = ("_int_value",)
+
     FIELD_SIZE: Final[int] = 128
     REDUCTION_POLYNOM: Final[int] = (1 << 128) | (1 << 7) | (1 << 2) | (1 << 1) | 1
     SQRT_POWER: Final[int] = 1 << (FIELD_SIZE - 1)
 
     def __init__(self, int_value: int):
-        self._int_value = int_value
+        _set_int_value(self, int_value)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # The default pickling (worker processes) would restore the slot with setattr
+        return type(self), (self._int_value,)
 
     @classmethod
     def from_block_xex(cls, xex_block: bytes) -> 'GaloisFieldElement':
@@ -24,11 +38,11 @@ class GaloisFieldElement:
 
     @classmethod
     def zero(cls) -> 'GaloisFieldElement':
-        return cls(0)
+        return _ZERO
 
     @classmethod
     def one(cls) -> 'GaloisFieldElement':
-        return cls(1)
+        return _ONE
 
     def to_block_gcm(self) -> bytes:
         return Poly.from_gcm_semantic(self._int_value).block
@@ -42,8 +56,17 @@ class GaloisFieldElement:
     def __int__(self) -> int:
         return self._int_value
 
+    def __hash__(self) -> int:
+        return hash(self._int_value)
+
+    def __repr__(self) -> str:
+        return f"GaloisFieldElement({self._int_value:#x})"
+
     def __copy__(self) -> 'GaloisFieldElement':
-        return GaloisFieldElement(self._int_value)
+        return self
+
+    def __deepcopy__(self, memo) -> 'GaloisFieldElement':
+        return self
 
     def __add__(self, other: 'GaloisFieldElement') -> 'GaloisFieldElement':
         return GaloisFieldElement(self._int_value ^ other._int_value)
@@ -52,51 +75,60 @@ class GaloisFieldElement:
         return self + other
 
     def __mul__(self, other: 'GaloisFieldElement') -> 'GaloisFieldElement':
-        return copy(self).__imul__(other)
-
-    def __imul__(self, other: 'GaloisFieldElement') -> 'GaloisFieldElement':
         """ Used intel algorithm from:
             https://www.intel.com/content/dam/develop/external/us/en/documents/clmul-wp-rev-2-02-2014-04-20.pdf
-            needs __m128i, which can be seen as two 64bit values (cant pass __m128i directly)
-            For efficiency, we don't want to create a new instance on every mul"""
-        library = load_library()  # Library is cached
-        a, b = int(self), int(other)
-
-        a_low = a & ((1 << 64) - 1)
-        a_high = a >> 64
-        b_low = b & ((1 << 64) - 1)
-        b_high = b >> 64
-        m128i_result = library.gfmul(a_low, a_high, b_low, b_high)
-        result = (m128i_result.high << 64) + m128i_result.low
+            (native backend, see backend.py for the fallbacks on other cpus)
+            No __imul__: a *= b binds a to the new element, shared operands never change"""
+        if counters.ENABLED:
+            counters.count(counters.GFMUL_CALLS)
+
+        result = get_backend().gfmul(self._int_value, other._int_value)  # Backend is cached
 
         assert result < (1 << 128), "Gfmul result is bigger than field size"
 
-        self._int_value = result
-        return self
+        return GaloisFieldElement(result)
 
     def __pow__(self, power: int) -> 'GaloisFieldElement':
-        result = GaloisFieldElement(1)
+        result = _ONE
 
         if power == 0:
             return result
         elif int(self) == 0 or int(self) == 1:
             return self
+        elif power & (power - 1) == 0:
+            return self.square_n(power.bit_length() - 1)
 
         factor = self
 
         while power > 0:
             if power & 1:
                 result *= factor
-            factor *= factor
             power >>= 1
+            if power:
+                factor = factor.square()
 
         return result
 
+    def square(self) -> 'GaloisFieldElement':
+        """Dedicated squaring kernel, half the carry-less multiplications of self * self"""
+        if counters.ENABLED:
+            counters.count(counters.GFMUL_CALLS)
+        return GaloisFieldElement(get_backend().gfsquare(self._int_value))
+
+    def square_n(self, n: int) -> 'GaloisFieldElement':
+        """self^(2^n) (Frobenius map applied n times) in one backend call"""
+        if counters.ENABLED:
+            counters.count(counters.GFMUL_CALLS, n % self.FIELD_SIZE)
+        return GaloisFieldElement(get_backend().gfsquare_n(self._int_value, n))
+
+    def inverse(self) -> 'GaloisFieldElement':
+        """Native Itoh-Tsujii inversion (a^(2^128 - 2)), see gfinv in gfmul.c"""
+        assert int(self) != 0, "Inverting FieldElement 0"
+        return GaloisFieldElement(get_backend().gfinv(int(self)))
+
     def __truediv__(self, other: 'GaloisFieldElement') -> 'GaloisFieldElement':
         assert int(other) != 0, "Dividing FieldElement through 0"
-        _, inverse, _ = other.extended_gcd(GaloisFieldElement(self.REDUCTION_POLYNOM))
-
-        return self * inverse
+        return self * other.inverse()
 
     def __divmod__(self, other: 'GaloisFieldElement') -> tuple['GaloisFieldElement', 'GaloisFieldElement']:
         dividend = int(self)
@@ -128,14 +160,13 @@ class GaloisFieldElement:
     def __eq__(self, other: 'GaloisFieldElement') -> bool:
         return int(self) == int(other)
 
-    def sqrt(self):
-        self._int_value = int(self ** self.SQRT_POWER)
-
-    def extended_gcd(self, other: 'GaloisFieldElement') \
-            -> tuple['GaloisFieldElement', 'GaloisFieldElement', 'GaloisFieldElement']:
-        if int(other) == 0:
-            return self, GaloisFieldElement(1), GaloisFieldElement(0)
-        gcd, x_prev, y_prev = other.extended_gcd(self % other)
-        x = y_prev
-        y = x_prev - (self // other) * y_prev
-        return gcd, x, y
+    def sqrt(self) -> 'GaloisFieldElement':
+        """Linear map instead of self ** SQRT_POWER (127 squarings), see gfsqrt in gfmul.c"""
+        return GaloisFieldElement(get_backend().gfsqrt(int(self)))
+
+
+# Slot descriptor, sets the value past the __setattr__ that makes the element immutable
+_set_int_value = GaloisFieldElement._int_value.__set__
+
+_ZERO: Final[GaloisFieldElement] = GaloisFieldElement(0)
+_ONE: Final[GaloisFieldElement] = GaloisFieldElement(1)
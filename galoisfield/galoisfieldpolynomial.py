@@ -5,6 +5,11 @@ from block_poly.b64 import B64
 from block_poly.block import Block
 from constants import BLOCK_SIZE
 from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.backend import gfmul_scalar, gfpoly_divmod, gfpoly_gcd, gfsqrt_batch, gfsquare_batch
+from galoisfield.gfmul_lib import ELEMENT_SIZE
+from galoisfield.polymodulus import PolyModulus
+from galoisfield.polymul import coefficients_from_buffer, coefficients_to_buffer, karatsuba_mul
+from profiling import counters
 
 
 class GaloisFieldPolynomial:
@@ -34,6 +39,16 @@ class GaloisFieldPolynomial:
     def degree(self) -> int:
         return len(self) - 1
 
+    @classmethod
+    def from_uint64_buffer(cls, buffer) -> 'GaloisFieldPolynomial':
+        buffer = bytes(buffer)
+        return cls([GaloisFieldElement(int.from_bytes(buffer[i:i + ELEMENT_SIZE], "little"))
+                    for i in range(0, len(buffer), ELEMENT_SIZE)])
+
+    def to_uint64_buffer(self) -> bytes:
+        """Coefficients as (low, high) uint64 pairs, the buffer layout of the library's batch kernels"""
+        return b"".join(int(gfe).to_bytes(ELEMENT_SIZE, "little") for gfe in self._gfe_list)
+
     def to_b64(self) -> list[str]:
         # Uses GCM Semantic
         return [Block(gfe.to_block_gcm()).b64 for gfe in self._gfe_list]
@@ -72,13 +87,11 @@ class GaloisFieldPolynomial:
         return GaloisFieldPolynomial(self._gfe_list.copy())
 
     def __add__(self, other: 'GaloisFieldPolynomial') -> 'GaloisFieldPolynomial':
-        max_len = max(len(self), len(other))
+        shorter, longer = sorted((self._gfe_list, other._gfe_list), key=len)
 
-        padded_self = copy(self).add_elements([GaloisFieldElement.zero()] * (max_len - len(self)))
-        padded_other = copy(other).add_elements([GaloisFieldElement.zero()] * (max_len - len(other)))
-
-        return GaloisFieldPolynomial(
-            [gfe_a + gfe_b for gfe_a, gfe_b in zip(padded_self, padded_other)]).remove_leading_zero()
+        # No zero padding: the coefficients above the shorter polynomial are shared (elements are immutable)
+        return GaloisFieldPolynomial([gfe_a + gfe_b for gfe_a, gfe_b in zip(shorter, longer)]
+                                     + longer[len(shorter):]).remove_leading_zero()
 
     def __sub__(self, other: 'GaloisFieldPolynomial'):
         return self + other
@@ -87,74 +100,67 @@ class GaloisFieldPolynomial:
         return copy(self).__imul__(other)
 
     def __imul__(self, other: 'GaloisFieldPolynomial') -> 'GaloisFieldPolynomial':
-        """For efficiency, we don't want to create a new instance on every mul"""
-        result_len = len(self) + len(other) - 1
-        result = [GaloisFieldElement.zero() for _ in range(result_len)]
-
-        for i in range(len(self)):
-            for j in range(len(other)):
-                prod = self[i] * other[j]
-                result[i + j] = result[i + j] + prod
+        """For efficiency, we don't want to create a new instance on every mul.
+           The product is computed on the coefficient buffers, Karatsuba above KARATSUBA_CUTOFF coefficients and
+           the schoolbook product in one backend call below it (see polymul.py)"""
+        product = karatsuba_mul(coefficients_from_buffer(self.to_uint64_buffer()),
+                                coefficients_from_buffer(other.to_uint64_buffer()))
 
-        self._gfe_list = result
+        self._gfe_list = GaloisFieldPolynomial.from_uint64_buffer(coefficients_to_buffer(product))._gfe_list
         return self.remove_leading_zero()
 
-    def __pow__(self, k: int, modulo: Optional['GaloisFieldPolynomial'] = None) -> 'GaloisFieldPolynomial':
+    def square(self) -> 'GaloisFieldPolynomial':
+        """(a_0 + a_1 X + ...)^2 = a_0^2 + a_1^2 X^2 + ... in characteristic 2 (the mixed terms appear twice):
+           one batch squaring of the coefficients instead of a multiplication of two polynomials"""
+        if counters.ENABLED:
+            counters.count(counters.GFMUL_CALLS, len(self))
+
+        squares = GaloisFieldPolynomial.from_uint64_buffer(gfsquare_batch(self.to_uint64_buffer()))
+        coefficients = [GaloisFieldElement.zero()] * (2 * len(self) - 1)
+        coefficients[::2] = squares._gfe_list
+
+        return GaloisFieldPolynomial(coefficients).remove_leading_zero()
+
+    def __pow__(self, k: int, modulo: Optional[Union['GaloisFieldPolynomial', PolyModulus]] = None) \
+            -> 'GaloisFieldPolynomial':
+        """Square and multiply, modulo a polynomial every intermediate result is reduced by a PolyModulus. Callers
+           that reduce by the same polynomial again (ddf, edf) pass the PolyModulus to reuse its precomputations"""
+        if modulo is not None:
+            if not isinstance(modulo, PolyModulus):
+                modulo = PolyModulus.from_polynomial(modulo)
+            result = modulo.pow(coefficients_from_buffer(self.to_uint64_buffer()), k)
+            return GaloisFieldPolynomial.from_uint64_buffer(coefficients_to_buffer(result))
+
         result = GaloisFieldPolynomial([GaloisFieldElement.one()])
 
         if k == 0:
             return result
         elif len(self) == 1:
             if int(self[0]) == 0 or int(self[0]) == 1:
-                return self % modulo if modulo else self
+                return self
 
-        base = self % modulo if modulo else self
+        base = self
 
         while k > 0:
             if k & 1:
                 result *= base
-                result = result % modulo if modulo else result
             k >>= 1
             if k > 0:
-                base *= base
-                base = base % modulo if modulo else base
+                base = base.square()
 
         return result.remove_leading_zero()
 
     def __divmod__(self, other: 'GaloisFieldPolynomial') -> ('GaloisFieldPolynomial', 'GaloisFieldPolynomial'):
+        """Long division in one backend call (gfpoly_divmod), the loops over the coefficients run in the library"""
         assert not other.is_zero(), "Dividing FieldPoly through 0"
+        if counters.ENABLED:
+            # Steps of the long division (at most, coefficients that cancel on their own are skipped)
+            divisor_length = len(copy(other).remove_leading_zero())
+            counters.count(counters.GFPOLY_DIVMOD_ITERATIONS, max(len(self) - divisor_length + 1, 0))
 
-        q = []
-
-        r = copy(self).remove_leading_zero()
-        b = copy(other).remove_leading_zero()
-
-        if r.degree < b.degree:
-            return GaloisFieldPolynomial([GaloisFieldElement.zero()]), r
-
-        while r.degree >= b.degree:
-            deg_diff = r.degree - b.degree
-
-            quotient_coeff = r[-1] / b[-1]
-
-            # Increase Quotient
-            while len(q) <= deg_diff:
-                q.append(GaloisFieldElement.zero())
-            q[deg_diff] = quotient_coeff
-
-            # Reduce Remainder
-            for idx, gfe in enumerate(b):
-                pos = deg_diff + idx
-                prod = quotient_coeff * gfe
-
-                r[pos] = r[pos] + prod
-
-            r.remove_leading_zero()
-            # If remainder is 0, the len would still be 1 => endless loop
-            if int(r[-1]) == 0:
-                break
-
-        return GaloisFieldPolynomial(q).remove_leading_zero(), r
+        quotient, remainder = gfpoly_divmod(self.to_uint64_buffer(), other.to_uint64_buffer())
+        return (GaloisFieldPolynomial.from_uint64_buffer(quotient).remove_leading_zero(),
+                GaloisFieldPolynomial.from_uint64_buffer(remainder))
 
     def __floordiv__(self, other):
         quotient, _ = divmod(self, other)
@@ -185,27 +191,27 @@ class GaloisFieldPolynomial:
         return True
 
     def make_monic(self):
-        for i in range(len(self) - 1):
-            self[i] /= self[-1]
+        """All coefficients are divided by the same leading one: a single inversion, then all multiplications
+           with the inverse in one backend call"""
+        if len(self) > 1:
+            if counters.ENABLED:
+                counters.count(counters.GFMUL_CALLS, len(self))
+            leading_inverse = self[-1].inverse()
+            monic = GaloisFieldPolynomial.from_uint64_buffer(gfmul_scalar(self.to_uint64_buffer(),
+                                                                          int(leading_inverse)))
+            self._gfe_list = monic._gfe_list
 
         self[-1] = GaloisFieldElement.one()
         return self
 
     def sqrt(self) -> 'GaloisFieldPolynomial':
         """Len of GFP always has to be odd since, only even GFE do not equal 0.
-           => there are len(self)//2 odd gfe´s that need to be popped
-           => take sqrt of even, pop the odd one behind until the last one as there is no odd behind."""
-        sqrt_poly = copy(self)
+           => the odd gfe´s are dropped, the sqrt of all even ones is taken in one backend call
+           (new elements, the coefficients of self stay untouched)"""
+        even_coefficients = GaloisFieldPolynomial(self._gfe_list[::2])
+        sqrt_poly = GaloisFieldPolynomial.from_uint64_buffer(gfsqrt_batch(even_coefficients.to_uint64_buffer()))
 
-        odd_poly_cntr = len(sqrt_poly) // 2
-        for i in range(odd_poly_cntr):
-            sqrt_poly[i].sqrt()
-            sqrt_poly.pop(i + 1)
-
-        sqrt_poly[-1].sqrt()
-        sqrt_poly.remove_leading_zero()  # In case last gfe turns 0 on sqrt
-
-        return sqrt_poly
+        return sqrt_poly.remove_leading_zero()  # In case last gfe turns 0 on sqrt
 
     def diff(self) -> 'GaloisFieldPolynomial':
         derived_poly = copy(self)
@@ -224,18 +230,5 @@ class GaloisFieldPolynomial:
         return derived_poly
 
     def gcd(self, other: 'GaloisFieldPolynomial') -> 'GaloisFieldPolynomial':
-        a = copy(self).remove_leading_zero()
-        b = copy(other).remove_leading_zero()
-
-        if a.is_zero():
-            return b.make_monic()
-
-        if b.is_zero():
-            return a.make_monic()
-
-        while not b.is_zero():
-            temp = a % b
-            a = b
-            b = temp
-
-        return a.make_monic()
+        """Monic gcd, the euclidean algorithm runs in one backend call (gfpoly_gcd)"""
+        return GaloisFieldPolynomial.from_uint64_buffer(gfpoly_gcd(self.to_uint64_buffer(), other.to_uint64_buffer()))
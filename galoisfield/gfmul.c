@@ -1,4 +1,6 @@
+#include <stddef.h>
 #include <stdint.h>
+#include <stdlib.h>
 #include <wmmintrin.h>
 #include <emmintrin.h>
 #include <smmintrin.h>
@@ -36,12 +38,8 @@ static inline void reduce_256_to_128(uint64_t *result_high, uint64_t *result_low
     *result_low = X0 ^ H0;
 }
 
-// Source https://www.intel.com/content/dam/develop/external/us/en/documents/clmul-wp-rev-2-02-2014-04-20.pdf
-EXPORT uint128_t gfmul(uint64_t a_low, uint64_t a_high, uint64_t b_low, uint64_t b_high) {
-    // Create 128-bit values
-    __m128i a = _mm_set_epi64x(a_high, a_low);
-    __m128i b = _mm_set_epi64x(b_high, b_low);
-
+// Carry-less 128 x 128 => 256 bit product (unreduced) as high and low half
+static inline void clmul_256(__m128i a, __m128i b, __m128i *product_high, __m128i *product_low) {
     // Carry-less multiplication (just 4 multiplications)
     __m128i tmp0 = _mm_clmulepi64_si128(a, b, 0x00);  // low x low
     __m128i tmp1 = _mm_clmulepi64_si128(a, b, 0x10);  // high x low
@@ -52,13 +50,15 @@ EXPORT uint128_t gfmul(uint64_t a_low, uint64_t a_high, uint64_t b_low, uint64_t
     __m128i tmp4 = _mm_xor_si128(tmp1, tmp2);
     tmp1 = _mm_slli_si128(tmp4, 8);
     tmp2 = _mm_srli_si128(tmp4, 8);
-    tmp0 = _mm_xor_si128(tmp0, tmp1);
-    tmp3 = _mm_xor_si128(tmp3, tmp2);
+    *product_low = _mm_xor_si128(tmp0, tmp1);
+    *product_high = _mm_xor_si128(tmp3, tmp2);
+}
 
+static inline uint128_t reduce_product(__m128i product_high, __m128i product_low) {
     // Extract values for reduction
     uint64_t res[2], high[2];
-    _mm_storeu_si128((__m128i*)res, tmp0);
-    _mm_storeu_si128((__m128i*)high, tmp3);
+    _mm_storeu_si128((__m128i*)res, product_low);
+    _mm_storeu_si128((__m128i*)high, product_high);
 
     // Do explicit reduction
     uint128_t result;
@@ -67,4 +67,419 @@ EXPORT uint128_t gfmul(uint64_t a_low, uint64_t a_high, uint64_t b_low, uint64_t
                       res[1], res[0]);
 
     return result;
-}
\ No newline at end of file
+}
+
+// Source https://www.intel.com/content/dam/develop/external/us/en/documents/clmul-wp-rev-2-02-2014-04-20.pdf
+EXPORT uint128_t gfmul(uint64_t a_low, uint64_t a_high, uint64_t b_low, uint64_t b_high) {
+    // Create 128-bit values
+    __m128i a = _mm_set_epi64x(a_high, a_low);
+    __m128i b = _mm_set_epi64x(b_high, b_low);
+
+    __m128i product_high, product_low;
+    clmul_256(a, b, &product_high, &product_low);
+
+    return reduce_product(product_high, product_low);
+}
+
+// Batch kernels: buffers hold n elements as (low, high) uint64 pairs, i.e. 2 * n uint64 / 16 * n bytes
+// (the layout of little endian 128 bit ints, like xex blocks, array('Q') or a numpy uint64 array)
+
+#if defined(__AVX2__) && defined(__VPCLMULQDQ__)
+// vpclmul build (-mavx2 -mvpclmulqdq, see gfmul_lib.py): the batch kernels process two elements per 256 bit
+// register, one per 128 bit lane. Same steps as clmul_256 and reduce_256_to_128, just lane wise
+#include <immintrin.h>
+#define GFMUL_X2
+
+static inline void clmul_256_x2(__m256i a, __m256i b, __m256i *product_high, __m256i *product_low) {
+    __m256i tmp0 = _mm256_clmulepi64_epi128(a, b, 0x00);
+    __m256i tmp1 = _mm256_clmulepi64_epi128(a, b, 0x10);
+    __m256i tmp2 = _mm256_clmulepi64_epi128(a, b, 0x01);
+    __m256i tmp3 = _mm256_clmulepi64_epi128(a, b, 0x11);
+
+    __m256i tmp4 = _mm256_xor_si256(tmp1, tmp2);
+    *product_low = _mm256_xor_si256(tmp0, _mm256_bslli_epi128(tmp4, 8));
+    *product_high = _mm256_xor_si256(tmp3, _mm256_bsrli_epi128(tmp4, 8));
+}
+
+// Every 128 bit lane shifted left by k bits
+static inline __m256i shift_lanes_left(__m256i x, int k) {
+    return _mm256_or_si256(_mm256_slli_epi64(x, k), _mm256_bslli_epi128(_mm256_srli_epi64(x, 64 - k), 8));
+}
+
+static inline __m256i reduce_product_x2(__m256i product_high, __m256i product_low) {
+    // A ^ B ^ C (bits of X3) moved down to X2 => every lane holds (D, X3), as low and high 64 bit
+    __m256i carry = _mm256_xor_si256(_mm256_xor_si256(_mm256_srli_epi64(product_high, 63),
+                                                      _mm256_srli_epi64(product_high, 62)),
+                                     _mm256_srli_epi64(product_high, 57));
+    __m256i d = _mm256_xor_si256(product_high, _mm256_bsrli_epi128(carry, 8));
+
+    // H = (D, X3) ^ E ^ F ^ G, result = (X0, X1) ^ H
+    __m256i h = _mm256_xor_si256(_mm256_xor_si256(d, shift_lanes_left(d, 1)),
+                                 _mm256_xor_si256(shift_lanes_left(d, 2), shift_lanes_left(d, 7)));
+    return _mm256_xor_si256(product_low, h);
+}
+#endif
+
+// out[i] = a[i] * b[i], out may be the same buffer as a or b
+EXPORT void gfmul_batch(const uint64_t *a, const uint64_t *b, uint64_t *out, size_t n) {
+    size_t i = 0;
+#ifdef GFMUL_X2
+    for (; i + 2 <= n; i += 2) {
+        __m256i product_high, product_low;
+        clmul_256_x2(_mm256_loadu_si256((const __m256i*)(a + 2 * i)), _mm256_loadu_si256((const __m256i*)(b + 2 * i)),
+                     &product_high, &product_low);
+        _mm256_storeu_si256((__m256i*)(out + 2 * i), reduce_product_x2(product_high, product_low));
+    }
+#endif
+    for (; i < n; i++) {
+        __m128i product_high, product_low;
+        clmul_256(_mm_loadu_si128((const __m128i*)(a + 2 * i)), _mm_loadu_si128((const __m128i*)(b + 2 * i)),
+                  &product_high, &product_low);
+
+        uint128_t result = reduce_product(product_high, product_low);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+// out[i] = a[i] * scalar, out may be the same buffer as a
+EXPORT void gfmul_scalar(const uint64_t *a, uint64_t scalar_low, uint64_t scalar_high, uint64_t *out, size_t n) {
+    __m128i scalar = _mm_set_epi64x(scalar_high, scalar_low);
+
+    size_t i = 0;
+#ifdef GFMUL_X2
+    __m256i scalar_x2 = _mm256_broadcastsi128_si256(scalar);
+    for (; i + 2 <= n; i += 2) {
+        __m256i product_high, product_low;
+        clmul_256_x2(_mm256_loadu_si256((const __m256i*)(a + 2 * i)), scalar_x2, &product_high, &product_low);
+        _mm256_storeu_si256((__m256i*)(out + 2 * i), reduce_product_x2(product_high, product_low));
+    }
+#endif
+    for (; i < n; i++) {
+        __m128i product_high, product_low;
+        clmul_256(_mm_loadu_si128((const __m128i*)(a + 2 * i)), scalar, &product_high, &product_low);
+
+        uint128_t result = reduce_product(product_high, product_low);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+// Sum of a[i] * b[i]. The reduction is linear, so the unreduced products are summed up and reduced only once
+EXPORT uint128_t gfmul_accumulate(const uint64_t *a, const uint64_t *b, size_t n) {
+    __m128i sum_high = _mm_setzero_si128();
+    __m128i sum_low = _mm_setzero_si128();
+
+    size_t i = 0;
+#ifdef GFMUL_X2
+    __m256i sum_high_x2 = _mm256_setzero_si256();
+    __m256i sum_low_x2 = _mm256_setzero_si256();
+    for (; i + 2 <= n; i += 2) {
+        __m256i product_high, product_low;
+        clmul_256_x2(_mm256_loadu_si256((const __m256i*)(a + 2 * i)), _mm256_loadu_si256((const __m256i*)(b + 2 * i)),
+                     &product_high, &product_low);
+        sum_high_x2 = _mm256_xor_si256(sum_high_x2, product_high);
+        sum_low_x2 = _mm256_xor_si256(sum_low_x2, product_low);
+    }
+    // Both lanes are partial sums of the same dot product
+    sum_high = _mm_xor_si128(_mm256_castsi256_si128(sum_high_x2), _mm256_extracti128_si256(sum_high_x2, 1));
+    sum_low = _mm_xor_si128(_mm256_castsi256_si128(sum_low_x2), _mm256_extracti128_si256(sum_low_x2, 1));
+#endif
+    for (; i < n; i++) {
+        __m128i product_high, product_low;
+        clmul_256(_mm_loadu_si128((const __m128i*)(a + 2 * i)), _mm_loadu_si128((const __m128i*)(b + 2 * i)),
+                  &product_high, &product_low);
+
+        sum_high = _mm_xor_si128(sum_high, product_high);
+        sum_low = _mm_xor_si128(sum_low, product_low);
+    }
+
+    return reduce_product(sum_high, sum_low);
+}
+
+static inline uint128_t gfmul_128(uint128_t a, uint128_t b) {
+    __m128i product_high, product_low;
+    clmul_256(_mm_set_epi64x(a.high, a.low), _mm_set_epi64x(b.high, b.low), &product_high, &product_low);
+    return reduce_product(product_high, product_low);
+}
+
+// out[i] = h^(i + 1), the powers of a fixed multiplier for aggregated reduction (see fixed_multiplier.py)
+EXPORT void gfmul_powers(uint64_t h_low, uint64_t h_high, uint64_t *out, size_t n) {
+    uint128_t h = {h_low, h_high};
+    uint128_t power = h;
+
+    for (size_t i = 0; i < n; i++) {
+        out[2 * i] = power.low;
+        out[2 * i + 1] = power.high;
+        power = gfmul_128(power, h);
+    }
+}
+
+// a^2: in characteristic 2 the middle terms a_low * a_high cancel, 2 instead of 4 carry-less multiplications
+static inline uint128_t gfsquare_128(uint128_t a) {
+    __m128i x = _mm_set_epi64x(a.high, a.low);
+    return reduce_product(_mm_clmulepi64_si128(x, x, 0x11), _mm_clmulepi64_si128(x, x, 0x00));
+}
+
+// a^(2^n), n squarings. a^(2^128) = a for every field element, so there are at most 127 of them
+static inline uint128_t gfsquare_n_128(uint128_t a, uint64_t n) {
+    n %= 128;
+    for (uint64_t i = 0; i < n; i++) {
+        a = gfsquare_128(a);
+    }
+    return a;
+}
+
+EXPORT uint128_t gfsquare(uint64_t a_low, uint64_t a_high) {
+    uint128_t a = {a_low, a_high};
+    return gfsquare_128(a);
+}
+
+EXPORT uint128_t gfsquare_n(uint64_t a_low, uint64_t a_high, uint64_t n) {
+    uint128_t a = {a_low, a_high};
+    return gfsquare_n_128(a, n);
+}
+
+// out[i] = a[i]^2, out may be the same buffer as a
+EXPORT void gfsquare_batch(const uint64_t *a, uint64_t *out, size_t n) {
+    for (size_t i = 0; i < n; i++) {
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        uint128_t result = gfsquare_128(element);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+// Itoh-Tsujii: a^-1 = a^(2^128 - 2) = (a^(2^127 - 1))^2. With beta_k = a^(2^k - 1) and
+// beta_(i + j) = beta_i^(2^j) * beta_j along the addition chain 1, 2, 3, 6, 7, 14, 15, 30, 31, 62, 63, 126, 127
+// that are 127 squarings and 12 multiplications. The "inverse" of 0 is 0
+static inline uint128_t gfinv_128(uint128_t a) {
+    uint128_t beta_1 = a;
+    uint128_t beta_2 = gfmul_128(gfsquare_n_128(beta_1, 1), beta_1);
+    uint128_t beta_3 = gfmul_128(gfsquare_n_128(beta_2, 1), beta_1);
+    uint128_t beta_6 = gfmul_128(gfsquare_n_128(beta_3, 3), beta_3);
+    uint128_t beta_7 = gfmul_128(gfsquare_n_128(beta_6, 1), beta_1);
+    uint128_t beta_14 = gfmul_128(gfsquare_n_128(beta_7, 7), beta_7);
+    uint128_t beta_15 = gfmul_128(gfsquare_n_128(beta_14, 1), beta_1);
+    uint128_t beta_30 = gfmul_128(gfsquare_n_128(beta_15, 15), beta_15);
+    uint128_t beta_31 = gfmul_128(gfsquare_n_128(beta_30, 1), beta_1);
+    uint128_t beta_62 = gfmul_128(gfsquare_n_128(beta_31, 31), beta_31);
+    uint128_t beta_63 = gfmul_128(gfsquare_n_128(beta_62, 1), beta_1);
+    uint128_t beta_126 = gfmul_128(gfsquare_n_128(beta_63, 63), beta_63);
+    uint128_t beta_127 = gfmul_128(gfsquare_n_128(beta_126, 1), beta_1);
+
+    return gfsquare_n_128(beta_127, 1);
+}
+
+EXPORT uint128_t gfinv(uint64_t a_low, uint64_t a_high) {
+    uint128_t a = {a_low, a_high};
+    return gfinv_128(a);
+}
+
+// out[i] = a[i]^-1 (0 stays 0), out may be the same buffer as a.
+// Montgomery's trick: with the prefix products p_i = a_0 * ... * a_i only p_(n-1) gets inverted, then backwards
+// a_i^-1 = p_i^-1 * p_(i-1) and p_(i-1)^-1 = p_i^-1 * a_i => one inversion and about 3n multiplications
+EXPORT void gfinv_batch(const uint64_t *a, uint64_t *out, size_t n) {
+    uint128_t *prefix = malloc(n * sizeof(uint128_t));
+    if (prefix == NULL) {
+        // No memory for the prefix products, one inversion per element
+        for (size_t i = 0; i < n; i++) {
+            uint128_t element = {a[2 * i], a[2 * i + 1]};
+            uint128_t result = gfinv_128(element);
+            out[2 * i] = result.low;
+            out[2 * i + 1] = result.high;
+        }
+        return;
+    }
+
+    // Zeros are left out of the products
+    uint128_t product = {1, 0};
+    for (size_t i = 0; i < n; i++) {
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        if (element.low | element.high) {
+            product = gfmul_128(product, element);
+        }
+        prefix[i] = product;
+    }
+
+    uint128_t inverse = gfinv_128(product);
+    for (size_t i = n; i-- > 0;) {
+        // a[i] is read before out[i] is written, so in place works
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        if (!(element.low | element.high)) {
+            out[2 * i] = 0;
+            out[2 * i + 1] = 0;
+            continue;
+        }
+
+        uint128_t one = {1, 0};
+        uint128_t result = gfmul_128(inverse, i > 0 ? prefix[i - 1] : one);
+        inverse = gfmul_128(inverse, element);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+
+    free(prefix);
+}
+
+// sqrt(x) = x^(2^127), the only constant of the square root
+#define SQRT_X_LOW 0x6db6db6db6db6da4ULL
+#define SQRT_X_HIGH 0x2492492492492492ULL
+
+// Every second bit (0, 2, 4, ...) of a 64 bit word packed into the low 32 bits
+static inline uint64_t compress_even_bits(uint64_t x) {
+    x &= 0x5555555555555555ULL;
+    x = (x | (x >> 1)) & 0x3333333333333333ULL;
+    x = (x | (x >> 2)) & 0x0F0F0F0F0F0F0F0FULL;
+    x = (x | (x >> 4)) & 0x00FF00FF00FF00FFULL;
+    x = (x | (x >> 8)) & 0x0000FFFF0000FFFFULL;
+    x = (x | (x >> 16)) & 0x00000000FFFFFFFFULL;
+    return x;
+}
+
+// Squaring is linear in characteristic 2, so with a = even(x^2) + x * odd(x^2) (split by bit position):
+// sqrt(a) = even(x) + sqrt(x) * odd(x), two bit compressions and one multiplication (no data dependent branches)
+static inline uint128_t gfsqrt_128(uint128_t a) {
+    uint128_t even = {compress_even_bits(a.low) | (compress_even_bits(a.high) << 32), 0};
+    uint128_t odd = {compress_even_bits(a.low >> 1) | (compress_even_bits(a.high >> 1) << 32), 0};
+    uint128_t sqrt_x = {SQRT_X_LOW, SQRT_X_HIGH};
+
+    uint128_t result = gfmul_128(odd, sqrt_x);
+    result.low ^= even.low;
+    return result;
+}
+
+EXPORT uint128_t gfsqrt(uint64_t a_low, uint64_t a_high) {
+    uint128_t a = {a_low, a_high};
+    return gfsqrt_128(a);
+}
+
+// out[i] = sqrt(a[i]), out may be the same buffer as a
+EXPORT void gfsqrt_batch(const uint64_t *a, uint64_t *out, size_t n) {
+    for (size_t i = 0; i < n; i++) {
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        uint128_t result = gfsqrt_128(element);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+// Polynomial kernels: a polynomial over GF(2^128) is a buffer of its coefficients (lowest first), n coefficients
+// for degree n - 1, same element layout as the batch kernels
+
+static inline uint128_t load_element(const uint64_t *buffer, size_t i) {
+    uint128_t element = {buffer[2 * i], buffer[2 * i + 1]};
+    return element;
+}
+
+static inline void store_element(uint64_t *buffer, size_t i, uint128_t element) {
+    buffer[2 * i] = element.low;
+    buffer[2 * i + 1] = element.high;
+}
+
+static inline int is_zero_element(const uint64_t *buffer, size_t i) {
+    return !(buffer[2 * i] | buffer[2 * i + 1]);
+}
+
+// Length without leading zero coefficients, 0 for the zero polynomial
+static inline size_t trimmed_length(const uint64_t *a, size_t n) {
+    while (n > 0 && is_zero_element(a, n - 1)) {
+        n--;
+    }
+    return n;
+}
+
+// out = a * b (m + n - 1 coefficients, m, n >= 1), out must not overlap a or b. Every coefficient
+// out[k] = sum of a[i] * b[k - i] is summed up unreduced and reduced once, like gfmul_accumulate
+EXPORT void gfpoly_mul(const uint64_t *a, size_t m, const uint64_t *b, size_t n, uint64_t *out) {
+    for (size_t k = 0; k < m + n - 1; k++) {
+        size_t low = k >= n ? k - n + 1 : 0;
+        size_t high = k < m ? k : m - 1;
+
+        __m128i sum_high = _mm_setzero_si128();
+        __m128i sum_low = _mm_setzero_si128();
+        for (size_t i = low; i <= high; i++) {
+            __m128i product_high, product_low;
+            clmul_256(_mm_loadu_si128((const __m128i*)(a + 2 * i)), _mm_loadu_si128((const __m128i*)(b + 2 * (k - i))),
+                      &product_high, &product_low);
+            sum_high = _mm_xor_si128(sum_high, product_high);
+            sum_low = _mm_xor_si128(sum_low, product_low);
+        }
+
+        store_element(out, k, reduce_product(sum_high, sum_low));
+    }
+}
+
+// Long division of r (m coefficients) by b (n coefficients, the leading one non zero), in place: r is left with the
+// remainder, q (m - n + 1 coefficients if m >= n, may be NULL) gets the quotient. Returns the length of the remainder
+// without leading zeros, 0 if it is zero
+static size_t gfpoly_divmod_128(uint64_t *r, size_t m, const uint64_t *b, size_t n, uint64_t *q) {
+    size_t length = trimmed_length(r, m);
+
+    if (q != NULL && m >= n) {
+        for (size_t i = 0; i < m - n + 1; i++) {
+            store_element(q, i, (uint128_t) {0, 0});
+        }
+    }
+
+    // Every quotient coefficient is divided by the same leading coefficient, it's inverted only once
+    uint128_t leading_inverse = gfinv_128(load_element(b, n - 1));
+    while (length >= n) {
+        size_t shift = length - n;
+        uint128_t quotient_coefficient = gfmul_128(load_element(r, length - 1), leading_inverse);
+        if (q != NULL) {
+            store_element(q, shift, quotient_coefficient);
+        }
+
+        // r -= quotient coefficient * x^shift * b, the leading coefficient cancels by construction
+        __m128i scalar = _mm_set_epi64x(quotient_coefficient.high, quotient_coefficient.low);
+        for (size_t j = 0; j + 1 < n; j++) {
+            __m128i product_high, product_low;
+            clmul_256(_mm_loadu_si128((const __m128i*)(b + 2 * j)), scalar, &product_high, &product_low);
+            uint128_t product = reduce_product(product_high, product_low);
+            r[2 * (shift + j)] ^= product.low;
+            r[2 * (shift + j) + 1] ^= product.high;
+        }
+        store_element(r, length - 1, (uint128_t) {0, 0});
+
+        length = trimmed_length(r, length - 1);
+    }
+
+    return length;
+}
+
+// Quotient and remainder, see gfpoly_divmod_128. Returns the length of the remainder, at least 1 (the zero polynomial)
+EXPORT size_t gfpoly_divmod(uint64_t *r, size_t m, const uint64_t *b, size_t n, uint64_t *q) {
+    size_t length = gfpoly_divmod_128(r, m, b, n, q);
+    return length > 0 ? length : 1;
+}
+
+// Monic gcd of a (m coefficients) and b (n coefficients) with the euclidean algorithm. The remainders are computed
+// in place, so a and b get overwritten (the buffers swap roles every step). out (max(m, n) coefficients) gets the
+// gcd, the return value is its length. Like make_monic of a constant the gcd of two zero polynomials is 1
+EXPORT size_t gfpoly_gcd(uint64_t *a, size_t m, uint64_t *b, size_t n, uint64_t *out) {
+    uint64_t *x = a, *y = b;
+    size_t x_length = trimmed_length(a, m), y_length = trimmed_length(b, n);
+
+    while (y_length > 0) {
+        size_t remainder_length = gfpoly_divmod_128(x, x_length, y, y_length, NULL);
+
+        uint64_t *swap = x;
+        x = y;
+        y = swap;
+        x_length = y_length;
+        y_length = remainder_length;
+    }
+
+    if (x_length == 0) {
+        store_element(out, 0, (uint128_t) {1, 0});
+        return 1;
+    }
+
+    uint128_t leading_inverse = gfinv_128(load_element(x, x_length - 1));
+    for (size_t i = 0; i + 1 < x_length; i++) {
+        store_element(out, i, gfmul_128(load_element(x, i), leading_inverse));
+    }
+    store_element(out, x_length - 1, (uint128_t) {1, 0});
+    return x_length;
+}
@@ -0,0 +1,211 @@
+// CPython extension around the kernels of gfmul.c (or gfmul_portable.c with -DGFMUL_PORTABLE): gfmul, gfsquare(_n),
+// gfinv and gfsqrt take and return python ints, no ctypes argument conversion and no Uint128 result struct per call
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#ifdef GFMUL_PORTABLE
+    #include "gfmul_portable.c"
+    #define MODULE_NAME "_gfmul_portable"
+    #define MODULE_INIT PyInit__gfmul_portable
+#else
+    #include "gfmul.c"
+    #define MODULE_NAME "_gfmul_native"
+    #define MODULE_INIT PyInit__gfmul_native
+#endif
+
+#define ELEMENT_SIZE 16
+
+// Created once by the module init, the conversions compare and shift with them
+static PyObject *zero;
+#if PY_VERSION_HEX < 0x030D0000
+static PyObject *sixty_four;
+static PyObject *uint64_max;
+#endif
+
+// Field element (non negative int < 2^128) => (low, high), raises OverflowError/TypeError like int.to_bytes
+static int int_to_uint128(PyObject *value, uint128_t *result) {
+    if (!PyLong_Check(value)) {
+        PyErr_Format(PyExc_TypeError, "field element has to be an int, not %.200s", Py_TYPE(value)->tp_name);
+        return -1;
+    }
+
+#if PY_VERSION_HEX >= 0x030D0000
+    unsigned char bytes[ELEMENT_SIZE];
+    Py_ssize_t size = PyLong_AsNativeBytes(value, bytes, ELEMENT_SIZE, Py_ASNATIVEBYTES_LITTLE_ENDIAN |
+                                           Py_ASNATIVEBYTES_UNSIGNED_BUFFER | Py_ASNATIVEBYTES_REJECT_NEGATIVE);
+    if (size < 0) {
+        if (PyErr_ExceptionMatches(PyExc_ValueError)) {
+            PyErr_SetString(PyExc_OverflowError, "can't convert negative int to unsigned");
+        }
+        return -1;
+    }
+    if (size > ELEMENT_SIZE) {
+        PyErr_SetString(PyExc_OverflowError, "int too big to convert");
+        return -1;
+    }
+
+    result->low = 0;
+    result->high = 0;
+    for (int i = 7; i >= 0; i--) {
+        result->low = (result->low << 8) | bytes[i];
+        result->high = (result->high << 8) | bytes[i + 8];
+    }
+    return 0;
+#else
+    // Values below 2^64 need no temporary int, negative ones raise the OverflowError here
+    int small = PyObject_RichCompareBool(value, uint64_max, Py_LE);
+    if (small < 0) {
+        return -1;
+    }
+    if (small) {
+        result->low = PyLong_AsUnsignedLongLong(value);
+        result->high = 0;
+        return PyErr_Occurred() ? -1 : 0;
+    }
+
+    PyObject *high = PyNumber_Rshift(value, sixty_four);
+    if (high == NULL) {
+        return -1;
+    }
+    result->high = PyLong_AsUnsignedLongLong(high);
+    Py_DECREF(high);
+    if (PyErr_Occurred()) {
+        return -1;
+    }
+    result->low = PyLong_AsUnsignedLongLongMask(value);
+    return 0;
+#endif
+}
+
+static PyObject *uint128_to_int(uint128_t value) {
+    if (value.high == 0) {
+        return PyLong_FromUnsignedLongLong(value.low);
+    }
+
+#if PY_VERSION_HEX >= 0x030D0000
+    unsigned char bytes[ELEMENT_SIZE];
+    for (int i = 0; i < 8; i++) {
+        bytes[i] = (unsigned char) (value.low >> (8 * i));
+        bytes[i + 8] = (unsigned char) (value.high >> (8 * i));
+    }
+    return PyLong_FromUnsignedNativeBytes(bytes, ELEMENT_SIZE, Py_ASNATIVEBYTES_LITTLE_ENDIAN);
+#else
+    PyObject *high = PyLong_FromUnsignedLongLong(value.high);
+    if (high == NULL) {
+        return NULL;
+    }
+    PyObject *shifted = PyNumber_Lshift(high, sixty_four);
+    Py_DECREF(high);
+    if (shifted == NULL) {
+        return NULL;
+    }
+    PyObject *low = PyLong_FromUnsignedLongLong(value.low);
+    if (low == NULL) {
+        Py_DECREF(shifted);
+        return NULL;
+    }
+    PyObject *result = PyNumber_Or(shifted, low);
+    Py_DECREF(shifted);
+    Py_DECREF(low);
+    return result;
+#endif
+}
+
+static PyObject *ext_gfmul(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    uint128_t a, b;
+    if (nargs != 2) {
+        PyErr_SetString(PyExc_TypeError, "gfmul(a, b) takes exactly 2 arguments");
+        return NULL;
+    }
+    if (int_to_uint128(args[0], &a) < 0 || int_to_uint128(args[1], &b) < 0) {
+        return NULL;
+    }
+
+    return uint128_to_int(gfmul(a.low, a.high, b.low, b.high));
+}
+
+static PyObject *ext_gfsquare(PyObject *self, PyObject *arg) {
+    uint128_t a;
+    if (int_to_uint128(arg, &a) < 0) {
+        return NULL;
+    }
+
+    return uint128_to_int(gfsquare_128(a));
+}
+
+static PyObject *ext_gfsquare_n(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    uint128_t a;
+    if (nargs != 2) {
+        PyErr_SetString(PyExc_TypeError, "gfsquare_n(a, n) takes exactly 2 arguments");
+        return NULL;
+    }
+    if (int_to_uint128(args[0], &a) < 0) {
+        return NULL;
+    }
+    if (!PyLong_Check(args[1])) {
+        PyErr_SetString(PyExc_TypeError, "n has to be an int");
+        return NULL;
+    }
+
+    int negative = PyObject_RichCompareBool(args[1], zero, Py_LT);
+    if (negative != 0) {
+        if (negative > 0) {
+            PyErr_SetString(PyExc_ValueError, "n has to be non negative");
+        }
+        return NULL;
+    }
+
+    // Only n mod 128 matters (a^(2^128) = a) and 128 divides 2^64, so the masked value is enough for huge n as well
+    return uint128_to_int(gfsquare_n_128(a, PyLong_AsUnsignedLongLongMask(args[1])));
+}
+
+static PyObject *ext_gfinv(PyObject *self, PyObject *arg) {
+    uint128_t a;
+    if (int_to_uint128(arg, &a) < 0) {
+        return NULL;
+    }
+
+    return uint128_to_int(gfinv_128(a));
+}
+
+static PyObject *ext_gfsqrt(PyObject *self, PyObject *arg) {
+    uint128_t a;
+    if (int_to_uint128(arg, &a) < 0) {
+        return NULL;
+    }
+
+    return uint128_to_int(gfsqrt_128(a));
+}
+
+static PyMethodDef methods[] = {
+    {"gfmul", (PyCFunction) (void (*)(void)) ext_gfmul, METH_FASTCALL, "gfmul(a, b) -> a * b in GF(2^128)"},
+    {"gfsquare", ext_gfsquare, METH_O, "gfsquare(a) -> a^2 in GF(2^128)"},
+    {"gfsquare_n", (PyCFunction) (void (*)(void)) ext_gfsquare_n, METH_FASTCALL,
+     "gfsquare_n(a, n) -> a^(2^n) in GF(2^128)"},
+    {"gfinv", ext_gfinv, METH_O, "gfinv(a) -> a^-1 in GF(2^128), 0 for 0"},
+    {"gfsqrt", ext_gfsqrt, METH_O, "gfsqrt(a) -> square root of a in GF(2^128)"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT, MODULE_NAME, "GF(2^128) arithmetic on python ints, see gfmul_lib.py", -1, methods
+};
+
+PyMODINIT_FUNC MODULE_INIT(void) {
+    zero = PyLong_FromLong(0);
+    if (zero == NULL) {
+        return NULL;
+    }
+#if PY_VERSION_HEX < 0x030D0000
+    sixty_four = PyLong_FromLong(64);
+    if (sixty_four == NULL) {
+        return NULL;
+    }
+    uint64_max = PyLong_FromUnsignedLongLong(UINT64_MAX);
+    if (uint64_max == NULL) {
+        return NULL;
+    }
+#endif
+
+    return PyModule_Create(&module);
+}
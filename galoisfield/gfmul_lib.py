@@ -1,13 +1,50 @@
+import hashlib
+import os
+import re
 import subprocess
+import sys
+import sysconfig
+from dataclasses import dataclass
 from functools import lru_cache
+from importlib.machinery import ExtensionFileLoader
+from importlib.util import module_from_spec, spec_from_loader
 import time
-from ctypes import CDLL, c_uint64, Structure
+from ctypes import CDLL, c_char, c_size_t, c_uint64, c_void_p, Structure
 from pathlib import Path
 import platform
+from types import ModuleType
+from typing import Final, Optional
+
+SOURCE_DIR: Final[Path] = Path(__file__).parent.absolute()
+# Every build lands here, named after its variant and cache key (hash of sources, flags and the targeted cpu features),
+# so a changed source or flag leads to a new build instead of loading a stale one
+CACHE_DIR: Final[Path] = SOURCE_DIR / "lib_cache"
+CACHE_KEY_LENGTH: Final[int] = 16
+# <prefix>-<key><suffix>, the suffix starts at the dot after the key: .so, .dll or the EXT_SUFFIX of an extension
+# (.cpython-311-x86_64-linux-gnu.so, which has dashes of its own)
+BUILD_NAME_PATTERN: Final[re.Pattern] = re.compile(rf"(.+)-([0-9a-f]{{{CACHE_KEY_LENGTH}}})(\..+)")
 
 C_SCRIPT_NAME = "gfmul.c"
-WINDOWS_LIBRARY_NAME = "gfmul.dll"
-LINUX_LIBRARY_NAME = "libgfmul.so"
+# Table driven carry-less multiplication in plain C, runs on cpus without pclmulqdq
+PORTABLE_C_SCRIPT_NAME = "gfmul_portable.c"
+# CPython extension around the same kernels (gfmul, gfinv, gfsqrt on python ints), one module per library
+EXTENSION_C_SCRIPT_NAME = "gfmul_ext.c"
+EXTENSION_MODULE_NAME = "_gfmul_native"
+PORTABLE_EXTENSION_MODULE_NAME = "_gfmul_portable"
+
+# No -march=native: a build only needs the instructions named here, so it still runs on another cpu
+# that has them (load_library checks for them before loading)
+NATIVE_COMPILER_FLAGS: Final[list[str]] = ["-O3", "-msse2", "-msse4.1", "-mpclmul"]
+# Same kernels, the batch kernels process two elements per 256 bit register
+VPCLMUL_COMPILER_FLAGS: Final[list[str]] = NATIVE_COMPILER_FLAGS + ["-mavx2", "-mvpclmulqdq"]
+PORTABLE_COMPILER_FLAGS: Final[list[str]] = ["-O3"]
+
+CPU_INFO_FILE: Final[Path] = Path("/proc/cpuinfo")
+X86_MACHINES: Final[frozenset[str]] = frozenset({"x86_64", "amd64", "i386", "i686", "x86"})
+
+# Batch kernels take buffers of (low, high) uint64 pairs, one pair per field element
+ELEMENT_SIZE: Final[int] = 16
+UINT64_MASK: Final[int] = (1 << 64) - 1
 
 
 class Uint128(Structure):
@@ -15,97 +52,265 @@ class Uint128(Structure):
                 ("high", c_uint64)]
 
 
-def _resolve_library_location():
-    """Calculates the defined name of library based on OS"""
-    current_dir = Path(__file__).parent.absolute()
-    output_name = WINDOWS_LIBRARY_NAME if platform.system() == "Windows" else LINUX_LIBRARY_NAME
-    lib_path = current_dir / output_name
+@dataclass(frozen=True)
+class LibraryVariant:
+    """One build of a kernel source: compiled with flags, runs on every cpu that has cpu_flags (/proc/cpuinfo names)"""
+    name: str
+    source: str
+    flags: tuple[str, ...]
+    cpu_flags: frozenset[str]
 
-    return current_dir, output_name, lib_path
 
+# Builds of gfmul.c, best first
+NATIVE_VARIANTS: Final[tuple[LibraryVariant, ...]] = (
+    LibraryVariant("vpclmul", C_SCRIPT_NAME, tuple(VPCLMUL_COMPILER_FLAGS),
+                   frozenset({"pclmulqdq", "sse4_1", "avx2", "vpclmulqdq"})),
+    LibraryVariant("pclmul", C_SCRIPT_NAME, tuple(NATIVE_COMPILER_FLAGS), frozenset({"pclmulqdq", "sse4_1"})),
+)
+# The baseline, plain x86-64 (or any other architecture)
+PORTABLE_VARIANT: Final[LibraryVariant] = LibraryVariant("portable", PORTABLE_C_SCRIPT_NAME,
+                                                         tuple(PORTABLE_COMPILER_FLAGS), frozenset())
+LIBRARY_VARIANTS: Final[dict[str, LibraryVariant]] = {variant.name: variant
+                                                       for variant in (*NATIVE_VARIANTS, PORTABLE_VARIANT)}
 
-def compile_library():
-    """Compile the gfmul library if it doesn't exist."""
-    current_dir, output_name, lib_path = _resolve_library_location()
-
-    if not lib_path.exists():
-        try:
-            if output_name == WINDOWS_LIBRARY_NAME:
-                # Need to have mingw64 installed:
-                # https://github.com/niXman/mingw-builds-binaries/releases/download/14.2.0-rt_v12-rev0/x86_64-14.2.0-release-posix-seh-msvcrt-rt_v12-rev0.7z
-                # Install, unpack, add it to path, restart => should be able to compile, (Can be done manually as well)
-                compiler_args = [
-                    "gcc",
-                    "-O3",
-                    "-march=native",
-                    "-msse2",
-                    "-msse4.1",
-                    "-maes",
-                    "-mpclmul",
-                    "-shared",
-                    str(current_dir / C_SCRIPT_NAME),
-                    "-o",
-                    current_dir / output_name,
-                ]
-            else:
-                compiler_args = [
-                    "gcc",
-                    "-O3",
-                    "-march=native",
-                    "-msse2",
-                    "-msse4.1",
-                    "-maes",
-                    "-mpclmul",
-                    "-shared",
-                    "-fPIC",
-                    str(current_dir / C_SCRIPT_NAME),
-                    "-o",
-                    current_dir / output_name,
-                ]
-
-            result = subprocess.run(
-                compiler_args,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode != 0:
-                raise RuntimeError(f"Compilation failed:\n{result.stderr}")
-
-        except subprocess.CalledProcessError as e:
-            print(f"Compilation failed with error:\n{e.stderr}")
-            return None
-        except FileNotFoundError:
-            print("gcc not found. Please ensure gcc is installed and in your PATH")
-            return None
 
-    return lib_path
+@lru_cache(maxsize=1)
+def cpu_features() -> frozenset[str]:
+    """Feature flags of the running cpu. Without /proc/cpuinfo (e.g. Windows) there is no way to check without cpuid,
+       so an x86 cpu is assumed to have what every one of the last decade has: pclmulqdq and sse4.1, nothing more"""
+    if platform.machine().lower() not in X86_MACHINES:
+        return frozenset()
+    if not CPU_INFO_FILE.exists():
+        return LIBRARY_VARIANTS["pclmul"].cpu_flags
 
+    for line in CPU_INFO_FILE.read_text().splitlines():
+        if line.startswith("flags"):
+            return frozenset(line.split(":", 1)[1].split())
+    return frozenset()
+
+
+def supported_variants() -> list[LibraryVariant]:
+    """The variants of gfmul.c the running cpu can execute, best first"""
+    return [variant for variant in NATIVE_VARIANTS if variant.cpu_flags <= cpu_features()]
+
+
+def _cache_key(sources: list[Path], flags: tuple[str, ...], cpu_flags: frozenset[str]) -> str:
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(source.read_bytes())
+    digest.update(" ".join(flags).encode())
+    digest.update(" ".join(sorted(cpu_flags)).encode())
+    return digest.hexdigest()[:CACHE_KEY_LENGTH]
+
+
+def _resolve_library_location(variant: LibraryVariant) -> Path:
+    """Cache path of the variant's library based on OS"""
+    key = _cache_key([SOURCE_DIR / variant.source], variant.flags, variant.cpu_flags)
+    if platform.system() == "Windows":
+        return CACHE_DIR / f"gfmul-{variant.name}-{key}.dll"
+    return CACHE_DIR / f"libgfmul-{variant.name}-{key}.so"
+
+
+def _resolve_extension_location(portable: bool = False) -> Path:
+    """Cache path of the extension, it includes the kernel source, so both are part of the key"""
+    variant = PORTABLE_VARIANT if portable else LIBRARY_VARIANTS["pclmul"]
+    module_name = PORTABLE_EXTENSION_MODULE_NAME if portable else EXTENSION_MODULE_NAME
+    key = _cache_key([SOURCE_DIR / EXTENSION_C_SCRIPT_NAME, SOURCE_DIR / variant.source], variant.flags,
+                     variant.cpu_flags)
+    return CACHE_DIR / f"{module_name}-{key}{sysconfig.get_config_var('EXT_SUFFIX')}"
 
-@lru_cache(maxsize=1)
-def load_library():
-    """Load the appropriate library file based on platform.
-       The Library only gets loaded once (lru_cache) and gets cached for further calls.
-       also it doesn't get loaded on the GaloisfieldElement import
-       (maxsize: remembers the result of one function call => perfect since we return same thing everytime"""
-    _, _, lib_path = _resolve_library_location()
 
+def _split_build_name(name: str) -> Optional[tuple[str, str, str]]:
+    """(prefix, key, suffix) of a build in the cache, e.g. ("_gfmul_native", key, ".cpython-311-x86_64-linux-gnu.so")
+       or ("libgfmul-pclmul", key, ".so"), None for anything else"""
+    match = BUILD_NAME_PATTERN.fullmatch(name)
+    return match.groups() if match else None
+
+
+def _remove_stale_builds(path: Path):
+    # Older builds of the same library or extension: same prefix and suffix, another key
+    prefix, key, suffix = _split_build_name(path.name)
+    for stale in path.parent.iterdir():
+        parts = _split_build_name(stale.name)
+        if parts is not None and parts[0] == prefix and parts[2] == suffix and parts[1] != key:
+            stale.unlink(missing_ok=True)
+
+
+def _compile(source_path: Path, lib_path: Path, flags: list[str]):
+    """Compile the library unless it is already in the cache."""
+    if lib_path.exists():
+        _remove_stale_builds(lib_path)
+        return lib_path
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    # Compiled under a name of its own and moved into place at once: concurrent first runs build the same library,
+    # none of them may load a half written file or take the other's output for a stale build
+    temp_path = lib_path.with_name(f"{lib_path.name}.{os.getpid()}.tmp")
     try:
-        assert lib_path.exists(), f"Library not found at {lib_path}"
-
-        lib = CDLL(str(lib_path))
-
-        lib.gfmul.argtypes = [
-            c_uint64,  # a_low
-            c_uint64,  # a_high
-            c_uint64,  # b_low
-            c_uint64,  # b_high
-        ]
-        lib.gfmul.restype = Uint128
-
-        return lib
-    except Exception as e:
-        print(f"Error loading gfmul library: {e}")
-        print(f"Tried to load from: {lib_path}")
+        if platform.system() == "Windows":
+            # Need to have mingw64 installed:
+            # https://github.com/niXman/mingw-builds-binaries/releases/download/14.2.0-rt_v12-rev0/x86_64-14.2.0-release-posix-seh-msvcrt-rt_v12-rev0.7z
+            # Install, unpack, add it to path, restart => should be able to compile, (Can be done manually as well)
+            compiler_args = ["gcc", *flags, "-shared", str(source_path), "-o", str(temp_path)]
+        else:
+            compiler_args = ["gcc", *flags, "-shared", "-fPIC", str(source_path), "-o", str(temp_path)]
+
+        result = subprocess.run(
+            compiler_args,
+            check=True,
+            capture_output=True,
+            text=True
+        )
+
+        if result.returncode != 0:
+            raise RuntimeError(f"Compilation failed:\n{result.stderr}")
+
+    except subprocess.CalledProcessError as e:
+        print(f"Compilation failed with error:\n{e.stderr}")
+        temp_path.unlink(missing_ok=True)
+        return None
+    except FileNotFoundError:
+        print("gcc not found. Please ensure gcc is installed and in your PATH")
         return None
+
+    os.replace(temp_path, lib_path)
+    _remove_stale_builds(lib_path)
+    return lib_path
+
+
+def _extension_flags() -> list[str]:
+    flags = [f"-I{sysconfig.get_paths()['include']}"]
+    if platform.system() == "Windows":
+        # Extensions are linked against pythonXY.dll on Windows
+        flags += [f"-L{Path(sys.base_prefix) / 'libs'}", f"-lpython{sys.version_info.major}{sys.version_info.minor}"]
+    return flags
+
+
+def _compile_extension(portable: bool):
+    flags = PORTABLE_COMPILER_FLAGS + ["-DGFMUL_PORTABLE"] if portable else NATIVE_COMPILER_FLAGS
+    return _compile(SOURCE_DIR / EXTENSION_C_SCRIPT_NAME, _resolve_extension_location(portable),
+                    flags + _extension_flags())
+
+
+def compile_library():
+    """Compile every variant of the gfmul library (portable, pclmul, vpclmul) and the extension modules into the
+       cache, unless they are already there. The variants don't depend on the building machine, so all of them are
+       built: an image built on one cpu picks the best variant on the cpu it runs on. A variant the compiler
+       can't build (e.g. no -mvpclmulqdq in old gcc versions) is skipped. Returns the built libraries by variant"""
+    built = {}
+    for variant in LIBRARY_VARIANTS.values():
+        lib_path = _compile(SOURCE_DIR / variant.source, _resolve_library_location(variant), list(variant.flags))
+        if lib_path is not None:
+            built[variant.name] = lib_path
+
+    _compile_extension(portable=True)
+    _compile_extension(portable=False)
+
+    return built
+
+
+def _load(lib_path: Path) -> CDLL:
+    assert lib_path.exists(), f"Library not found at {lib_path}"
+
+    lib = CDLL(str(lib_path))
+
+    lib.gfmul.argtypes = [
+        c_uint64,  # a_low
+        c_uint64,  # a_high
+        c_uint64,  # b_low
+        c_uint64,  # b_high
+    ]
+    lib.gfmul.restype = Uint128
+
+    lib.gfmul_batch.argtypes = [c_void_p, c_void_p, c_void_p, c_size_t]  # a, b, out, n
+    lib.gfmul_batch.restype = None
+    lib.gfmul_scalar.argtypes = [c_void_p, c_uint64, c_uint64, c_void_p, c_size_t]  # a, scalar, out, n
+    lib.gfmul_scalar.restype = None
+    lib.gfmul_accumulate.argtypes = [c_void_p, c_void_p, c_size_t]  # a, b, n
+    lib.gfmul_accumulate.restype = Uint128
+    lib.gfmul_powers.argtypes = [c_uint64, c_uint64, c_void_p, c_size_t]  # h, out, n
+    lib.gfmul_powers.restype = None
+
+    lib.gfsquare.argtypes = [c_uint64, c_uint64]  # a_low, a_high
+    lib.gfsquare.restype = Uint128
+    lib.gfsquare_n.argtypes = [c_uint64, c_uint64, c_uint64]  # a_low, a_high, n
+    lib.gfsquare_n.restype = Uint128
+    lib.gfsquare_batch.argtypes = [c_void_p, c_void_p, c_size_t]  # a, out, n
+    lib.gfsquare_batch.restype = None
+
+    lib.gfinv.argtypes = [c_uint64, c_uint64]  # a_low, a_high
+    lib.gfinv.restype = Uint128
+    lib.gfinv_batch.argtypes = [c_void_p, c_void_p, c_size_t]  # a, out, n
+    lib.gfinv_batch.restype = None
+
+    lib.gfsqrt.argtypes = [c_uint64, c_uint64]  # a_low, a_high
+    lib.gfsqrt.restype = Uint128
+    lib.gfsqrt_batch.argtypes = [c_void_p, c_void_p, c_size_t]  # a, out, n
+    lib.gfsqrt_batch.restype = None
+
+    lib.gfpoly_mul.argtypes = [c_void_p, c_size_t, c_void_p, c_size_t, c_void_p]  # a, m, b, n, out
+    lib.gfpoly_mul.restype = None
+    lib.gfpoly_divmod.argtypes = [c_void_p, c_size_t, c_void_p, c_size_t, c_void_p]  # r, m, b, n, q
+    lib.gfpoly_divmod.restype = c_size_t
+    lib.gfpoly_gcd.argtypes = [c_void_p, c_size_t, c_void_p, c_size_t, c_void_p]  # a, m, b, n, out
+    lib.gfpoly_gcd.restype = c_size_t
+
+    return lib
+
+
+def select_variant() -> LibraryVariant:
+    """The best variant of gfmul.c the running cpu supports and that got built"""
+    supported = supported_variants()
+    assert supported, f"cpu lacks one of {', '.join(sorted(NATIVE_VARIANTS[-1].cpu_flags))}"
+
+    for variant in supported:
+        if _resolve_library_location(variant).exists():
+            return variant
+    raise FileNotFoundError(f"No build of {', '.join(variant.name for variant in supported)} in {CACHE_DIR}")
+
+
+@lru_cache(maxsize=None)
+def load_library(variant_name: Optional[str] = None):
+    """Load the best variant of the native library for this cpu (select_variant) or the named one.
+       The Library only gets loaded once (lru_cache) and gets cached for further calls.
+       also it doesn't get loaded on the GaloisfieldElement import.
+       Raises if the library is missing or can't be loaded, backend.py falls back to another implementation then"""
+    variant = select_variant() if variant_name is None else LIBRARY_VARIANTS[variant_name]
+    assert variant.cpu_flags <= cpu_features(), f"cpu can't run the {variant.name} variant"
+    return _load(_resolve_library_location(variant))
+
+
+@lru_cache(maxsize=1)
+def load_portable_library():
+    """Same as load_library for the portable library"""
+    return _load(_resolve_library_location(PORTABLE_VARIANT))
+
+
+def _load_extension(portable: bool) -> ModuleType:
+    ext_path = _resolve_extension_location(portable)
+    assert ext_path.exists(), f"Extension not found at {ext_path}"
+
+    module_name = PORTABLE_EXTENSION_MODULE_NAME if portable else EXTENSION_MODULE_NAME
+    loader = ExtensionFileLoader(f"galoisfield.{module_name}", str(ext_path))
+    module = module_from_spec(spec_from_loader(loader.name, loader))
+    loader.exec_module(module)
+    return module
+
+
+@lru_cache(maxsize=1)
+def load_extension() -> ModuleType:
+    """The extension module of the native library (gfmul, gfinv, gfsqrt on ints), raises like load_library"""
+    return _load_extension(portable=False)
+
+
+@lru_cache(maxsize=1)
+def load_portable_extension() -> ModuleType:
+    return _load_extension(portable=True)
+
+
+def buffer_pointer(buffer: memoryview):
+    """Address of the buffer for a c_void_p argument without copying it (readonly buffers like bytes included)"""
+    if buffer.readonly:
+        whole_bytes = isinstance(buffer.obj, bytes) and buffer.nbytes == len(buffer.obj)
+        return buffer.obj if whole_bytes else bytes(buffer)
+    return (c_char * buffer.nbytes).from_buffer(buffer)
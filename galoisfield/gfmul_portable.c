@@ -0,0 +1,413 @@
+#include <stddef.h>
+#include <stdint.h>
+#include <stdlib.h>
+
+// Same exports as gfmul.c, but plain C without intrinsics, so it runs on every cpu (no pclmulqdq needed)
+
+#ifdef _WIN32
+    #define EXPORT __declspec(dllexport)
+#else
+    #define EXPORT __attribute__((visibility("default")))
+#endif
+
+typedef struct {
+    uint64_t low;
+    uint64_t high;
+} uint128_t;
+
+// Carry-less 64 x 64 => 128 bit multiplication, table driven: a times every 4 bit value, b is consumed nibble by nibble
+static inline void clmul_64(uint64_t a, uint64_t b, uint64_t *product_high, uint64_t *product_low) {
+    uint64_t table_low[16], table_high[16];
+    table_low[0] = 0;
+    table_high[0] = 0;
+    table_low[1] = a;
+    table_high[1] = 0;
+
+    for (int i = 2; i < 16; i += 2) {
+        // a * i = (a * i/2) << 1, a * (i + 1) = a * i ^ a
+        table_high[i] = (table_high[i / 2] << 1) | (table_low[i / 2] >> 63);
+        table_low[i] = table_low[i / 2] << 1;
+        table_high[i + 1] = table_high[i];
+        table_low[i + 1] = table_low[i] ^ a;
+    }
+
+    uint64_t high = 0, low = 0;
+    for (int shift = 60; shift >= 0; shift -= 4) {
+        high = (high << 4) | (low >> 60);
+        low <<= 4;
+
+        unsigned nibble = (b >> shift) & 0xF;
+        high ^= table_high[nibble];
+        low ^= table_low[nibble];
+    }
+
+    *product_high = high;
+    *product_low = low;
+}
+
+// Carry-less 128 x 128 => 256 bit product (unreduced), X3 the highest 64 bits
+static inline void clmul_256(uint64_t a_low, uint64_t a_high, uint64_t b_low, uint64_t b_high,
+                             uint64_t *X3, uint64_t *X2, uint64_t *X1, uint64_t *X0) {
+    uint64_t low_high, low_low, high_high, high_low, mid1_high, mid1_low, mid2_high, mid2_low;
+    clmul_64(a_low, b_low, &low_high, &low_low);
+    clmul_64(a_high, b_high, &high_high, &high_low);
+    clmul_64(a_high, b_low, &mid1_high, &mid1_low);
+    clmul_64(a_low, b_high, &mid2_high, &mid2_low);
+
+    *X0 = low_low;
+    *X1 = low_high ^ mid1_low ^ mid2_low;
+    *X2 = high_low ^ mid1_high ^ mid2_high;
+    *X3 = high_high;
+}
+
+// Reduction polynomial x^128 + x^7 + x^2 + x + 1 according to intel whitepaper (page 17), same as gfmul.c
+static inline uint128_t reduce_256_to_128(uint64_t X3, uint64_t X2, uint64_t X1, uint64_t X0) {
+    uint64_t A = X3 >> 63;
+    uint64_t B = X3 >> 62;
+    uint64_t C = X3 >> 57;
+    uint64_t D = X2 ^ A ^ B ^ C;
+
+    uint64_t E1 = (X3 << 1) | (D >> 63);
+    uint64_t E0 = D << 1;
+    uint64_t F1 = (X3 << 2) | (D >> 62);
+    uint64_t F0 = D << 2;
+    uint64_t G1 = (X3 << 7) | (D >> 57);
+    uint64_t G0 = D << 7;
+
+    uint128_t result;
+    result.high = X1 ^ X3 ^ E1 ^ F1 ^ G1;
+    result.low = X0 ^ D ^ E0 ^ F0 ^ G0;
+    return result;
+}
+
+EXPORT uint128_t gfmul(uint64_t a_low, uint64_t a_high, uint64_t b_low, uint64_t b_high) {
+    uint64_t X3, X2, X1, X0;
+    clmul_256(a_low, a_high, b_low, b_high, &X3, &X2, &X1, &X0);
+    return reduce_256_to_128(X3, X2, X1, X0);
+}
+
+// Batch kernels, buffer layout as in gfmul.c: n elements as (low, high) uint64 pairs
+
+EXPORT void gfmul_batch(const uint64_t *a, const uint64_t *b, uint64_t *out, size_t n) {
+    for (size_t i = 0; i < n; i++) {
+        uint128_t result = gfmul(a[2 * i], a[2 * i + 1], b[2 * i], b[2 * i + 1]);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+EXPORT void gfmul_scalar(const uint64_t *a, uint64_t scalar_low, uint64_t scalar_high, uint64_t *out, size_t n) {
+    for (size_t i = 0; i < n; i++) {
+        uint128_t result = gfmul(a[2 * i], a[2 * i + 1], scalar_low, scalar_high);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+EXPORT uint128_t gfmul_accumulate(const uint64_t *a, const uint64_t *b, size_t n) {
+    uint64_t sum3 = 0, sum2 = 0, sum1 = 0, sum0 = 0;
+
+    for (size_t i = 0; i < n; i++) {
+        uint64_t X3, X2, X1, X0;
+        clmul_256(a[2 * i], a[2 * i + 1], b[2 * i], b[2 * i + 1], &X3, &X2, &X1, &X0);
+        sum3 ^= X3;
+        sum2 ^= X2;
+        sum1 ^= X1;
+        sum0 ^= X0;
+    }
+
+    return reduce_256_to_128(sum3, sum2, sum1, sum0);
+}
+
+static inline uint128_t gfmul_128(uint128_t a, uint128_t b) {
+    return gfmul(a.low, a.high, b.low, b.high);
+}
+
+// out[i] = h^(i + 1), the powers of a fixed multiplier for aggregated reduction (see fixed_multiplier.py)
+EXPORT void gfmul_powers(uint64_t h_low, uint64_t h_high, uint64_t *out, size_t n) {
+    uint128_t h = {h_low, h_high};
+    uint128_t power = h;
+
+    for (size_t i = 0; i < n; i++) {
+        out[2 * i] = power.low;
+        out[2 * i + 1] = power.high;
+        power = gfmul_128(power, h);
+    }
+}
+
+// The low 32 bits of x moved to the even bits (0, 2, 4, ...) of a 64 bit word
+static inline uint64_t spread_bits(uint64_t x) {
+    x &= 0x00000000FFFFFFFFULL;
+    x = (x | (x << 16)) & 0x0000FFFF0000FFFFULL;
+    x = (x | (x << 8)) & 0x00FF00FF00FF00FFULL;
+    x = (x | (x << 4)) & 0x0F0F0F0F0F0F0F0FULL;
+    x = (x | (x << 2)) & 0x3333333333333333ULL;
+    x = (x | (x << 1)) & 0x5555555555555555ULL;
+    return x;
+}
+
+// a^2: squaring is linear in characteristic 2, the carry-less square just puts a zero bit between all bits of a
+static inline uint128_t gfsquare_128(uint128_t a) {
+    return reduce_256_to_128(spread_bits(a.high >> 32), spread_bits(a.high), spread_bits(a.low >> 32),
+                             spread_bits(a.low));
+}
+
+// a^(2^n), n squarings. a^(2^128) = a for every field element, so there are at most 127 of them
+static inline uint128_t gfsquare_n_128(uint128_t a, uint64_t n) {
+    n %= 128;
+    for (uint64_t i = 0; i < n; i++) {
+        a = gfsquare_128(a);
+    }
+    return a;
+}
+
+EXPORT uint128_t gfsquare(uint64_t a_low, uint64_t a_high) {
+    uint128_t a = {a_low, a_high};
+    return gfsquare_128(a);
+}
+
+EXPORT uint128_t gfsquare_n(uint64_t a_low, uint64_t a_high, uint64_t n) {
+    uint128_t a = {a_low, a_high};
+    return gfsquare_n_128(a, n);
+}
+
+// out[i] = a[i]^2, out may be the same buffer as a
+EXPORT void gfsquare_batch(const uint64_t *a, uint64_t *out, size_t n) {
+    for (size_t i = 0; i < n; i++) {
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        uint128_t result = gfsquare_128(element);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+// Itoh-Tsujii: a^-1 = a^(2^128 - 2) = (a^(2^127 - 1))^2. With beta_k = a^(2^k - 1) and
+// beta_(i + j) = beta_i^(2^j) * beta_j along the addition chain 1, 2, 3, 6, 7, 14, 15, 30, 31, 62, 63, 126, 127
+// that are 127 squarings and 12 multiplications. The "inverse" of 0 is 0
+static inline uint128_t gfinv_128(uint128_t a) {
+    uint128_t beta_1 = a;
+    uint128_t beta_2 = gfmul_128(gfsquare_n_128(beta_1, 1), beta_1);
+    uint128_t beta_3 = gfmul_128(gfsquare_n_128(beta_2, 1), beta_1);
+    uint128_t beta_6 = gfmul_128(gfsquare_n_128(beta_3, 3), beta_3);
+    uint128_t beta_7 = gfmul_128(gfsquare_n_128(beta_6, 1), beta_1);
+    uint128_t beta_14 = gfmul_128(gfsquare_n_128(beta_7, 7), beta_7);
+    uint128_t beta_15 = gfmul_128(gfsquare_n_128(beta_14, 1), beta_1);
+    uint128_t beta_30 = gfmul_128(gfsquare_n_128(beta_15, 15), beta_15);
+    uint128_t beta_31 = gfmul_128(gfsquare_n_128(beta_30, 1), beta_1);
+    uint128_t beta_62 = gfmul_128(gfsquare_n_128(beta_31, 31), beta_31);
+    uint128_t beta_63 = gfmul_128(gfsquare_n_128(beta_62, 1), beta_1);
+    uint128_t beta_126 = gfmul_128(gfsquare_n_128(beta_63, 63), beta_63);
+    uint128_t beta_127 = gfmul_128(gfsquare_n_128(beta_126, 1), beta_1);
+
+    return gfsquare_n_128(beta_127, 1);
+}
+
+EXPORT uint128_t gfinv(uint64_t a_low, uint64_t a_high) {
+    uint128_t a = {a_low, a_high};
+    return gfinv_128(a);
+}
+
+// out[i] = a[i]^-1 (0 stays 0), out may be the same buffer as a.
+// Montgomery's trick: with the prefix products p_i = a_0 * ... * a_i only p_(n-1) gets inverted, then backwards
+// a_i^-1 = p_i^-1 * p_(i-1) and p_(i-1)^-1 = p_i^-1 * a_i => one inversion and about 3n multiplications
+EXPORT void gfinv_batch(const uint64_t *a, uint64_t *out, size_t n) {
+    uint128_t *prefix = malloc(n * sizeof(uint128_t));
+    if (prefix == NULL) {
+        // No memory for the prefix products, one inversion per element
+        for (size_t i = 0; i < n; i++) {
+            uint128_t element = {a[2 * i], a[2 * i + 1]};
+            uint128_t result = gfinv_128(element);
+            out[2 * i] = result.low;
+            out[2 * i + 1] = result.high;
+        }
+        return;
+    }
+
+    // Zeros are left out of the products
+    uint128_t product = {1, 0};
+    for (size_t i = 0; i < n; i++) {
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        if (element.low | element.high) {
+            product = gfmul_128(product, element);
+        }
+        prefix[i] = product;
+    }
+
+    uint128_t inverse = gfinv_128(product);
+    for (size_t i = n; i-- > 0;) {
+        // a[i] is read before out[i] is written, so in place works
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        if (!(element.low | element.high)) {
+            out[2 * i] = 0;
+            out[2 * i + 1] = 0;
+            continue;
+        }
+
+        uint128_t one = {1, 0};
+        uint128_t result = gfmul_128(inverse, i > 0 ? prefix[i - 1] : one);
+        inverse = gfmul_128(inverse, element);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+
+    free(prefix);
+}
+
+// sqrt(x) = x^(2^127), the only constant of the square root
+#define SQRT_X_LOW 0x6db6db6db6db6da4ULL
+#define SQRT_X_HIGH 0x2492492492492492ULL
+
+// Every second bit (0, 2, 4, ...) of a 64 bit word packed into the low 32 bits
+static inline uint64_t compress_even_bits(uint64_t x) {
+    x &= 0x5555555555555555ULL;
+    x = (x | (x >> 1)) & 0x3333333333333333ULL;
+    x = (x | (x >> 2)) & 0x0F0F0F0F0F0F0F0FULL;
+    x = (x | (x >> 4)) & 0x00FF00FF00FF00FFULL;
+    x = (x | (x >> 8)) & 0x0000FFFF0000FFFFULL;
+    x = (x | (x >> 16)) & 0x00000000FFFFFFFFULL;
+    return x;
+}
+
+// Squaring is linear in characteristic 2, so with a = even(x^2) + x * odd(x^2) (split by bit position):
+// sqrt(a) = even(x) + sqrt(x) * odd(x), two bit compressions and one multiplication (no data dependent branches)
+static inline uint128_t gfsqrt_128(uint128_t a) {
+    uint128_t even = {compress_even_bits(a.low) | (compress_even_bits(a.high) << 32), 0};
+    uint128_t odd = {compress_even_bits(a.low >> 1) | (compress_even_bits(a.high >> 1) << 32), 0};
+    uint128_t sqrt_x = {SQRT_X_LOW, SQRT_X_HIGH};
+
+    uint128_t result = gfmul_128(odd, sqrt_x);
+    result.low ^= even.low;
+    return result;
+}
+
+EXPORT uint128_t gfsqrt(uint64_t a_low, uint64_t a_high) {
+    uint128_t a = {a_low, a_high};
+    return gfsqrt_128(a);
+}
+
+// out[i] = sqrt(a[i]), out may be the same buffer as a
+EXPORT void gfsqrt_batch(const uint64_t *a, uint64_t *out, size_t n) {
+    for (size_t i = 0; i < n; i++) {
+        uint128_t element = {a[2 * i], a[2 * i + 1]};
+        uint128_t result = gfsqrt_128(element);
+        out[2 * i] = result.low;
+        out[2 * i + 1] = result.high;
+    }
+}
+
+// Polynomial kernels: a polynomial over GF(2^128) is a buffer of its coefficients (lowest first), n coefficients
+// for degree n - 1, same element layout as the batch kernels
+
+static inline uint128_t load_element(const uint64_t *buffer, size_t i) {
+    uint128_t element = {buffer[2 * i], buffer[2 * i + 1]};
+    return element;
+}
+
+static inline void store_element(uint64_t *buffer, size_t i, uint128_t element) {
+    buffer[2 * i] = element.low;
+    buffer[2 * i + 1] = element.high;
+}
+
+static inline int is_zero_element(const uint64_t *buffer, size_t i) {
+    return !(buffer[2 * i] | buffer[2 * i + 1]);
+}
+
+// Length without leading zero coefficients, 0 for the zero polynomial
+static inline size_t trimmed_length(const uint64_t *a, size_t n) {
+    while (n > 0 && is_zero_element(a, n - 1)) {
+        n--;
+    }
+    return n;
+}
+
+// out = a * b (m + n - 1 coefficients, m, n >= 1), out must not overlap a or b. Every coefficient
+// out[k] = sum of a[i] * b[k - i] is summed up unreduced and reduced once, like gfmul_accumulate
+EXPORT void gfpoly_mul(const uint64_t *a, size_t m, const uint64_t *b, size_t n, uint64_t *out) {
+    for (size_t k = 0; k < m + n - 1; k++) {
+        size_t low = k >= n ? k - n + 1 : 0;
+        size_t high = k < m ? k : m - 1;
+
+        uint64_t sum3 = 0, sum2 = 0, sum1 = 0, sum0 = 0;
+        for (size_t i = low; i <= high; i++) {
+            uint64_t X3, X2, X1, X0;
+            clmul_256(a[2 * i], a[2 * i + 1], b[2 * (k - i)], b[2 * (k - i) + 1], &X3, &X2, &X1, &X0);
+            sum3 ^= X3;
+            sum2 ^= X2;
+            sum1 ^= X1;
+            sum0 ^= X0;
+        }
+
+        store_element(out, k, reduce_256_to_128(sum3, sum2, sum1, sum0));
+    }
+}
+
+// Long division of r (m coefficients) by b (n coefficients, the leading one non zero), in place: r is left with the
+// remainder, q (m - n + 1 coefficients if m >= n, may be NULL) gets the quotient. Returns the length of the remainder
+// without leading zeros, 0 if it is zero
+static size_t gfpoly_divmod_128(uint64_t *r, size_t m, const uint64_t *b, size_t n, uint64_t *q) {
+    size_t length = trimmed_length(r, m);
+
+    if (q != NULL && m >= n) {
+        for (size_t i = 0; i < m - n + 1; i++) {
+            store_element(q, i, (uint128_t) {0, 0});
+        }
+    }
+
+    // Every quotient coefficient is divided by the same leading coefficient, it's inverted only once
+    uint128_t leading_inverse = gfinv_128(load_element(b, n - 1));
+    while (length >= n) {
+        size_t shift = length - n;
+        uint128_t quotient_coefficient = gfmul_128(load_element(r, length - 1), leading_inverse);
+        if (q != NULL) {
+            store_element(q, shift, quotient_coefficient);
+        }
+
+        // r -= quotient coefficient * x^shift * b, the leading coefficient cancels by construction
+        for (size_t j = 0; j + 1 < n; j++) {
+            uint128_t product = gfmul_128(load_element(b, j), quotient_coefficient);
+            r[2 * (shift + j)] ^= product.low;
+            r[2 * (shift + j) + 1] ^= product.high;
+        }
+        store_element(r, length - 1, (uint128_t) {0, 0});
+
+        length = trimmed_length(r, length - 1);
+    }
+
+    return length;
+}
+
+// Quotient and remainder, see gfpoly_divmod_128. Returns the length of the remainder, at least 1 (the zero polynomial)
+EXPORT size_t gfpoly_divmod(uint64_t *r, size_t m, const uint64_t *b, size_t n, uint64_t *q) {
+    size_t length = gfpoly_divmod_128(r, m, b, n, q);
+    return length > 0 ? length : 1;
+}
+
+// Monic gcd of a (m coefficients) and b (n coefficients) with the euclidean algorithm. The remainders are computed
+// in place, so a and b get overwritten (the buffers swap roles every step). out (max(m, n) coefficients) gets the
+// gcd, the return value is its length. Like make_monic of a constant the gcd of two zero polynomials is 1
+EXPORT size_t gfpoly_gcd(uint64_t *a, size_t m, uint64_t *b, size_t n, uint64_t *out) {
+    uint64_t *x = a, *y = b;
+    size_t x_length = trimmed_length(a, m), y_length = trimmed_length(b, n);
+
+    while (y_length > 0) {
+        size_t remainder_length = gfpoly_divmod_128(x, x_length, y, y_length, NULL);
+
+        uint64_t *swap = x;
+        x = y;
+        y = swap;
+        x_length = y_length;
+        y_length = remainder_length;
+    }
+
+    if (x_length == 0) {
+        store_element(out, 0, (uint128_t) {1, 0});
+        return 1;
+    }
+
+    uint128_t leading_inverse = gfinv_128(load_element(x, x_length - 1));
+    for (size_t i = 0; i + 1 < x_length; i++) {
+        store_element(out, i, gfmul_128(load_element(x, i), leading_inverse));
+    }
+    store_element(out, x_length - 1, (uint128_t) {1, 0});
+    return x_length;
+}
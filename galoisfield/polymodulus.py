@@ -0,0 +1,110 @@
+from typing import Final, Optional
+
+import numpy as np
+
+from galoisfield.backend import gfinv, gfpoly_divmod
+from galoisfield.gfmul_lib import UINT64_MASK
+from galoisfield.polymul import coefficients_from_buffer, karatsuba_mul, square_coefficients
+from profiling import counters
+
+# Moduli of at least this degree are reduced with Barrett's two products, smaller ones by the divmod kernel, whose
+# quadratic long division in C is cheaper there. Measured crossover for a of degree 2n - 2: about even at 128,
+# 1.25x faster at 256 and 2x at 1024, see the micro/poly_reduce_divmod and micro/poly_reduce_barrett benchmarks
+BARRETT_CUTOFF: Final[int] = 128
+
+
+def _trimmed(a: np.ndarray) -> np.ndarray:
+    nonzero = np.flatnonzero(a.any(axis=1))
+    return a[:int(nonzero[-1]) + 1 if nonzero.size else 1]
+
+
+class PolyModulus:
+    """Reduction modulo a fixed polynomial f, everything that only depends on f is computed once and reused by
+       every reduction of a powmod, ddf or edf run:
+
+       modulus           f as contiguous (n + 1, 2) uint64 coefficient array (see ArrayPolynomial), degree n
+       leading_inverse   inverse of the leading coefficient of f
+       reciprocal        Barrett: 1 / rev(f) mod x^(n - 1), rev(f) = x^n f(1/x) the reversed coefficients. With it the
+                         quotient of a (degree < 2n - 1) by f is rev(rev(a) * reciprocal mod x^(deg a - n + 1)), two
+                         products instead of a long division. Computed on first use by Newton iteration
+
+       Polynomials go in and out as coefficient arrays, GaloisFieldPolynomial and ArrayPolynomial convert"""
+
+    def __init__(self, modulus: np.ndarray):
+        # A copy, make_monic on the polynomial the modulus came from works in place
+        self.modulus = np.array(_trimmed(modulus))
+        assert self.modulus.any(), "Dividing FieldPoly through 0"
+        self.degree = len(self.modulus) - 1
+
+        leading = self.modulus[-1]
+        self.leading_inverse = gfinv((int(leading[1]) << 64) | int(leading[0]))
+        self._reciprocal: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_polynomial(cls, poly) -> 'PolyModulus':
+        """From a GaloisFieldPolynomial or ArrayPolynomial"""
+        return cls(coefficients_from_buffer(poly.to_uint64_buffer()))
+
+    def reciprocal(self) -> np.ndarray:
+        """1 / rev(f) mod x^(n - 1) by Newton iteration: g = 1 / lc(f), then g = rev(f) * g^2 mod x^2k doubles the
+           correct coefficients every step (g (2 - rev(f) g), the 2 g vanishes in characteristic 2)"""
+        if self._reciprocal is None:
+            precision = max(self.degree - 1, 1)
+            reversed_modulus = self.modulus[::-1]
+
+            reciprocal = np.array([[self.leading_inverse & UINT64_MASK, self.leading_inverse >> 64]], dtype=np.uint64)
+            correct = 1
+            while correct < precision:
+                correct = min(2 * correct, precision)
+                reciprocal = karatsuba_mul(reversed_modulus[:correct], square_coefficients(reciprocal))[:correct]
+
+            self._reciprocal = reciprocal
+        return self._reciprocal
+
+    def reduce(self, a: np.ndarray) -> np.ndarray:
+        """a mod f without leading zeros (one zero for the zero polynomial)"""
+        a = _trimmed(a)
+        if len(a) <= self.degree:
+            return a
+        if counters.ENABLED:
+            counters.count(counters.GFPOLY_DIVMOD_ITERATIONS, len(a) - self.degree)
+
+        if self.degree < BARRETT_CUTOFF or len(a) > 2 * self.degree - 1:
+            _, remainder = gfpoly_divmod(np.ascontiguousarray(a), self.modulus)
+            return coefficients_from_buffer(remainder)
+
+        return self._barrett(a)
+
+    def _barrett(self, a: np.ndarray) -> np.ndarray:
+        quotient_length = len(a) - self.degree
+        reversed_quotient = karatsuba_mul(a[::-1][:quotient_length],
+                                          self.reciprocal()[:quotient_length])[:quotient_length]
+
+        quotient = np.zeros((quotient_length, 2), dtype=np.uint64)
+        quotient[quotient_length - len(reversed_quotient):] = reversed_quotient[::-1]
+
+        # Only the coefficients below x^n are left, the higher ones cancel
+        remainder = a[:self.degree] ^ karatsuba_mul(quotient, self.modulus)[:self.degree]
+        return _trimmed(remainder)
+
+    def multiply(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return self.reduce(karatsuba_mul(a, b))
+
+    def square(self, a: np.ndarray) -> np.ndarray:
+        return self.reduce(square_coefficients(a))
+
+    def pow(self, a: np.ndarray, k: int) -> np.ndarray:
+        """a^k mod f by square and multiply, every intermediate result reduced"""
+        result = np.array([[1, 0]], dtype=np.uint64)
+        if k == 0:
+            return result
+
+        base = self.reduce(a)
+        while k > 0:
+            if k & 1:
+                result = self.multiply(result, base)
+            k >>= 1
+            if k > 0:
+                base = self.square(base)
+
+        return result
@@ -0,0 +1,83 @@
+from typing import Final
+
+import numpy as np
+
+from galoisfield.backend import gfpoly_mul, gfsquare_batch
+from profiling import counters
+
+# Below this many coefficients (of the shorter factor) the schoolbook product is faster than splitting further.
+# Measured crossover with the gfpoly_mul kernel: one split is about even at 256 - 512 and 1.3x faster at 1024,
+# see the micro/poly_mul_schoolbook and micro/poly_mul_karatsuba benchmarks
+KARATSUBA_CUTOFF: Final[int] = 384
+
+
+def coefficients_from_buffer(buffer) -> np.ndarray:
+    """(n, 2) uint64 array of the coefficients in a buffer of (low, high) pairs, a copy"""
+    return np.frombuffer(buffer, dtype="<u8").reshape(-1, 2).astype(np.uint64)
+
+
+def coefficients_to_buffer(coefficients: np.ndarray) -> bytes:
+    return np.ascontiguousarray(coefficients, dtype="<u8").tobytes()
+
+
+def schoolbook_mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Product of two polynomials given as (n, 2) uint64 coefficient arrays (see ArrayPolynomial) in one gfpoly_mul
+       call: all len(a) * len(b) coefficient products, every coefficient of the result reduced only once"""
+    m, n = len(a), len(b)
+    if counters.ENABLED:
+        counters.count(counters.GFMUL_CALLS, m * n)
+
+    result = np.empty((m + n - 1, 2), dtype=np.uint64)
+    gfpoly_mul(np.ascontiguousarray(a), np.ascontiguousarray(b), out=result)
+    return result
+
+
+def square_coefficients(a: np.ndarray) -> np.ndarray:
+    """a^2 = a_0^2 + a_1^2 x^2 + ... in characteristic 2 (the mixed terms appear twice): one gfsquare_batch call"""
+    if counters.ENABLED:
+        counters.count(counters.GFMUL_CALLS, len(a))
+
+    squares = np.empty((len(a), 2), dtype=np.uint64)
+    gfsquare_batch(np.ascontiguousarray(a), out=squares)
+
+    result = np.zeros((2 * len(a) - 1, 2), dtype=np.uint64)
+    result[::2] = squares
+    return result
+
+
+def _add(longer: np.ndarray, shorter: np.ndarray) -> np.ndarray:
+    result = longer.copy()
+    result[:len(shorter)] ^= shorter
+    return result
+
+
+def karatsuba_mul(a: np.ndarray, b: np.ndarray, cutoff: int = KARATSUBA_CUTOFF) -> np.ndarray:
+    """Product like schoolbook_mul with three half size products instead of four per level:
+       a = a0 + a1 x^h, b = b0 + b1 x^h
+       a * b = a0 b0 + ((a0 + a1)(b0 + b1) - a0 b0 - a1 b1) x^h + a1 b1 x^2h
+       (characteristic 2, subtraction is addition). Unbalanced factors are split on the longer one only"""
+    if len(a) < len(b):
+        a, b = b, a
+    m, n = len(a), len(b)
+    if n < max(cutoff, 2):
+        return schoolbook_mul(a, b)
+
+    h = (m + 1) // 2
+    result = np.zeros((m + n - 1, 2), dtype=np.uint64)
+
+    if n <= h:
+        result[:h + n - 1] = karatsuba_mul(a[:h], b, cutoff)
+        result[h:] ^= karatsuba_mul(a[h:], b, cutoff)
+        return result
+
+    a0, a1, b0, b1 = a[:h], a[h:], b[:h], b[h:]
+    low = karatsuba_mul(a0, b0, cutoff)
+    high = karatsuba_mul(a1, b1, cutoff)
+    middle = karatsuba_mul(_add(a0, a1), _add(b0, b1), cutoff)
+    middle[:len(low)] ^= low
+    middle[:len(high)] ^= high
+
+    result[:len(low)] = low
+    result[2 * h:2 * h + len(high)] = high
+    result[h:h + len(middle)] ^= middle
+    return result
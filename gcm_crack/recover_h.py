@@ -2,6 +2,8 @@ import random
 
 from galoisfield.galoisfieldelement import GaloisFieldElement
 from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from galoisfield.polymodulus import PolyModulus
+from galoisfield.fixed_multiplier import FixedMultiplier
 from crypto_algorithms.gcm import get_l, get_ghash
 from gcm_crack.gcm_types import GCMMessage
 
@@ -23,15 +25,19 @@ def _find_correct_h(h_candidates: list[GaloisFieldElement], m1: GCMMessage, m3:
         -> tuple[GaloisFieldElement, GaloisFieldElement]:
     """Gets passed potentially correct H candidates
     and checks if they are really correct by trying to authenticate m3"""
+    m1_l = get_l(m1.ad_bytes, m1.ciphertext_bytes)
+    m3_l = get_l(m3.ad_bytes, m3.ciphertext_bytes)
+
     for potential_auth_key in h_candidates:
+        # Both GHASHes use the same powers of the candidate
+        multiplier = FixedMultiplier(potential_auth_key)
+
         # Calculate back the ek0 for the given auth key, stays the same due to same nonce etc.
-        m1_l = get_l(m1.ad_bytes, m1.ciphertext_bytes)
-        m1_ghash = get_ghash(potential_auth_key, m1.associated_data, m1.ciphertext, m1_l)
+        m1_ghash = get_ghash(potential_auth_key, m1.associated_data, m1.ciphertext, m1_l, multiplier)
         ek0 = m1_ghash + m1.tag
 
         # Try to authenticate m3 with potential auth key
-        m3_l = get_l(m3.ad_bytes, m3.ciphertext_bytes)
-        m3_ghash = get_ghash(potential_auth_key, m3.associated_data, m3.ciphertext, m3_l)
+        m3_ghash = get_ghash(potential_auth_key, m3.associated_data, m3.ciphertext, m3_l, multiplier)
         tag = ek0 + m3_ghash
 
         # If Tag is the same, authentication is successful
@@ -67,13 +73,21 @@ def ddf(f: GaloisFieldPolynomial) -> list[tuple[GaloisFieldPolynomial, int]]:
     d = 1
     z = []
     fstar = f
+    modulus = PolyModulus.from_polynomial(fstar)
+    # x^(q^d) mod fstar, every round raises the one of the round before to the q-th power (128 squarings)
+    # instead of starting over from x with an exponent of 128 d bits
+    frobenius = GaloisFieldPolynomial.x()
 
     while fstar.degree >= 2 * d:
-        h = (pow(GaloisFieldPolynomial.x(), (q ** d), fstar) - GaloisFieldPolynomial.x()) % fstar
+        frobenius = pow(frobenius, q, modulus)
+        h = (frobenius - GaloisFieldPolynomial.x()) % fstar
         g = h.gcd(fstar)
         if g != GaloisFieldPolynomial.one():
             z.append((g, d))
             fstar = fstar // g
+            modulus = PolyModulus.from_polynomial(fstar)
+            # The new fstar divides the old one, reduced by it x^(q^d) mod the old fstar stays x^(q^d) mod fstar
+            frobenius = frobenius % fstar
         d += 1
 
     if fstar != GaloisFieldPolynomial.one():
@@ -87,10 +101,11 @@ def edf(f: GaloisFieldPolynomial, d: int) -> list[GaloisFieldPolynomial]:
     q = 1 << 128
     n = f.degree // d
     z = [f]
+    modulus = PolyModulus.from_polynomial(f)
 
     while len(z) < n:
         h = _generate_random_poly(f.degree)
-        g = (pow(h, (q ** d - 1) // 3, f) - GaloisFieldPolynomial.one())
+        g = (pow(h, (q ** d - 1) // 3, modulus) - GaloisFieldPolynomial.one())
 
         for u in z:
             if u.degree > d:
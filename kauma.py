@@ -1,108 +1,223 @@
+import argparse
 import json
 import sys
 from pathlib import Path
+from typing import Callable, Final, Iterable, Iterator, Mapping, Optional
+
+from dispatcher.registry import LazyActionRegistry
+from dispatcher.executor import (Response, Testcase, resolve_workers, run_in_pool, run_overlapping_io, run_parallel,
+                                 run_sequential, start_pool)
+from dispatcher.streaming import iter_testcases, write_responses
+from dispatcher.server import serve_lines, serve_unix_socket
+from dispatcher.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, ResultCache
+from dispatcher.batch import DEFAULT_BATCH_SIZE, run_batched
+from dispatcher.scheduler import format_budget_overruns, run_longest_first
+from galoisfield.backend import get_backend
+from profiling.profiler import Profiler
+
+# Testcases in flight per worker in stream mode, bounds memory while keeping every worker busy
+STREAM_WINDOW_PER_WORKER: Final[int] = 4
 
 # Loading Libraries in the action files costs a lot of performance (especially Glasskey imports)
-# For That Reason Fast actions like e.g. block2poly get a high factor
-# However we don't want to lazy import in action functions because it's ugly
-from actions.blockpoly_action import poly2block_action, block2poly_action
-from actions.gfmul_action import gfmul_action
-from actions.sea128_action import sea128_action
-from actions.fde_action import fde_action
-from actions.gcm_crypto_action import gcm_encrypt_action, gcm_decrypt_action
-from actions.padding_oracle_action import padding_oracle_action
-from actions.gfpoly_action import (
-    gfpoly_add_action,
-    gfpoly_mul_action,
-    gfpoly_pow_action,
-    gfdiv_action,
-    gfpoly_divmod_action,
-    gfpoly_powmod_action,
-    gfpoly_sort_action,
-    gfpoly_make_monic_action,
-    gfpoly_sqrt_action,
-    gfpoly_diff_action,
-    gfpoly_gcd_action,
-    gfpoly_factor_sff_action,
-    gfpoly_factor_ddf_action,
-    gfpoly_factor_edf_action
-)
-from actions.gcm_crack_action import gcm_crack_action
-from actions.glasskey_action import (
-    gcm_glasskey_prng_action,
-    gcm_prng_int_bits_action,
-    glasskey_prng_int_min_max_action,
-    glasskey_genkey_action,
-    glasskey_break_action
-)
-
-
-ACTION_PROCESSORS = {
-    "poly2block": poly2block_action,
-    "block2poly": block2poly_action,
-    "gfmul": gfmul_action,
-    "sea128": sea128_action,
-    "xex": fde_action,
-    "gcm_encrypt": gcm_encrypt_action,
-    "gcm_decrypt": gcm_decrypt_action,
-    "padding_oracle": padding_oracle_action,
-    "gfpoly_add": gfpoly_add_action,
-    "gfpoly_mul": gfpoly_mul_action,
-    "gfpoly_pow": gfpoly_pow_action,
-    "gfdiv": gfdiv_action,
-    "gfpoly_divmod": gfpoly_divmod_action,
-    "gfpoly_powmod": gfpoly_powmod_action,
-    "gfpoly_sort": gfpoly_sort_action,
-    "gfpoly_make_monic": gfpoly_make_monic_action,
-    "gfpoly_sqrt": gfpoly_sqrt_action,
-    "gfpoly_diff": gfpoly_diff_action,
-    "gfpoly_gcd": gfpoly_gcd_action,
-    "gfpoly_factor_sff": gfpoly_factor_sff_action,
-    "gfpoly_factor_ddf": gfpoly_factor_ddf_action,
-    "gfpoly_factor_edf": gfpoly_factor_edf_action,
-    "gcm_crack": gcm_crack_action,
-    "glasskey_prng": gcm_glasskey_prng_action,
-    "glasskey_prng_int_bits": gcm_prng_int_bits_action,
-    "glasskey_prng_int_min_max": glasskey_prng_int_min_max_action,
-    "glasskey_genkey": glasskey_genkey_action,
-    "glasskey_break": glasskey_break_action
-}
-
-
-def process_testcases(input_json):
-    responses = {}
-
-    for test_id, test_data in input_json["testcases"].items():
-        action = test_data["action"]
-        arguments = test_data["arguments"]
-
-        if action in ACTION_PROCESSORS:
-            func = ACTION_PROCESSORS[action]
-            responses[test_id] = func(arguments)
-
-    return {"responses": responses}
+# For that reason handlers are referenced by "module:function" and only imported on their first use,
+# a run only pays for the subsystems its testcases need (e.g. block2poly doesn't import the glasskey stack)
+ACTION_PROCESSORS = LazyActionRegistry({
+    "poly2block": "actions.blockpoly_action:poly2block_action",
+    "block2poly": "actions.blockpoly_action:block2poly_action",
+    "gfmul": "actions.gfmul_action:gfmul_action",
+    "sea128": "actions.sea128_action:sea128_action",
+    "xex": "actions.fde_action:fde_action",
+    "gcm_encrypt": "actions.gcm_crypto_action:gcm_encrypt_action",
+    "gcm_decrypt": "actions.gcm_crypto_action:gcm_decrypt_action",
+    "padding_oracle": "actions.padding_oracle_action:padding_oracle_action",
+    "gfpoly_add": "actions.gfpoly_action:gfpoly_add_action",
+    "gfpoly_mul": "actions.gfpoly_action:gfpoly_mul_action",
+    "gfpoly_pow": "actions.gfpoly_action:gfpoly_pow_action",
+    "gfdiv": "actions.gfpoly_action:gfdiv_action",
+    "gfpoly_divmod": "actions.gfpoly_action:gfpoly_divmod_action",
+    "gfpoly_powmod": "actions.gfpoly_action:gfpoly_powmod_action",
+    "gfpoly_sort": "actions.gfpoly_action:gfpoly_sort_action",
+    "gfpoly_make_monic": "actions.gfpoly_action:gfpoly_make_monic_action",
+    "gfpoly_sqrt": "actions.gfpoly_action:gfpoly_sqrt_action",
+    "gfpoly_diff": "actions.gfpoly_action:gfpoly_diff_action",
+    "gfpoly_gcd": "actions.gfpoly_action:gfpoly_gcd_action",
+    "gfpoly_factor_sff": "actions.gfpoly_action:gfpoly_factor_sff_action",
+    "gfpoly_factor_ddf": "actions.gfpoly_action:gfpoly_factor_ddf_action",
+    "gfpoly_factor_edf": "actions.gfpoly_action:gfpoly_factor_edf_action",
+    "gcm_crack": "actions.gcm_crack_action:gcm_crack_action",
+    "glasskey_prng": "actions.glasskey_action:gcm_glasskey_prng_action",
+    "glasskey_prng_int_bits": "actions.glasskey_action:gcm_prng_int_bits_action",
+    "glasskey_prng_int_min_max": "actions.glasskey_action:glasskey_prng_int_min_max_action",
+    "glasskey_genkey": "actions.glasskey_action:glasskey_genkey_action",
+    "glasskey_break": "actions.glasskey_action:glasskey_break_action"
+})
+
+# Optional handlers that take the arguments of many testcases of one action and return all their responses
+BATCH_PROCESSORS = LazyActionRegistry({
+    "block2poly": "actions.blockpoly_action:block2poly_batch_action",
+    "gfmul": "actions.gfmul_action:gfmul_batch_action",
+    "sea128": "actions.sea128_action:sea128_batch_action",
+    "gfdiv": "actions.gfpoly_action:gfdiv_batch_action"
+})
+
+# Actions that spend their time waiting on the network, with io_threads they run on threads next to the others.
+# The padding oracle server takes one connection at a time, so only testcases of different servers overlap
+IO_BOUND_ACTIONS: Final[frozenset[str]] = frozenset({"padding_oracle"})
+
+
+def run_testcases(testcases: Iterable[Testcase], workers: int = 1, window: Optional[int] = None,
+                  profiler: Optional[Profiler] = None, cache: Optional[ResultCache] = None,
+                  batch_size: int = 0, io_threads: int = 0) -> Iterator[Response]:
+    """workers != 1 runs the testcases in a process pool (0 => one worker per cpu core), output order stays the same.
+       With a cache only testcases that are neither cached nor repeated within the run get computed.
+       batch_size > 0 hands up to that many testcases of an action with a batch handler to it at once.
+       io_threads > 0 runs the I/O-bound testcases on that many threads concurrently to the other ones.
+       Without a window (all testcases known upfront) the pool starts the most expensive testcases first"""
+    def compute(to_run: Iterable[Testcase], processors: Mapping[str, Callable]) -> Iterator[Response]:
+        if workers == 1:
+            return run_sequential(to_run, processors)
+        if window is None:
+            # Started before run_longest_first reads the input, which submits the I/O testcases to their threads
+            pool = start_pool(workers, processors)
+            return run_longest_first(to_run, lambda ordered: run_in_pool(ordered, processors, pool))
+        return run_parallel(to_run, processors, workers, window)
+
+    def execute(to_run: Iterable[Testcase], processors: Mapping[str, Callable]) -> Iterator[Response]:
+        processors = profiler.wrap(processors) if profiler else processors
+
+        if io_threads > 0:
+            responses = run_overlapping_io(to_run, processors, IO_BOUND_ACTIONS, compute, io_threads)
+        else:
+            responses = compute(to_run, processors)
+
+        return profiler.collect(responses) if profiler else responses
+
+    def run_uncached(uncached_testcases: Iterable[Testcase]) -> Iterator[Response]:
+        if batch_size > 0:
+            return run_batched(uncached_testcases, ACTION_PROCESSORS, BATCH_PROCESSORS, execute, batch_size)
+        return execute(uncached_testcases, ACTION_PROCESSORS)
+
+    return cache.run(testcases, ACTION_PROCESSORS, run_uncached) if cache else run_uncached(testcases)
+
+
+def process_testcases(input_json, workers: int = 1, profiler: Optional[Profiler] = None,
+                      cache: Optional[ResultCache] = None, batch_size: int = 0, io_threads: int = 0):
+    testcases = input_json["testcases"]
+
+    if workers != 1:
+        # Import the needed handlers before the pool starts, so forked workers inherit them
+        actions = {test_data["action"] for test_data in testcases.values()}
+        ACTION_PROCESSORS.resolve(actions)
+        if batch_size > 0:
+            BATCH_PROCESSORS.resolve(actions)
+
+    responses = run_testcases(testcases.items(), workers, profiler=profiler, cache=cache, batch_size=batch_size,
+                              io_threads=io_threads)
+
+    return {"responses": dict(responses)}
+
+
+def stream_testcases(input_file, output=sys.stdout, workers: int = 1, profiler: Optional[Profiler] = None,
+                     cache: Optional[ResultCache] = None, batch_size: int = 0, io_threads: int = 0):
+    """Reads the testcases one by one and writes every response as soon as it is done,
+       memory is bounded by the largest testcase instead of the whole file"""
+    window = resolve_workers(workers) * STREAM_WINDOW_PER_WORKER
+    responses = run_testcases(iter_testcases(input_file), workers, window, profiler, cache, batch_size, io_threads)
+    write_responses(responses, output)
+
+
+def serve(argv: list[str]):
+    """Long-running mode: imports, the gfmul library, cipher contexts and caches stay warm between requests"""
+    parser = argparse.ArgumentParser(prog="./kauma serve")
+    parser.add_argument("--socket", help="listen on this unix socket path instead of stdin/stdout")
+    parser.add_argument("--preload", action="store_true", help="import every action handler on startup")
+    args = parser.parse_args(argv)
+
+    get_backend()
+    if args.preload:
+        ACTION_PROCESSORS.resolve()
+
+    if args.socket:
+        try:
+            serve_unix_socket(args.socket, process_testcases)
+        except OSError as e:
+            sys.exit(f"Error: {e}")
+    else:
+        serve_lines(sys.stdin, sys.stdout, process_testcases)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(prog="./kauma", epilog="./kauma serve [--socket PATH] starts the daemon mode")
+    parser.add_argument("test_file", type=Path, help="json file containing the testcases")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of worker processes, 0 uses one per cpu core (default: 1, no pool)")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse testcases incrementally and print every response as soon as it is done")
+    parser.add_argument("--import-times", action="store_true",
+                        help="report the time spent importing each action's handler to stderr")
+    parser.add_argument("--profile", action="store_true",
+                        help="report per testcase/action latency and hot primitive counts (summary + json) to stderr")
+    parser.add_argument("--budget", type=float, metavar="SECONDS",
+                        help="report testcases that took longer than this wall-clock budget to stderr")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse results of identical testcases from an on-disk cache")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, metavar="DIR",
+                        help="directory of the cache (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE // (1024 * 1024), metavar="MB",
+                        help="size limit of the cache, least recently used results are evicted (default: %(default)s)")
+    parser.add_argument("--batch", action="store_true",
+                        help="pass all testcases of an action with a batch handler (gfmul, gfdiv, block2poly, sea128) "
+                             "to it at once")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, metavar="N",
+                        help="testcases that are read and grouped per batch (default: %(default)s)")
+    parser.add_argument("--io-threads", type=int, default=0, metavar="N",
+                        help="run network-bound testcases (padding_oracle) on N threads concurrently to the "
+                             "cpu-bound ones, one at a time per oracle server (default: 0, off)")
+
+    return parser.parse_args()
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: ./kauma <test_file.json>", file=sys.stderr)
-        sys.exit(1)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve(sys.argv[2:])
+        return
 
-    test_file = Path(sys.argv[1])
+    args = parse_arguments()
+    test_file = args.test_file
 
     if not test_file.exists():
-        raise f"Error: File {test_file} does not exist"
+        sys.exit(f"Error: File {test_file} does not exist")
+
+    # The budget check uses the per testcase timings of the profiler
+    profiler = Profiler() if args.profile or args.budget else None
+    batch_size = args.batch_size if args.batch else 0
 
     try:
-        with open(test_file) as f:
-            input_data = json.load(f)
+        cache = ResultCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache else None
+
+        if args.stream:
+            with open(test_file) as f:
+                stream_testcases(f, sys.stdout, args.workers, profiler, cache, batch_size, args.io_threads)
+        else:
+            with open(test_file) as f:
+                input_data = json.load(f)
+
+            results = process_testcases(input_data, args.workers, profiler, cache, batch_size, args.io_threads)
+
+            print(json.dumps(results))
+
+        if args.import_times:
+            print(ACTION_PROCESSORS.format_import_times(), file=sys.stderr)
 
-        results = process_testcases(input_data)
+        if args.budget:
+            print(format_budget_overruns(profiler.testcases, args.budget), file=sys.stderr)
 
-        print(json.dumps(results))
+        if args.profile:
+            print(profiler.format_summary(), file=sys.stderr)
+            print(json.dumps(profiler.report()), file=sys.stderr)
 
     except Exception as e:
-        raise f"Error: {e}"
+        sys.exit(f"Error: {e}")
 
 
 if __name__ == "__main__":
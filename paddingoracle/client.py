@@ -1,5 +1,7 @@
 import socket
 
+from profiling import counters
+
 
 class Client:
     def __init__(self, host, port):
@@ -19,6 +21,8 @@ class Client:
         return bytes(data)
 
     def send_q_blocks(self, q_blocks: list[bytes]) -> bytes:
+        if counters.ENABLED:
+            counters.count(counters.PADDING_ORACLE_ROUND_TRIPS)
         length_bytes = len(q_blocks).to_bytes(2, "little")
         self.socket.sendall(length_bytes)
 
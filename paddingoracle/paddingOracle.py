@@ -1,3 +1,4 @@
+import threading
 from typing import Final
 
 from constants import BLOCK_SIZE
@@ -6,6 +7,16 @@ from utils import xor_bytes
 
 BRUTEFORCE_CHUNK_SIZE: Final[int] = 256
 
+# The oracle server handles one connection at a time (listen(1)), testcases running on I/O threads take turns
+# per server instead of overflowing its backlog
+_server_locks: dict[tuple[str, int], threading.Lock] = {}
+_server_locks_guard = threading.Lock()
+
+
+def _server_lock(host: str, port: int) -> threading.Lock:
+    with _server_locks_guard:
+        return _server_locks.setdefault((host, port), threading.Lock())
+
 
 def _invert_second_last_byte(successful_padding_messages: list[bytes]) -> list[bytes]:
     inverted_messages = []
@@ -101,13 +112,14 @@ def recover_padding_oracle_plaintext(ciphertext: bytes, iv: bytes, host: str, po
 
     blocks = [iv] + [ciphertext[i:i + BLOCK_SIZE] for i in range(0, len(ciphertext), BLOCK_SIZE)]
 
-    for i in range(1, len(blocks)):
-        current_block = blocks[i]
-        iv = blocks[i - 1]
+    with _server_lock(host, port):
+        for i in range(1, len(blocks)):
+            current_block = blocks[i]
+            iv = blocks[i - 1]
 
-        pd = PaddingOracleBlock(current_block, iv, host, port)
+            pd = PaddingOracleBlock(current_block, iv, host, port)
 
-        plaintext_block = pd.recover_plaintext_block()
-        plaintext.extend(plaintext_block)
+            plaintext_block = pd.recover_plaintext_block()
+            plaintext.extend(plaintext_block)
 
     return bytes(plaintext)
@@ -0,0 +1,42 @@
+import threading
+from collections import Counter
+from typing import Dict, Final
+
+# Names of the counted hot primitives
+GFMUL_CALLS: Final[str] = "gfmul_calls"
+GFPOLY_DIVMOD_ITERATIONS: Final[str] = "gfpoly_divmod_iterations"
+SEA_ENCRYPT_BLOCKS: Final[str] = "sea_encrypt_blocks"
+PADDING_ORACLE_ROUND_TRIPS: Final[str] = "padding_oracle_round_trips"
+
+# Hot paths only check this flag (if counters.ENABLED: ...), so counting costs close to nothing while it is off
+ENABLED: bool = False
+
+
+class _ThreadCounts(threading.local):
+    """Every thread counts separately, so testcases running on I/O threads don't mix their counts"""
+    def __init__(self):
+        self.counts = Counter()
+
+
+_local = _ThreadCounts()
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def count(name: str, amount: int = 1):
+    _local.counts[name] += amount
+
+
+def reset() -> Dict[str, int]:
+    """Returns the counts since the last reset and starts counting from zero again"""
+    counts = dict(_local.counts)
+    _local.counts.clear()
+    return counts
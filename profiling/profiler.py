@@ -0,0 +1,129 @@
+import time
+from collections import Counter, defaultdict
+from collections.abc import Mapping
+from dataclasses import dataclass, field, asdict
+from functools import partial
+from typing import Any, Callable, Dict, Final, Iterable, Iterator
+
+from profiling import counters
+
+SLOWEST_TESTCASES_SHOWN: Final[int] = 10
+
+
+@dataclass
+class TestcaseProfile:
+    test_id: str
+    action: str
+    seconds: float
+    counters: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class _ProfiledResponse:
+    """What a profiled handler returns instead of the plain response, small enough to come back from a worker"""
+    action: str
+    response: Dict[str, Any]
+    seconds: float
+    counters: Dict[str, int]
+
+
+def _run_profiled(action: str, handler: Callable, arguments: Dict[str, Any]) -> _ProfiledResponse:
+    # Enabled here and not by the caller, so spawned worker processes count as well
+    counters.enable()
+    counters.reset()
+
+    start_time = time.perf_counter()
+    response = handler(arguments)
+    seconds = time.perf_counter() - start_time
+
+    return _ProfiledResponse(action, response, seconds, counters.reset())
+
+
+class ProfiledProcessors(Mapping):
+    """Wraps an action table, every handler measures its latency and the hot primitive counts of its testcase"""
+
+    def __init__(self, processors: Mapping[str, Callable]):
+        self._processors = processors
+
+    def __getitem__(self, action: str) -> Callable:
+        return partial(_run_profiled, action, self._processors[action])
+
+    def __contains__(self, action: object) -> bool:
+        return action in self._processors
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._processors)
+
+    def __len__(self) -> int:
+        return len(self._processors)
+
+
+class Profiler:
+    def __init__(self):
+        self.testcases: list[TestcaseProfile] = []
+
+    @staticmethod
+    def wrap(processors: Mapping[str, Callable]) -> ProfiledProcessors:
+        return ProfiledProcessors(processors)
+
+    def collect(self, responses: Iterable[tuple[str, _ProfiledResponse]]) -> Iterator[tuple[str, Dict[str, Any]]]:
+        """Records the profile of every response coming from wrapped handlers and passes the plain response on"""
+        for test_id, profiled in responses:
+            self.testcases.append(TestcaseProfile(test_id, profiled.action, profiled.seconds, profiled.counters))
+            yield test_id, profiled.response
+
+    def _action_summaries(self) -> Dict[str, Dict[str, Any]]:
+        grouped = defaultdict(list)
+        for testcase in self.testcases:
+            grouped[testcase.action].append(testcase)
+
+        summaries = {}
+        for action, testcases in grouped.items():
+            seconds = [testcase.seconds for testcase in testcases]
+            action_counters = Counter()
+            for testcase in testcases:
+                action_counters.update(testcase.counters)
+
+            summaries[action] = {
+                "count": len(testcases),
+                "total_seconds": sum(seconds),
+                "mean_seconds": sum(seconds) / len(seconds),
+                "max_seconds": max(seconds),
+                "counters": dict(action_counters)
+            }
+
+        return dict(sorted(summaries.items(), key=lambda item: -item[1]["total_seconds"]))
+
+    def report(self) -> Dict[str, Any]:
+        total_counters = Counter()
+        for testcase in self.testcases:
+            total_counters.update(testcase.counters)
+
+        return {
+            "total_seconds": sum(testcase.seconds for testcase in self.testcases),
+            "counters": dict(total_counters),
+            "actions": self._action_summaries(),
+            "testcases": [asdict(testcase) for testcase in self.testcases]
+        }
+
+    def format_summary(self) -> str:
+        report = self.report()
+        lines = [f"Profile: {len(self.testcases)} testcases in {report['total_seconds']:.3f} s", "",
+                 f"{'action':<28}{'count':>7}{'total s':>11}{'mean ms':>11}{'max ms':>11}  counters"]
+
+        for action, summary in report["actions"].items():
+            action_counters = ", ".join(f"{name}={value}" for name, value in sorted(summary["counters"].items()))
+            lines.append(f"{action:<28}{summary['count']:>7}{summary['total_seconds']:>11.3f}"
+                         f"{summary['mean_seconds'] * 1000:>11.2f}{summary['max_seconds'] * 1000:>11.2f}"
+                         f"  {action_counters}")
+
+        lines += ["", "Slowest testcases:"]
+        slowest = sorted(self.testcases, key=lambda testcase: -testcase.seconds)[:SLOWEST_TESTCASES_SHOWN]
+        lines += [f"  {testcase.seconds * 1000:>10.2f} ms  {testcase.action:<28}{testcase.test_id}"
+                  for testcase in slowest]
+
+        lines += ["", "Hot primitives:"]
+        lines += [f"  {name:<30}{value:>12}" for name, value in
+                  sorted(report["counters"].items(), key=lambda item: -item[1])]
+
+        return "\n".join(lines)
@@ -0,0 +1,11 @@
+import pytest
+
+from galoisfield.gfmul_lib import compile_library
+
+
+@pytest.fixture(scope="session", autouse=True)
+def gf_library():
+    """Builds the gfmul libraries and extensions before the first test (nothing to do if they are cached), so no
+       test picks the python backend only because the build didn't run yet. A failed build is reported by the
+       tests that need the native backend"""
+    compile_library()
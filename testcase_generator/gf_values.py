@@ -0,0 +1,28 @@
+import random
+
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from galoisfield.gfmul_lib import ELEMENT_SIZE
+
+# Random field elements shared by the galoisfield tests, seeded so failures reproduce
+ELEMENTS = 257
+rng = random.Random(42)
+A = [rng.getrandbits(128) for _ in range(ELEMENTS)]
+B = [rng.getrandbits(128) for _ in range(ELEMENTS)]
+
+
+def to_buffer(values: list[int]) -> bytes:
+    return b"".join(value.to_bytes(ELEMENT_SIZE, "little") for value in values)
+
+
+def from_buffer(buffer) -> list[int]:
+    data = bytes(buffer)
+    return [int.from_bytes(data[i:i + ELEMENT_SIZE], "little") for i in range(0, len(data), ELEMENT_SIZE)]
+
+
+def gfmul(a: int, b: int) -> int:
+    return int(GaloisFieldElement(a) * GaloisFieldElement(b))
+
+
+def poly(values: list[int]) -> GaloisFieldPolynomial:
+    return GaloisFieldPolynomial([GaloisFieldElement(value) for value in values])
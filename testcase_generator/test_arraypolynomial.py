@@ -0,0 +1,32 @@
+from copy import copy
+
+from galoisfield.arraypolynomial import ArrayPolynomial
+from testcase_generator.gf_values import A, B, poly
+
+
+def test_array_polynomial():
+    # Leading zeros, a short and a long divisor
+    a, b = poly(A[:40] + [0]), poly(B[:5])
+    long_b = poly(B[:16])
+    array_a, array_b = ArrayPolynomial.from_polynomial(a), ArrayPolynomial.from_polynomial(b)
+    array_long_b = ArrayPolynomial.from_polynomial(long_b)
+
+    assert ArrayPolynomial.from_b64(a.to_b64()).to_b64() == a.to_b64()
+    assert (array_a + array_b).to_polynomial() == a + b
+    assert (array_a * array_b).to_polynomial() == a * b
+    assert array_b.square().to_polynomial() == b.square()
+    assert (array_b ** 5).to_polynomial() == b ** 5
+    assert pow(array_a, 1000, array_b).to_polynomial() == pow(a, 1000, b)
+    for divisor, array_divisor in ((b, array_b), (long_b, array_long_b)):
+        quotient, remainder = divmod(array_a, array_divisor)
+        assert (quotient.to_polynomial(), remainder.to_polynomial()) == divmod(a, divisor)
+
+    assert array_a.gcd(array_b * array_long_b).to_polynomial() == a.gcd(b * long_b)
+    assert array_a.diff().to_polynomial() == a.diff()
+    assert array_b.square().sqrt().to_polynomial() == b
+    assert ArrayPolynomial.from_polynomial(b).make_monic().to_polynomial() == copy(b).make_monic()
+    assert array_b.to_polynomial() == b, "Operations must not change their operands"
+
+    polys = [poly(A[i:i + length]) for i, length in enumerate((3, 1, 3, 2, 3))] + [poly([1, 0, 0])]
+    assert [p.to_b64() for p in sorted(polys)] == \
+           [p.to_b64() for p in sorted(ArrayPolynomial.from_polynomial(p) for p in polys)]
@@ -0,0 +1,57 @@
+import galoisfield.backend as backend_module
+from galoisfield.backend import BACKEND_ENVIRONMENT_VARIABLE, BACKEND_LOADERS, PythonBackend, get_backend, load_backend
+from testcase_generator.gf_values import ELEMENTS, A, B, from_buffer, to_buffer
+
+
+def test_backends_agree():
+    native = load_backend("native")
+    a_view, b_view = memoryview(to_buffer(A)), memoryview(to_buffer(B))
+
+    for name in BACKEND_LOADERS:
+        backend = load_backend(name)
+        assert backend is not None, f"{name} backend isn't available"
+
+        assert [backend.gfmul(a, b) for a, b in zip(A, B)] == [native.gfmul(a, b) for a, b in zip(A, B)]
+
+        out = memoryview(bytearray(len(a_view)))
+        backend.gfmul_batch(a_view, b_view, out, ELEMENTS)
+        assert from_buffer(out) == [native.gfmul(a, b) for a, b in zip(A, B)]
+
+        backend.gfmul_scalar(a_view, B[0], out, ELEMENTS)
+        assert from_buffer(out) == [native.gfmul(a, B[0]) for a in A]
+
+        assert backend.gfmul_accumulate(a_view, b_view, ELEMENTS) == native.gfmul_accumulate(a_view, b_view, ELEMENTS)
+
+        backend.gfinv_batch(a_view, out, ELEMENTS)
+        assert from_buffer(out) == [native.gfinv(a) for a in A]
+
+        backend.gfsqrt_batch(a_view, out, ELEMENTS)
+        assert from_buffer(out) == [native.gfsqrt(a) for a in A]
+
+        backend.gfsquare_batch(a_view, out, ELEMENTS)
+        assert from_buffer(out) == [native.gfmul(a, a) for a in A]
+        assert [backend.gfsquare_n(a, 7) for a in A[:8]] == [native.gfsquare_n(a, 7) for a in A[:8]]
+
+
+def test_python_fallback_warning(monkeypatch, capsys):
+    def missing_library():
+        raise OSError("library not built")
+
+    monkeypatch.setitem(BACKEND_LOADERS, "native", missing_library)
+    monkeypatch.setitem(BACKEND_LOADERS, "portable", missing_library)
+    monkeypatch.setattr(backend_module, "unavailable_backends", {})
+    try:
+        for forced, warnings in ((None, 1), ("python", 0)):
+            get_backend.cache_clear()
+            load_backend.cache_clear()
+            if forced:
+                monkeypatch.setenv(BACKEND_ENVIRONMENT_VARIABLE, forced)
+            else:
+                monkeypatch.delenv(BACKEND_ENVIRONMENT_VARIABLE, raising=False)
+
+            # Reported once per process, on the pick and not on every use
+            assert isinstance(get_backend(), PythonBackend) and isinstance(get_backend(), PythonBackend)
+            assert capsys.readouterr().err.count("Warning: no gfmul library available") == warnings
+    finally:
+        get_backend.cache_clear()
+        load_backend.cache_clear()
@@ -0,0 +1,23 @@
+from galoisfield.backend import BACKEND_LOADERS, gfinv_batch, load_backend
+from galoisfield.batch import gfdiv_blocks
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.gfmul_lib import ELEMENT_SIZE
+from testcase_generator.gf_values import A, B, from_buffer, gfmul, to_buffer
+
+
+def test_gfinv_batch():
+    assert from_buffer(gfinv_batch(to_buffer(A))) == [int(GaloisFieldElement(a).inverse()) for a in A]
+
+    # Zeros stay zero and don't disturb the inverses around them
+    with_zeros = [0, A[0], 0, 0, A[1], 0]
+    expected = [0, int(GaloisFieldElement(A[0]).inverse()), 0, 0, int(GaloisFieldElement(A[1]).inverse()), 0]
+    for name in BACKEND_LOADERS:
+        out = memoryview(bytearray(len(with_zeros) * ELEMENT_SIZE))
+        load_backend(name).gfinv_batch(memoryview(to_buffer(with_zeros)), out, len(with_zeros))
+        assert from_buffer(out) == expected
+
+
+def test_gfdiv_blocks():
+    # All divisors are inverted in one batch
+    quotients = from_buffer(gfdiv_blocks(to_buffer(A), to_buffer(B)))
+    assert [gfmul(quotient, b) for quotient, b in zip(quotients, B)] == A
@@ -0,0 +1,400 @@
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import dispatcher.cache as cache_module
+import dispatcher.executor as executor
+import kauma
+from dispatcher.batch import BATCH_SUFFIX, DEFAULT_BATCH_SIZE, run_batched
+from dispatcher.cache import ResultCache, code_version
+from dispatcher.executor import run_overlapping_io, run_sequential
+from dispatcher.registry import LazyActionRegistry
+from dispatcher.scheduler import estimate_cost, format_budget_overruns, run_longest_first
+from dispatcher.server import serve_lines, serve_unix_socket
+from dispatcher.streaming import CHUNK_SIZE, iter_testcases
+from kauma import ACTION_PROCESSORS, process_testcases, run_testcases, stream_testcases
+from profiling import counters
+# Aliased, pytest would try to collect a class named Test*
+from profiling.profiler import Profiler, TestcaseProfile as Profile
+
+SOURCE_ROOT = Path(__file__).parent.parent
+TESTCASE_DIR = SOURCE_ROOT / "testcases"
+# Only cpu-bound actions, padding_oracle needs the oracle server test.py starts
+INPUT_FILES = ("assignment1", "assignment3", "assignment4", "gfpoly_mul", "gfpoly_divmod")
+
+
+@contextmanager
+def oracle_server() -> Iterator[int]:
+    """Runs the oracle server of the padding oracle testcases in its own process on a free port, yields the port"""
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+
+    script = ("from paddingoracle.server import Server; "
+              "from testcase_generator.padding_oracle_generator import PO_TESTCASE_KEY; "
+              f"Server('localhost', {port}, PO_TESTCASE_KEY).run()")
+    server = subprocess.Popen([sys.executable, "-c", script], cwd=SOURCE_ROOT, stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("localhost", port)).close()
+                break
+            except ConnectionRefusedError:
+                assert time.monotonic() < deadline, "Oracle server didn't start"
+                time.sleep(0.01)
+        yield port
+    finally:
+        server.kill()
+        server.wait()
+
+
+def load_testcases(repeats: int = 1) -> dict:
+    """The testcases of the input files in one document, repeats copies of each with their own test ids"""
+    testcases = {}
+    for name in INPUT_FILES:
+        with open(TESTCASE_DIR / f"{name}_input.json") as f:
+            document = json.load(f)
+
+        for repeat in range(repeats):
+            for test_id, test_data in document["testcases"].items():
+                testcases[f"{name}/{repeat}/{test_id}"] = test_data
+
+    return {"testcases": testcases}
+
+
+def sequential_responses(document: dict) -> list:
+    """Responses of the plain sequential run in output order, every other mode has to produce exactly these"""
+    return list(process_testcases(document)["responses"].items())
+
+
+def test_worker_pool():
+    document = load_testcases()
+    expected = sequential_responses(document)
+
+    for workers in (2, 0):
+        assert list(process_testcases(document, workers)["responses"].items()) == expected
+
+
+def test_main_errors(tmp_path):
+    # Failures of every mode reach the user as one message on stderr and a non-zero exit code
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    for arguments in (["missing.json"],
+                      [str(TESTCASE_DIR / "assignment1_input.json"), "--cache", "--cache-dir", str(not_a_directory)]):
+        result = subprocess.run([sys.executable, "kauma.py", *arguments], cwd=SOURCE_ROOT, capture_output=True,
+                                text=True)
+        assert result.returncode == 1 and result.stdout == ""
+        assert result.stderr.startswith("Error: ") and "Traceback" not in result.stderr
+
+
+def test_stream():
+    document = load_testcases()
+    expected = sequential_responses(document)
+
+    for workers in (1, 2):
+        output = io.StringIO()
+        stream_testcases(io.StringIO(json.dumps(document)), output, workers)
+        assert list(json.loads(output.getvalue())["responses"].items()) == expected
+
+
+def test_stream_reader():
+    # Values split over many chunks, numbers at chunk ends and top level members around "testcases"
+    document = {"comment": {"nested": [1, 2.5, "}"]}, "testcases": load_testcases()["testcases"], "count": 12345}
+    text = json.dumps(document, indent=1)
+
+    for chunk_size in (1, 3, CHUNK_SIZE):
+        assert list(iter_testcases(io.StringIO(text), chunk_size)) == list(document["testcases"].items())
+    assert list(iter_testcases(io.StringIO('{"testcases": {}}'))) == []
+
+
+def test_lazy_registry():
+    registry = LazyActionRegistry({"dumps": "json:dumps", "broken": "no_such_module:handler"})
+
+    # Membership and iteration don't import, only the lookup does
+    assert "broken" in registry and list(registry) == ["dumps", "broken"]
+    assert registry["dumps"] is json.dumps and list(registry.import_times) == ["dumps"]
+    registry.resolve(["dumps", "unknown"])
+    try:
+        registry.resolve()
+        assert False, "Resolving all handlers has to import the broken one"
+    except ModuleNotFoundError:
+        pass
+
+    # A run only imports the handlers of its actions, here not the glasskey stack
+    script = ("import sys; from kauma import process_testcases; "
+              "process_testcases({'testcases': {'0': {'action': 'block2poly', "
+              "'arguments': {'semantic': 'xex', 'block': 'ARIAAAAAAAAAAAAAAAAAgA=='}}}}); "
+              "print('rsa_backdoor.glasskey' in sys.modules, 'actions.blockpoly_action' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", script], cwd=SOURCE_ROOT, capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.split() == ["False", "True"]
+
+
+def test_serve_lines():
+    document = load_testcases()
+    expected = sequential_responses(document)
+
+    requests = [json.dumps(document), "", "{broken", json.dumps(document)]
+    output = io.StringIO()
+    serve_lines((request + "\n" for request in requests), output, process_testcases)
+
+    answers = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(answers) == 3
+    assert list(answers[0]["responses"].items()) == expected and answers[2] == answers[0]
+    assert answers[1]["error"].startswith("JSONDecodeError")
+
+
+def test_serve_unix_socket(tmp_path):
+    document = load_testcases()
+    socket_path = str(tmp_path / "kauma.sock")
+    # serve_forever only stops on KeyboardInterrupt, the daemon thread ends with the test process
+    threading.Thread(target=serve_unix_socket, args=(socket_path, process_testcases), daemon=True).start()
+
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path):
+        assert time.monotonic() < deadline, "Server didn't create its socket"
+        time.sleep(0.01)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps(document) + "\n{broken\n").encode())
+        with client.makefile() as answers:
+            assert list(json.loads(answers.readline())["responses"].items()) == sequential_responses(document)
+            assert "error" in json.loads(answers.readline())
+
+
+def test_serve_unix_socket_keeps_files(tmp_path):
+    # A mistyped --socket path must not delete the file at it
+    path = tmp_path / "notes.txt"
+    path.write_text("keep")
+    try:
+        serve_unix_socket(str(path), process_testcases)
+        assert False, "Serving on a regular file has to raise"
+    except FileExistsError:
+        pass
+    assert path.read_text() == "keep"
+
+
+def test_profiler():
+    document = load_testcases()
+    expected = sequential_responses(document)
+
+    try:
+        for workers in (1, 2):
+            profiler = Profiler()
+            assert list(process_testcases(document, workers, profiler)["responses"].items()) == expected
+
+            # Counts come back from the worker processes too, one profile per testcase in output order
+            profiles = {profile.test_id: profile for profile in profiler.testcases}
+            assert list(profiles) == [test_id for test_id, _ in expected]
+            assert profiles["assignment1/0/gfmul"].counters == {counters.GFMUL_CALLS: 1}
+            assert profiles["assignment1/0/sea128-encrypt"].counters == {counters.SEA_ENCRYPT_BLOCKS: 1}
+
+            report = profiler.report()
+            assert report["actions"]["gfpoly_mul"]["count"] == 8
+            assert report["counters"][counters.GFMUL_CALLS] == \
+                   sum(profile.counters.get(counters.GFMUL_CALLS, 0) for profile in profiler.testcases)
+            assert "Hot primitives:" in profiler.format_summary()
+    finally:
+        # Profiled handlers switch counting on for the whole process
+        counters.disable()
+
+
+def test_cache(tmp_path):
+    document = load_testcases(repeats=2)
+    expected = sequential_responses(document)
+    distinct = len(load_testcases()["testcases"])
+
+    # The first run computes every distinct testcase once, the repeats are hits on its results
+    cache = ResultCache(tmp_path)
+    assert list(process_testcases(document, cache=cache)["responses"].items()) == expected
+    assert (cache.misses, cache.hits) == (distinct, distinct)
+
+    cache = ResultCache(tmp_path)
+    assert list(process_testcases(document, workers=2, cache=cache)["responses"].items()) == expected
+    assert (cache.misses, cache.hits) == (0, 2 * distinct)
+
+
+def test_cache_stream(tmp_path, monkeypatch):
+    testcases = list(load_testcases()["testcases"].items())
+    monkeypatch.setattr(cache_module, "MAX_HELD_BACK", 5)
+    read = []
+
+    def reading():
+        for testcase in testcases:
+            read.append(testcase[0])
+            yield testcase
+
+    for workers, batch_size, held_back in ((1, 0, 1), (1, 7, 5), (2, 0, 5)):
+        # The first testcase is computed, all others are hits
+        cache_dir = tmp_path / f"{workers}-{batch_size}"
+        list(run_testcases(testcases[1:], cache=ResultCache(cache_dir)))
+        cache = ResultCache(cache_dir)
+
+        read.clear()
+        for count, (test_id, _) in enumerate(run_testcases(reading(), workers, 4, cache=cache,
+                                                           batch_size=batch_size)):
+            # Hits are written as they are read and not held back until the end of the input
+            assert read[count] == test_id and len(read) <= count + held_back + 1
+        assert len(read) == len(testcases) and cache.misses == 1
+
+
+def test_cache_invalidation(tmp_path, monkeypatch):
+    unrelated = tmp_path / "important_project"
+    unrelated.mkdir()
+    (unrelated / "notes.txt").write_text("keep")
+    # Named like a version directory, but not created by the cache
+    (tmp_path / "0123456789abcdef").mkdir()
+
+    document = load_testcases()
+    expected = sequential_responses(document)
+    process_testcases(document, cache=ResultCache(tmp_path))
+    old_version = tmp_path / code_version()
+
+    # Any source change gets a new version directory, the old one is removed and everything computed again
+    monkeypatch.setattr(cache_module, "code_version", lambda: "fedcba9876543210")
+    cache = ResultCache(tmp_path)
+    assert list(process_testcases(document, cache=cache)["responses"].items()) == expected
+    assert (cache.misses, cache.hits) == (len(document["testcases"]), 0)
+
+    assert not old_version.exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+           ["0123456789abcdef", "fedcba9876543210", "important_project"]
+    assert (unrelated / "notes.txt").read_text() == "keep"
+
+
+def test_code_version_sources():
+    sources = {str(path.relative_to(SOURCE_ROOT)) for path in cache_module._source_files()}
+    assert {"kauma.py", "dispatcher/cache.py", "galoisfield/gfmul.c", "actions/gfmul_action.py"} <= sources
+    # Benchmarks and tests don't change any result
+    assert not any(source.startswith(("bench", "testcase_generator")) for source in sources)
+
+
+def test_batch():
+    document = load_testcases(repeats=3)
+    expected = sequential_responses(document)
+
+    # One chunk, many chunks with several batches each and chunks too small for any batch
+    for batch_size in (DEFAULT_BATCH_SIZE, 7, 1):
+        assert list(process_testcases(document, batch_size=batch_size)["responses"].items()) == expected
+
+
+def test_batch_handler():
+    batch_calls = []
+
+    def double(arguments: dict) -> dict:
+        return {"value": 2 * arguments["value"]}
+
+    def double_batch(arguments: list) -> list:
+        batch_calls.append(len(arguments))
+        return [double(batch_arguments) for batch_arguments in arguments]
+
+    testcases = [(f"{action}{i}", {"action": action, "arguments": {"value": i}})
+                 for i in range(10) for action in ("double", "single")]
+    processors = {"double": double, "single": double}
+
+    responses = list(run_batched(testcases, processors, {"double": double_batch}, run_sequential, batch_size=8))
+    assert responses == [(test_id, double(test_data["arguments"])) for test_id, test_data in testcases]
+    # Chunks of 8 testcases hold 4 of the batched action, the last one only 2
+    assert batch_calls == [4, 4, 2]
+
+
+def test_longest_first():
+    document = load_testcases()
+    testcases = list(document["testcases"].items())
+    started = []
+
+    def run(ordered):
+        for test_id, test_data in ordered:
+            started.append(test_id)
+        return run_sequential(ordered, ACTION_PROCESSORS)
+
+    assert list(run_longest_first(testcases, run)) == sequential_responses(document)
+
+    costs = [estimate_cost(document["testcases"][test_id]["action"], document["testcases"][test_id]["arguments"])
+             for test_id in started]
+    assert costs == sorted(costs, reverse=True) and costs[0] > costs[-1]
+    assert estimate_cost("gfmul" + BATCH_SUFFIX, [{}, {}]) == 2 * estimate_cost("gfmul", {})
+
+
+def test_budget_report():
+    profiles = [Profile("fast", "gfmul", 0.001), Profile("slow", "gcm_crack", 2.5),
+                Profile("slower", "glasskey_break", 4.0)]
+
+    lines = format_budget_overruns(profiles, 1.0).splitlines()
+    assert lines[0] == "2 testcases took longer than the budget of 1.000 s"
+    assert [line.split()[-1] for line in lines[1:]] == ["slower", "slow"]
+    assert format_budget_overruns(profiles, 10) == "0 testcases took longer than the budget of 10.000 s"
+
+
+def test_io_threads():
+    document = load_testcases(repeats=3)
+    expected = sequential_responses(document)
+
+    # With batches, several chunks of one action are in flight at once
+    for workers, batch_size in ((1, 0), (1, 7), (2, 7)):
+        responses = process_testcases(document, workers, batch_size=batch_size, io_threads=2)["responses"]
+        assert list(responses.items()) == expected
+    assert list(process_testcases(document, 2, batch_size=7)["responses"].items()) == expected
+
+
+def test_overlapping_io():
+    def wait(arguments: dict) -> dict:
+        time.sleep(arguments["seconds"])
+        return arguments
+
+    # I/O testcases finishing in reverse order between computed ones, the output stays in input order
+    testcases = [(str(i), {"action": "wait" if i % 3 else "compute", "arguments": {"seconds": (12 - i) / 1000}})
+                 for i in range(12)]
+    processors = {"wait": wait, "compute": lambda arguments: arguments}
+
+    responses = list(run_overlapping_io(testcases, processors, {"wait"}, run_sequential, io_threads=4))
+    assert responses == [(test_id, test_data["arguments"]) for test_id, test_data in testcases]
+
+
+def test_io_threads_oracle(monkeypatch):
+    with open(TESTCASE_DIR / "padding_oracle_input.json") as f:
+        oracle_testcases = list(json.load(f)["testcases"].items())[:16]
+    with open(TESTCASE_DIR / "padding_oracle_output.json") as f:
+        oracle_responses = json.load(f)["responses"]
+
+    # The pool has to fork before the first I/O thread runs
+    threads_at_fork = []
+    original_start_pool = executor.start_pool
+
+    def start_pool(workers, processors):
+        threads_at_fork.append([thread.name for thread in threading.enumerate()])
+        return original_start_pool(workers, processors)
+
+    monkeypatch.setattr(kauma, "start_pool", start_pool)
+    monkeypatch.setattr(executor, "start_pool", start_pool)
+
+    # The server handles a single connection at a time, the I/O threads would run all oracle testcases at once
+    with oracle_server() as port:
+        document = load_testcases()
+        expected = dict(sequential_responses(document))
+        for test_id, test_data in oracle_testcases:
+            document["testcases"][f"oracle/{test_id}"] = {"action": "padding_oracle",
+                                                          "arguments": {**test_data["arguments"], "port": port}}
+            expected[f"oracle/{test_id}"] = oracle_responses[test_id]
+
+        for workers in (1, 2):
+            responses = process_testcases(document, workers, io_threads=8)["responses"]
+            assert list(responses.items()) == list(expected.items())
+
+            output = io.StringIO()
+            stream_testcases(io.StringIO(json.dumps(document)), output, workers, io_threads=8)
+            assert list(json.loads(output.getvalue())["responses"].items()) == list(expected.items())
+
+    # Once in process_testcases (longest first) and once in stream_testcases
+    assert len(threads_at_fork) == 2
+    assert not any(name.startswith("kauma-io") for names in threads_at_fork for name in names)
@@ -0,0 +1,27 @@
+from galoisfield.fixed_multiplier import SUPPORTED_TABLE_BITS, FixedMultiplier, Ghash
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from testcase_generator.gf_values import A, B, gfmul
+
+
+def test_fixed_multiplier():
+    h = GaloisFieldElement(B[0])
+    # The library backends multiply faster than the python lookup tables
+    assert FixedMultiplier(h).table_bits == 0
+
+    for table_bits in SUPPORTED_TABLE_BITS:
+        multiplier = FixedMultiplier(h, table_bits=table_bits, max_powers=5)
+        assert [int(multiplier.multiply(GaloisFieldElement(a))) for a in A] == [gfmul(a, B[0]) for a in A]
+
+        # Streaming over more blocks than powers are kept
+        ghash = Ghash(multiplier)
+        expected = 0
+        for start in range(0, 23, 7):
+            elements = [GaloisFieldElement(a) for a in A[start:start + 7]]
+            ghash.update(elements)
+            for gfe in elements:
+                expected = gfmul(expected ^ int(gfe), B[0])
+            assert ghash.value == expected
+
+        # Short updates take the sequential path
+        ghash.update([GaloisFieldElement(A[0])])
+        assert ghash.value == gfmul(expected ^ A[0], B[0])
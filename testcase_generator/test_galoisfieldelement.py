@@ -0,0 +1,66 @@
+import pickle
+from copy import copy
+
+from galoisfield.backend import gfsqrt, gfsquare_batch
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from testcase_generator.gf_values import A, B, from_buffer, gfmul, to_buffer
+
+
+def test_inverse():
+    for a in A + [1, 2, 1 << 127]:
+        assert int(GaloisFieldElement(a) * GaloisFieldElement(a).inverse()) == 1
+
+    p = GaloisFieldPolynomial([GaloisFieldElement(value) for value in A[:6]])
+    leading = GaloisFieldElement(A[5])
+    assert [int(gfe) for gfe in copy(p).make_monic()] == [int(GaloisFieldElement(a) / leading) for a in A[:5]] + [1]
+
+
+def test_sqrt():
+    for a in A[:16]:
+        assert int(GaloisFieldElement(a) ** GaloisFieldElement.SQRT_POWER) == gfsqrt(a)
+        assert gfmul(gfsqrt(a), gfsqrt(a)) == a
+
+    p = GaloisFieldPolynomial([GaloisFieldElement(value) for value in A[:5]])
+    square = p * p
+    coefficients = [int(gfe) for gfe in square]
+
+    assert [int(gfe) for gfe in square.sqrt()] == A[:5]
+    assert [int(gfe) for gfe in square] == coefficients
+
+
+def test_element_value_type():
+    a = GaloisFieldElement(A[0])
+    b = a
+    b *= GaloisFieldElement(B[0])
+    assert int(a) == A[0] and int(b) == gfmul(A[0], B[0])
+
+    a ** 3
+    assert int(a) == A[0]
+
+    assert GaloisFieldElement.zero() is GaloisFieldElement.zero()
+    assert len({GaloisFieldElement(A[0]), GaloisFieldElement(A[0]), GaloisFieldElement(A[1])}) == 2
+    assert pickle.loads(pickle.dumps(a)) == a
+
+    try:
+        a._int_value = 0
+        assert False, "Elements have to be immutable"
+    except AttributeError:
+        pass
+
+
+def test_square():
+    for a in A[:16] + [0, 1]:
+        gfe = GaloisFieldElement(a)
+        assert gfe.square() == gfe * gfe
+        assert from_buffer(gfsquare_batch(to_buffer([a]))) == [gfmul(a, a)]
+
+        expected = gfe
+        for n in range(1, 9):
+            expected = expected * expected
+            assert gfe.square_n(n) == expected
+            assert gfe ** (1 << n) == expected
+        assert gfe.square_n(128) == gfe and gfe.square_n(128 + 3) == gfe.square_n(3)
+
+    p = GaloisFieldPolynomial([GaloisFieldElement(value) for value in A[:5]])
+    assert p.square() == p * p
@@ -0,0 +1,42 @@
+from array import array
+
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from galoisfield.backend import gfmul_accumulate, gfmul_batch, gfmul_scalar
+from testcase_generator.gf_values import A, B, from_buffer, gfmul, to_buffer
+
+
+def test_gfmul_batch():
+    expected = [gfmul(a, b) for a, b in zip(A, B)]
+    assert from_buffer(gfmul_batch(to_buffer(A), to_buffer(B))) == expected
+
+    # In place on an array('Q')
+    a_array = array("Q", to_buffer(A))
+    gfmul_batch(a_array, to_buffer(B), out=a_array)
+    assert from_buffer(a_array) == expected
+
+
+def test_gfmul_scalar():
+    assert from_buffer(gfmul_scalar(to_buffer(A), B[0])) == [gfmul(a, B[0]) for a in A]
+
+
+def test_gfmul_accumulate():
+    expected = 0
+    for a, b in zip(A, B):
+        expected ^= gfmul(a, b)
+
+    assert gfmul_accumulate(to_buffer(A), to_buffer(B)) == expected
+    assert gfmul_accumulate(to_buffer(A), to_buffer(B), 2) == gfmul(A[0], B[0]) ^ gfmul(A[1], B[1])
+    assert gfmul_accumulate(b"", b"") == 0
+
+
+def test_polynomial_mul():
+    a = GaloisFieldPolynomial([GaloisFieldElement(value) for value in A[:7]])
+    b = GaloisFieldPolynomial([GaloisFieldElement(value) for value in B[:4]])
+
+    expected = [0] * (len(a) + len(b) - 1)
+    for i, a_value in enumerate(A[:7]):
+        for j, b_value in enumerate(B[:4]):
+            expected[i + j] ^= gfmul(a_value, b_value)
+
+    assert [int(gfe) for gfe in a * b] == expected
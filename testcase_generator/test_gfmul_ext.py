@@ -0,0 +1,22 @@
+from galoisfield.backend import LibraryBackend, load_backend
+from testcase_generator.gf_values import A, B
+
+
+def test_extension_matches_ctypes():
+    edge_cases = [0, 1, (1 << 64) - 1, 1 << 64, (1 << 128) - 1]
+    for name in ("native", "portable"):
+        backend = load_backend(name)
+        assert backend.extension is not None, f"Extension of the {name} library wasn't built"
+
+        for a, b in zip(A + edge_cases, B + edge_cases[::-1]):
+            assert backend.gfmul(a, b) == backend.ctypes_gfmul(a, b)
+            assert backend.gfinv(a) == LibraryBackend.gfinv(backend, a)
+            assert backend.gfsquare_n(a, 5) == LibraryBackend.gfsquare_n(backend, a, 5)
+            assert backend.gfsqrt(a) == LibraryBackend.gfsqrt(backend, a)
+
+        for invalid in (-1, 1 << 128):
+            try:
+                backend.gfmul(invalid, 1)
+                assert False, "Values outside of the field have to raise"
+            except OverflowError:
+                pass
@@ -0,0 +1,45 @@
+import sysconfig
+from functools import reduce
+from operator import xor
+
+from galoisfield.backend import LibraryBackend, load_backend
+from galoisfield.gfmul_lib import _remove_stale_builds, load_library, supported_variants
+from testcase_generator.gf_values import ELEMENTS, A, B, from_buffer, to_buffer
+
+
+def test_library_variants_agree():
+    native = load_backend("native")
+    # Odd lengths: the vpclmul variant processes pairs of elements and the last one on its own
+    for n in (1, 2, 3, ELEMENTS):
+        a_view, b_view = memoryview(to_buffer(A[:n])), memoryview(to_buffer(B[:n]))
+        out = memoryview(bytearray(len(a_view)))
+
+        for variant in supported_variants():
+            backend = LibraryBackend(variant.name, load_library(variant.name))
+
+            backend.gfmul_batch(a_view, b_view, out, n)
+            assert from_buffer(out) == [native.gfmul(a, b) for a, b in zip(A[:n], B)]
+            backend.gfmul_scalar(a_view, B[0], out, n)
+            assert from_buffer(out) == [native.gfmul(a, B[0]) for a in A[:n]]
+            assert backend.gfmul_accumulate(a_view, b_view, n) == reduce(xor, map(native.gfmul, A[:n], B))
+
+
+def test_remove_stale_builds(tmp_path):
+    extension_suffix = sysconfig.get_config_var("EXT_SUFFIX")
+    current = tmp_path / f"_gfmul_native-{'1' * 16}{extension_suffix}"
+    stale = [f"_gfmul_native-{'2' * 16}{extension_suffix}", f"_gfmul_native-{'3' * 16}{extension_suffix}"]
+    # Other extension, other variant, another suffix, an unfinished build and an unrelated file
+    kept = [f"_gfmul_portable-{'2' * 16}{extension_suffix}", f"libgfmul-pclmul-{'2' * 16}.so",
+            f"_gfmul_native-{'2' * 16}.so", f"{current.name}.123.tmp", "notes.txt"]
+    for name in [current.name, *stale, *kept]:
+        (tmp_path / name).touch()
+
+    _remove_stale_builds(current)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([current.name, *kept])
+
+    library = tmp_path / f"libgfmul-pclmul-{'1' * 16}.so"
+    (tmp_path / f"libgfmul-vpclmul-{'2' * 16}.so").touch()
+    library.touch()
+    _remove_stale_builds(library)
+    assert not (tmp_path / f"libgfmul-pclmul-{'2' * 16}.so").exists()
+    assert (tmp_path / f"libgfmul-vpclmul-{'2' * 16}.so").exists()
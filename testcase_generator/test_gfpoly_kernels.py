@@ -0,0 +1,37 @@
+from galoisfield.backend import BACKEND_LOADERS, gfpoly_divmod, gfpoly_gcd, gfpoly_mul, load_backend
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from galoisfield.gfmul_lib import ELEMENT_SIZE
+from testcase_generator.gf_values import A, B, from_buffer, gfmul, to_buffer
+
+
+def test_polynomial_kernels():
+    a, b, c = A[:11], B[:4] + [0], A[20:23]
+    product = from_buffer(gfpoly_mul(to_buffer(a), to_buffer(b)))
+    assert product == [int(gfe) for gfe in GaloisFieldPolynomial([GaloisFieldElement(value) for value in a]) *
+                       GaloisFieldPolynomial([GaloisFieldElement(value) for value in b])] + [0]
+
+    # a = q * b + r with fewer coefficients in r than in b (its trailing zero doesn't count)
+    quotient, remainder = gfpoly_divmod(to_buffer(a), to_buffer(b))
+    assert len(remainder) < 4 * ELEMENT_SIZE
+    recombined = from_buffer(gfpoly_mul(quotient, to_buffer(B[:4])))
+    assert [value ^ r for value, r in zip(recombined, from_buffer(remainder) + [0] * 11)] == a
+
+    a_times_c = gfpoly_mul(to_buffer(a), to_buffer(c))
+    b_times_c = gfpoly_mul(to_buffer(B[:4]), to_buffer(c))
+    expected_gcd = to_buffer(c)
+    for name in BACKEND_LOADERS:
+        backend = load_backend(name)
+        out = memoryview(bytearray(len(a_times_c)))
+        backend.gfpoly_mul(memoryview(to_buffer(a)), 11, memoryview(to_buffer(c)), 3, out)
+        assert bytes(out) == bytes(a_times_c)
+
+        r, q = memoryview(bytearray(a_times_c)), memoryview(bytearray(11 * ELEMENT_SIZE))
+        assert backend.gfpoly_divmod(r, 13, memoryview(to_buffer(c)), 3, q) == 1
+        assert bytes(q) == to_buffer(a) and not any(r)
+
+        out = memoryview(bytearray(len(a_times_c)))
+        length = backend.gfpoly_gcd(memoryview(bytearray(a_times_c)), 13, memoryview(bytearray(b_times_c)), 6, out)
+        leading_inverse = GaloisFieldElement(c[-1]).inverse()
+        assert from_buffer(out[:length * ELEMENT_SIZE]) == [gfmul(value, int(leading_inverse)) for value in c]
+    assert from_buffer(gfpoly_gcd(b"", expected_gcd))[-1] == 1
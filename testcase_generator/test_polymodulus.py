@@ -0,0 +1,26 @@
+from galoisfield.arraypolynomial import ArrayPolynomial
+from galoisfield.backend import gfpoly_divmod
+from galoisfield.galoisfieldelement import GaloisFieldElement
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from galoisfield.polymodulus import PolyModulus
+from galoisfield.polymul import coefficients_from_buffer, coefficients_to_buffer
+from testcase_generator.gf_values import A, B, to_buffer
+
+
+def test_poly_modulus():
+    # Barrett below its cutoff too, the reduction has to match the long division for every shape of a
+    modulus = PolyModulus(coefficients_from_buffer(to_buffer(B[:6])))
+    for length in (3, 6, 8, 9, 11):
+        a = coefficients_from_buffer(to_buffer(A[:length]))
+        _, expected = gfpoly_divmod(to_buffer(A[:length]), to_buffer(B[:6]))
+        assert coefficients_to_buffer(modulus.reduce(a)) == expected
+        if modulus.degree < length <= 2 * modulus.degree - 1:
+            assert coefficients_to_buffer(modulus._barrett(a)) == expected
+
+    f = GaloisFieldPolynomial([GaloisFieldElement(value) for value in B[:6]])
+    base = GaloisFieldPolynomial([GaloisFieldElement(value) for value in A[:7]])
+    for k in (0, 1, 2, 37):
+        expected = (base ** k) % f if k else GaloisFieldPolynomial.one()
+        assert pow(base, k, f) == expected
+        assert pow(base, k, modulus) == expected
+        assert pow(ArrayPolynomial.from_polynomial(base), k, modulus).to_polynomial() == expected
@@ -0,0 +1,15 @@
+from galoisfield.polymul import coefficients_from_buffer, coefficients_to_buffer, karatsuba_mul
+from testcase_generator.gf_values import A, B, from_buffer, gfmul, to_buffer
+
+
+def test_karatsuba():
+    # Balanced, unbalanced and single coefficient factors, split down to the smallest pieces and not at all
+    for m, n in ((13, 13), (20, 3), (9, 16), (1, 1)):
+        expected = [0] * (m + n - 1)
+        for i, a_value in enumerate(A[:m]):
+            for j, b_value in enumerate(B[:n]):
+                expected[i + j] ^= gfmul(a_value, b_value)
+
+        a, b = coefficients_from_buffer(to_buffer(A[:m])), coefficients_from_buffer(to_buffer(B[:n]))
+        for cutoff in (2, 3, 128):
+            assert from_buffer(coefficients_to_buffer(karatsuba_mul(a, b, cutoff))) == expected
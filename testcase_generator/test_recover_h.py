@@ -0,0 +1,46 @@
+import random
+
+from galoisfield.galoisfieldpolynomial import GaloisFieldPolynomial
+from gcm_crack.recover_h import ddf
+from testcase_generator.gf_values import poly
+
+
+def ddf_from_scratch(f: GaloisFieldPolynomial) -> list[tuple[GaloisFieldPolynomial, int]]:
+    """ddf computing x^(q^d) mod f* anew from x in every round"""
+    q = 1 << 128
+    d = 1
+    z = []
+    fstar = f
+
+    while fstar.degree >= 2 * d:
+        h = (pow(GaloisFieldPolynomial.x(), q ** d, fstar) - GaloisFieldPolynomial.x()) % fstar
+        g = h.gcd(fstar)
+        if g != GaloisFieldPolynomial.one():
+            z.append((g, d))
+            fstar = fstar // g
+        d += 1
+
+    if fstar != GaloisFieldPolynomial.one():
+        z.append((fstar, fstar.degree))
+    elif len(z) == 0:
+        z.append((f, 1))
+    return sorted(z)
+
+
+def test_ddf():
+    rng = random.Random(25)
+
+    for degree in (2, 5, 7, 9):
+        # Two linear factors are found in the first round, then f* shrinks and the carried x^(q^d) is reduced by the
+        # rest, which gets split in the following rounds
+        linear = [poly([rng.getrandbits(128), 1]) for _ in range(2)]
+        rest = poly([rng.getrandbits(128) for _ in range(degree)] + [1])
+        f = linear[0] * linear[1] * rest
+
+        factors = ddf(f)
+        assert factors == ddf_from_scratch(f)
+        assert any(d == 1 and factor.degree >= 2 for factor, d in factors)
+        assert sum(factor.degree for factor, _ in factors) == f.degree
+
+        # Without any factor found early
+        assert ddf(rest) == ddf_from_scratch(rest)